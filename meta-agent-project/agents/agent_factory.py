@@ -6,6 +6,8 @@ from langchain.agents import AgentExecutor
 from dataclasses import dataclass
 import logging
 
+from config.llm_streaming import get_request_callbacks, GenerationAborted
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -101,8 +103,15 @@ class BaseAgent:
             # Create a specialized prompt based on agent type
             prompt = self._create_prompt(query, context, task_type)
             
-            # Generate response using LLM
-            response = await self._generate_response(prompt)
+            # A retry means the first attempt's (possibly cached) response was rejected; drop it so
+            # a repeat of the query regenerates instead of replaying it (first attempts use default sampling)
+            if input_data.get("attempt", 1) > 1 and hasattr(self.llm, "invalidate"):
+                self.llm.invalidate(prompt)
+            if input_data.get("feedback"):
+                prompt = self._add_feedback(prompt, input_data["feedback"])
+            
+            # Generate response using LLM (retries vary the sampling parameters)
+            response = await self._generate_response(prompt, **input_data.get("sampling", {}))
             
             return {
                 "status": "success",
@@ -164,15 +173,29 @@ Query: {query}
 
 Response:"""
     
-    async def _generate_response(self, prompt: str) -> str:
+    def _add_feedback(self, prompt: str, feedback: Dict[str, Any]) -> str:
+        """Tell the LLM why its previous answer was rejected, just before the response slot"""
+        notes = "A previous answer to this request was rejected:\n"
+        notes += "".join(f"- {issue}\n" for issue in feedback.get("issues", []))
+        if feedback.get("suggestions"):
+            notes += "Make sure to:\n" + "".join(f"- {suggestion}\n" for suggestion in feedback["suggestions"])
+        head, separator, tail = prompt.rpartition("Response:")
+        if not separator:
+            return f"{prompt}\n\n{notes}"
+        return f"{head}{notes}\n{separator}{tail}"
+    
+    async def _generate_response(self, prompt: str, **llm_kwargs: Any) -> str:
         """Generate response using the LLM"""
         try:
             # Use agenerate for async generation
-            result = await self.llm.agenerate([prompt])
+            result = await self.llm.agenerate([prompt], callbacks=get_request_callbacks(), **llm_kwargs)
             if result and result.generations and result.generations[0]:
                 return result.generations[0][0].text.strip()
             else:
                 return f"I'm {self.name}, and I've processed your request, but I couldn't generate a detailed response."
+        except GenerationAborted:
+            # Stopped by streaming validation; surface it as a failed attempt rather than a fallback answer
+            raise
         except Exception as e:
             logger.warning(f"LLM generation failed for {self.name}: {e}")
             return f"I'm {self.name}, and I understand your request about the topic, but I'm having trouble generating a detailed response right now."
@@ -194,3 +217,40 @@ class AgentFactory:
             capabilities=capabilities,
             description=description
         )
+    
+    def create_lazy_agent(self, blueprint: Dict[str, Any]) -> "LazyAgent":
+        """Create a lightweight agent descriptor that builds the real agent on first use"""
+        return LazyAgent(blueprint, self)
+
+class LazyAgent:
+    """Agent descriptor that defers building the real agent until its first delegation
+    
+    Exposes name, capabilities and description for routing without holding a prompt,
+    tools or memory; the built agent is cached for later calls.
+    """
+    # Number of descriptors whose agent has actually been built (process-wide)
+    built_count = 0
+    
+    def __init__(self, blueprint: Dict[str, Any], factory: AgentFactory):
+        self.name = blueprint.get("name", "default_agent")
+        self.capabilities = blueprint.get("capabilities", [])
+        self.description = blueprint.get("description", "")
+        self.blueprint = blueprint
+        self._factory = factory
+        self._agent: Optional[BaseAgent] = None
+    
+    @property
+    def is_built(self) -> bool:
+        return self._agent is not None
+    
+    def get_agent(self) -> BaseAgent:
+        """Get the real agent, building it on first access"""
+        if self._agent is None:
+            self._agent = self._factory.create_agent(self.blueprint)
+            LazyAgent.built_count += 1
+            logger.info(f"🏗️ Built agent {self.name} on first use")
+        return self._agent
+    
+    async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Process input with the real agent"""
+        return await self.get_agent().process(input_data)
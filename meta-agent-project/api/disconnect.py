@@ -0,0 +1,81 @@
+from typing import Dict, Any, Optional, Awaitable
+import asyncio
+import logging
+import time
+
+from fastapi import Request
+
+logger = logging.getLogger(__name__)
+
+class ClientDisconnected(Exception):
+    """Raised when a run was cancelled because its HTTP client disconnected"""
+
+class DisconnectCanceller:
+    """Cancels in-flight workflow runs whose HTTP client has gone away"""
+
+    def __init__(self, poll_interval: float = 0.5):
+        self.poll_interval = poll_interval
+
+        # Counters
+        self.completed = 0
+        self.cancelled = 0
+        self.avg_run_seconds: Optional[float] = None
+        self.cancelled_seconds = 0.0
+        self.reclaimed_seconds = 0.0
+
+    def record_completion(self, seconds: float) -> None:
+        """Record a run that finished normally"""
+        self.completed += 1
+        if self.avg_run_seconds is None:
+            self.avg_run_seconds = seconds
+        else:
+            self.avg_run_seconds = 0.9 * self.avg_run_seconds + 0.1 * seconds
+
+    def record_cancellation(self, seconds: float) -> None:
+        """Record a run abandoned by its client after running for the given time"""
+        self.cancelled += 1
+        self.cancelled_seconds += seconds
+        # Estimate the work saved as the typical run time this one did not get to use
+        reclaimed = max(0.0, (self.avg_run_seconds or 0.0) - seconds)
+        self.reclaimed_seconds += reclaimed
+        logger.info(f"🔌 Client disconnected after {seconds:.1f}s - cancelled run (~{reclaimed:.1f}s reclaimed)")
+
+    async def run(self, request: Request, awaitable: Awaitable[Any]) -> Any:
+        """Run the awaitable, cancelling it if the client disconnects first
+
+        Raises ClientDisconnected when the run was cancelled for a disconnect.
+        """
+        start = time.perf_counter()
+        task = asyncio.ensure_future(awaitable)
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=self.poll_interval)
+                if done:
+                    result = task.result()
+                    self.record_completion(time.perf_counter() - start)
+                    return result
+                if await request.is_disconnected():
+                    break
+        finally:
+            if not task.done():
+                task.cancel()
+
+        # Wait for the cancellation to unwind through the graph and the pending LLM call
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+        self.record_cancellation(time.perf_counter() - start)
+        raise ClientDisconnected()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cancellation counters"""
+        runs = self.completed + self.cancelled
+        return {
+            "completed_runs": self.completed,
+            "cancelled_runs": self.cancelled,
+            "cancel_rate": self.cancelled / runs if runs else 0.0,
+            "avg_run_seconds": self.avg_run_seconds,
+            "cancelled_run_seconds": self.cancelled_seconds,
+            "reclaimed_seconds": self.reclaimed_seconds
+        }
@@ -0,0 +1,465 @@
+from typing import Dict, Any, Optional, List, Tuple
+from collections import deque
+import asyncio
+import logging
+import threading
+import time
+import weakref
+
+import aiohttp
+from langchain.llms.base import BaseLLM
+from langchain.schema import LLMResult
+from langchain.callbacks.base import AsyncCallbackHandler, BaseCallbackHandler
+
+from config.llm_cache import inner_callbacks
+from config.llm_streaming import GenerationAborted
+
+logger = logging.getLogger(__name__)
+
+class EndpointBalancer:
+    """Least-outstanding-requests selection across backend endpoints with health-based ejection"""
+
+    def __init__(self, endpoints: List[str], max_failures: int = 3, eject_seconds: float = 30.0,
+                 health_check_interval: float = 10.0):
+        self.endpoints = [
+            {
+                "url": url.rstrip("/"),
+                "outstanding": 0,
+                "requests": 0,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "ejected_until": 0.0,
+                "latency_seconds": 0.0
+            }
+            for url in endpoints
+        ]
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.health_check_interval = health_check_interval
+        self.ejections = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+
+    def _is_available(self, endpoint: Dict[str, Any], now: float) -> bool:
+        return endpoint["ejected_until"] <= now
+
+    def acquire(self, exclude: Optional[List[int]] = None) -> Optional[int]:
+        """Reserve the available endpoint with the fewest outstanding requests"""
+        exclude = exclude or []
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                i for i, endpoint in enumerate(self.endpoints)
+                if i not in exclude and self._is_available(endpoint, now)
+            ]
+            if not candidates:
+                # Every endpoint is ejected - try the one that comes back soonest rather than failing outright
+                candidates = sorted(
+                    (i for i in range(len(self.endpoints)) if i not in exclude),
+                    key=lambda i: self.endpoints[i]["ejected_until"]
+                )[:1]
+            if not candidates:
+                return None
+
+            # Rotate the starting point so ties are spread evenly
+            start = self._next % len(self.endpoints)
+            self._next += 1
+            index = min(candidates, key=lambda i: (self.endpoints[i]["outstanding"], (i - start) % len(self.endpoints)))
+            self.endpoints[index]["outstanding"] += 1
+            self.endpoints[index]["requests"] += 1
+            return index
+
+    def idle_count(self) -> int:
+        """Number of available endpoints with no request in flight"""
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for endpoint in self.endpoints if endpoint["outstanding"] == 0 and self._is_available(endpoint, now))
+
+    def release(self, index: int, elapsed: float, success: Optional[bool]) -> None:
+        """Return an endpoint reservation; success=None means the call was cancelled"""
+        with self._lock:
+            endpoint = self.endpoints[index]
+            endpoint["outstanding"] -= 1
+            if success:
+                endpoint["consecutive_failures"] = 0
+                endpoint["ejected_until"] = 0.0
+                # Exponentially weighted latency for observability
+                endpoint["latency_seconds"] = elapsed if not endpoint["latency_seconds"] else (
+                    0.8 * endpoint["latency_seconds"] + 0.2 * elapsed
+                )
+            elif success is False:
+                endpoint["failures"] += 1
+                endpoint["consecutive_failures"] += 1
+                if endpoint["consecutive_failures"] >= self.max_failures:
+                    self._eject(endpoint)
+
+    def _eject(self, endpoint: Dict[str, Any]) -> None:
+        if endpoint["ejected_until"] <= time.monotonic():
+            self.ejections += 1
+            logger.warning(f"🚫 Ejecting LLM endpoint {endpoint['url']} for {self.eject_seconds:.0f}s")
+        endpoint["ejected_until"] = time.monotonic() + self.eject_seconds
+
+    async def check_health(self, session: Optional[aiohttp.ClientSession] = None) -> Dict[str, bool]:
+        """Probe every endpoint once, ejecting dead ones and restoring recovered ones"""
+        own_session = session is None
+        session = session or aiohttp.ClientSession()
+        results = {}
+        try:
+            for endpoint in self.endpoints:
+                try:
+                    async with session.get(
+                        f"{endpoint['url']}/api/tags",
+                        timeout=aiohttp.ClientTimeout(total=2)
+                    ) as response:
+                        healthy = response.status == 200
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    healthy = False
+
+                with self._lock:
+                    if healthy:
+                        if endpoint["ejected_until"] > time.monotonic():
+                            logger.info(f"✅ LLM endpoint {endpoint['url']} is healthy again")
+                        endpoint["consecutive_failures"] = 0
+                        endpoint["ejected_until"] = 0.0
+                    else:
+                        self._eject(endpoint)
+                results[endpoint["url"]] = healthy
+        finally:
+            if own_session:
+                await session.close()
+        return results
+
+    def ensure_health_checks(self) -> None:
+        """Start periodic health checks on the running event loop if they are not running yet"""
+        if self.health_check_interval <= 0:
+            return
+        if self._health_task is not None and not self._health_task.done():
+            return
+        self._health_task = asyncio.ensure_future(self._health_loop())
+        _health_checked.add(self)
+
+    async def aclose(self) -> None:
+        """Stop the periodic health checks (closing their HTTP session)"""
+        task, self._health_task = self._health_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _health_loop(self) -> None:
+        async with aiohttp.ClientSession() as session:
+            while True:
+                await asyncio.sleep(self.health_check_interval)
+                try:
+                    await self.check_health(session)
+                except Exception as e:
+                    logger.warning(f"LLM endpoint health check failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-endpoint load and health"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "policy": "least_outstanding_requests",
+                "ejections": self.ejections,
+                "endpoints": [
+                    {
+                        "url": endpoint["url"],
+                        "healthy": self._is_available(endpoint, now),
+                        "outstanding": endpoint["outstanding"],
+                        "requests": endpoint["requests"],
+                        "failures": endpoint["failures"],
+                        "latency_seconds": endpoint["latency_seconds"]
+                    }
+                    for endpoint in self.endpoints
+                ]
+            }
+
+# Balancers whose health checks are running, so they can be stopped on shutdown
+_health_checked: "weakref.WeakSet[EndpointBalancer]" = weakref.WeakSet()
+
+async def stop_health_checks() -> None:
+    """Stop the health checks of every balancer in the process"""
+    for balancer in list(_health_checked):
+        await balancer.aclose()
+
+# One balancer per set of endpoints, shared by every LLM (model, controller) that serves from them
+_shared_balancers: Dict[Tuple[str, ...], EndpointBalancer] = {}
+
+def get_shared_balancer(endpoints: List[str], **settings: Any) -> EndpointBalancer:
+    """Get the process-wide balancer for a set of endpoints, building it with these settings on first use
+
+    Sharing it lets least-outstanding selection and ejection see all traffic to the endpoints
+    rather than one controller's slice of it.
+    """
+    key = tuple(url.rstrip("/") for url in endpoints)
+    balancer = _shared_balancers.get(key)
+    if balancer is None:
+        balancer = _shared_balancers[key] = EndpointBalancer(list(key), **settings)
+    return balancer
+
+def is_shared_balancer(balancer: EndpointBalancer) -> bool:
+    return any(shared is balancer for shared in _shared_balancers.values())
+
+class StreamRace:
+    """Decides which backend call made for one request streams its tokens to the caller
+
+    Each call holds back its tokens until it is chosen to answer the request: the winner of a
+    hedge race, or the only call left running. The chosen call's held-back tokens are flushed and
+    the rest stream live, so the caller only ever sees the answer that is returned. Once the caller
+    has seen part of an answer, the request can no longer move to another endpoint.
+    """
+
+    def __init__(self, run_manager=None):
+        self.run_manager = run_manager if run_manager and run_manager.handlers else None
+        self.owner: Optional["StreamClaim"] = None
+        self.sent = 0
+
+    def callbacks(self, owned: bool = False) -> Optional[List[Any]]:
+        """Callbacks for one more call in the race (None when the caller is not streaming)
+
+        An owned call streams straight to the caller instead of holding its tokens back.
+        """
+        if not self.run_manager:
+            return None
+        claim = StreamClaim(self)
+        if owned:
+            self.owner = claim
+        return [claim]
+
+    async def claim(self, callbacks: Optional[List[Any]]) -> None:
+        """Hand the caller's stream to a call, flushing the tokens it has held back so far"""
+        if not callbacks:
+            return
+        owner = callbacks[0]
+        while owner.tokens:
+            await self.send(owner.tokens.pop(0))
+        self.owner = owner
+
+    async def send(self, token: str) -> None:
+        self.sent += 1
+        await self.run_manager.on_llm_new_token(token)
+
+    @property
+    def streamed(self) -> bool:
+        return self.sent > 0
+
+class StreamClaim(AsyncCallbackHandler):
+    """Holds back one backend call's tokens, forwarding them to the caller once the call owns the stream"""
+
+    # Let the caller's own handlers (e.g. a StreamingValidator) abort the generation
+    raise_error = True
+
+    def __init__(self, race: StreamRace):
+        self.race = race
+        self.tokens: List[str] = []
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if self.race.owner is self:
+            await self.race.send(token)
+        else:
+            self.tokens.append(token)
+
+class TokenSeen(BaseCallbackHandler):
+    """Notes whether a synchronous generation has streamed any tokens"""
+
+    def __init__(self):
+        self.seen = False
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.seen = True
+
+class LatencyTracker:
+    """Sliding window of recent generation latencies used to decide when to hedge"""
+
+    def __init__(self, window: int = 100, percentile: float = 95.0, min_samples: int = 10,
+                 initial_delay: float = 5.0, max_delay: float = 15.0):
+        self.samples = deque(maxlen=window)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary request before sending a duplicate"""
+        if len(self.samples) < self.min_samples:
+            return min(self.initial_delay, self.max_delay)
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100.0))
+        return min(ordered[index], self.max_delay)
+
+class LoadBalancedLLM(BaseLLM):
+    """LLM wrapper that spreads generations across several equivalent backends"""
+
+    backends: List[BaseLLM]
+    balancer: EndpointBalancer
+    # Hedging: duplicate slow generations to a second endpoint (None disables it)
+    latency: Optional[LatencyTracker] = None
+    hedges: int = 0
+    hedges_won: int = 0
+
+    @property
+    def llm(self) -> BaseLLM:
+        """The first backend, which carries the generation settings shared by all of them"""
+        return self.backends[0]
+
+    @property
+    def _llm_type(self) -> str:
+        return f"balanced-{self.llm._llm_type}"
+
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> LLMResult:
+        tried = []
+        while True:
+            index = self.balancer.acquire(exclude=tried)
+            if index is None:
+                raise last_error
+            tried.append(index)
+            token_seen = TokenSeen()
+            start = time.perf_counter()
+            try:
+                result = self.backends[index].generate(
+                    prompts, stop=stop, callbacks=(inner_callbacks(run_manager) or []) + [token_seen], **kwargs
+                )
+            except GenerationAborted:
+                self.balancer.release(index, time.perf_counter() - start, None)
+                raise
+            except Exception as e:
+                self.balancer.release(index, time.perf_counter() - start, False)
+                logger.warning(f"LLM endpoint {self.balancer.endpoints[index]['url']} failed: {e}")
+                if token_seen.seen and run_manager and run_manager.handlers:
+                    # The caller already has part of this answer; a retry would stream a second one
+                    raise
+                last_error = e
+                continue
+            self.balancer.release(index, time.perf_counter() - start, True)
+            return result
+
+    async def _call(self, index: int, prompts: List[str], stop: Optional[List[str]],
+                    callbacks: Optional[List[Any]], **kwargs: Any) -> LLMResult:
+        """Run one generation on a reserved endpoint and release it afterwards"""
+        start = time.perf_counter()
+        try:
+            result = await self.backends[index].agenerate(prompts, stop=stop, callbacks=callbacks, **kwargs)
+        except (asyncio.CancelledError, GenerationAborted):
+            self.balancer.release(index, time.perf_counter() - start, None)
+            raise
+        except Exception as e:
+            self.balancer.release(index, time.perf_counter() - start, False)
+            logger.warning(f"LLM endpoint {self.balancer.endpoints[index]['url']} failed: {e}")
+            raise
+        elapsed = time.perf_counter() - start
+        self.balancer.release(index, elapsed, True)
+        if self.latency is not None:
+            self.latency.record(elapsed)
+        return result
+
+    async def _hedged_call(self, index: int, prompts: List[str], stop: Optional[List[str]],
+                           race: StreamRace, tried: List[int], **kwargs: Any) -> LLMResult:
+        """Run a generation, sending a duplicate to another endpoint if it is slower than usual
+
+        While a duplicate may still be sent or is running, the calls hold back their tokens; the
+        first call to finish wins and only its tokens are streamed, so the streamed and returned
+        text always come from the same call.
+        """
+        started: Dict[asyncio.Task, float] = {}
+        owners: Dict[asyncio.Task, Optional[List[Any]]] = {}
+
+        def start(call_index: int) -> asyncio.Task:
+            callbacks = race.callbacks()
+            task = asyncio.ensure_future(self._call(call_index, prompts, stop, callbacks, **kwargs))
+            started[task] = time.perf_counter()
+            owners[task] = callbacks
+            return task
+
+        primary = start(index)
+        tasks = {primary}
+        try:
+            await asyncio.wait({primary}, timeout=self.latency.hedge_delay())
+            if not primary.done():
+                hedge_index = self.balancer.acquire(exclude=tried)
+                if hedge_index is not None:
+                    tried.append(hedge_index)
+                    self.hedges += 1
+                    logger.info(
+                        f"🏁 Hedging slow generation to {self.balancer.endpoints[hedge_index]['url']} "
+                        f"after {self.latency.hedge_delay():.2f}s"
+                    )
+                    tasks.add(start(hedge_index))
+                else:
+                    # Nothing to race against, so stream the primary as it generates
+                    await race.claim(owners[primary])
+
+            last_error = None
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        self._cancel_losers(started, task)
+                        await race.claim(owners[task])
+                        if task is not primary:
+                            self.hedges_won += 1
+                        return task.result()
+                    if isinstance(task.exception(), GenerationAborted):
+                        raise task.exception()
+                    last_error = task.exception()
+                if len(tasks) == 1 and not race.owner:
+                    # The other call failed; stream the survivor as it generates
+                    await race.claim(owners[next(iter(tasks))])
+            raise last_error
+        finally:
+            # Cancel whatever is still running (everything, if the caller went away)
+            for task in started:
+                task.cancel()
+
+    def _cancel_losers(self, started: Dict[asyncio.Task, float], winner: asyncio.Task) -> None:
+        """Cancel the calls that lost a hedge race, counting their elapsed time as a latency sample
+
+        A cancelled call would have taken at least this long, so recording it as a lower bound
+        keeps slow endpoints in the percentile instead of only the winners' faster times.
+        """
+        now = time.perf_counter()
+        for task, start in started.items():
+            if task is not winner and not task.done():
+                task.cancel()
+                self.latency.record(now - start)
+
+    async def _agenerate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> LLMResult:
+        self.balancer.ensure_health_checks()
+        tried = []
+        while True:
+            index = self.balancer.acquire(exclude=tried)
+            if index is None:
+                raise last_error
+            tried.append(index)
+            race = StreamRace(run_manager)
+            try:
+                if self.latency is not None:
+                    return await self._hedged_call(index, prompts, stop, race, tried, **kwargs)
+                return await self._call(index, prompts, stop, race.callbacks(owned=True), **kwargs)
+            except (asyncio.CancelledError, GenerationAborted):
+                raise
+            except Exception as e:
+                if race.streamed:
+                    # Only fail over before the first token: the caller already has part of this answer
+                    raise
+                last_error = e
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get endpoint load, health and hedging counters"""
+        stats = self.balancer.get_stats()
+        stats["hedging"] = {
+            "enabled": self.latency is not None,
+            "hedge_delay_seconds": self.latency.hedge_delay() if self.latency is not None else None,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won
+        }
+        return stats
@@ -0,0 +1,149 @@
+from typing import Dict, Any, Optional, List
+import asyncio
+import json
+import logging
+import time
+
+from langchain.llms.base import BaseLLM
+from langchain.schema import LLMResult
+
+from config.llm_cache import inner_callbacks
+
+logger = logging.getLogger(__name__)
+
+class BatchScheduler:
+    """Collects prompts from concurrent callers and sends them to the LLM as one agenerate call"""
+
+    def __init__(self, llm: BaseLLM, batch_window_ms: float = 10.0, max_batch_size: int = 4):
+        self.llm = llm
+        self.batch_window_ms = batch_window_ms
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+        # Counters
+        self.batches = 0
+        self.prompts = 0
+        self.size_flushes = 0
+        self.timer_flushes = 0
+        self.largest_batch = 0
+        self.queue_wait_seconds = 0.0
+
+    async def submit(self, prompt: str, stop: Optional[List[str]] = None,
+                     callbacks: Optional[List[Any]] = None, **kwargs: Any) -> List[Any]:
+        """Queue a prompt for the next batch and wait for its generations"""
+        loop = asyncio.get_running_loop()
+
+        # Only prompts with identical generation options can share a call
+        group = json.dumps({"stop": stop, **kwargs}, sort_keys=True, default=str)
+        batch = self._pending.get(group)
+        if batch is None:
+            batch = {
+                "items": [],
+                "stop": stop,
+                "kwargs": kwargs,
+                "task": None,
+                "opened_at": time.perf_counter(),
+                "timer": loop.call_later(self.batch_window_ms / 1000.0, self._flush, group, "timer")
+            }
+            self._pending[group] = batch
+
+        future = loop.create_future()
+        batch["items"].append({"prompt": prompt, "future": future, "callbacks": callbacks})
+        if len(batch["items"]) >= self.max_batch_size:
+            self._flush(group, "size")
+
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Stop the batch call only if every caller in it has gone away
+            task = batch["task"]
+            if task and not task.done() and all(item["future"].done() for item in batch["items"]):
+                task.cancel()
+            raise
+
+    def _flush(self, group: str, reason: str) -> None:
+        batch = self._pending.pop(group, None)
+        if batch is None:
+            return
+        batch["timer"].cancel()
+
+        items = [item for item in batch["items"] if not item["future"].done()]
+        if not items:
+            return
+
+        if reason == "size":
+            self.size_flushes += 1
+        else:
+            self.timer_flushes += 1
+        self.batches += 1
+        self.prompts += len(items)
+        self.largest_batch = max(self.largest_batch, len(items))
+        self.queue_wait_seconds += time.perf_counter() - batch["opened_at"]
+
+        batch["items"] = items
+        batch["task"] = asyncio.ensure_future(self._dispatch(batch))
+
+    async def _dispatch(self, batch: Dict[str, Any]) -> None:
+        items = batch["items"]
+        # Token callbacks cannot be attributed to one caller once prompts are mixed; a lone
+        # item streams to its own caller's callbacks, never to those of whoever opened the batch
+        callbacks = items[0]["callbacks"] if len(items) == 1 else None
+        try:
+            result = await self.llm.agenerate(
+                [item["prompt"] for item in items],
+                stop=batch["stop"],
+                callbacks=callbacks,
+                **batch["kwargs"]
+            )
+        except asyncio.CancelledError:
+            for item in items:
+                item["future"].cancel()
+            raise
+        except Exception as e:
+            logger.warning(f"Batched generation of {len(items)} prompts failed: {e}")
+            for item in items:
+                if not item["future"].done():
+                    item["future"].set_exception(e)
+            return
+
+        for item, generations in zip(items, result.generations):
+            if not item["future"].done():
+                item["future"].set_result(generations)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching counters"""
+        return {
+            "batch_window_ms": self.batch_window_ms,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "prompts": self.prompts,
+            "avg_batch_size": self.prompts / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "size_flushes": self.size_flushes,
+            "timer_flushes": self.timer_flushes,
+            "avg_queue_wait_ms": self.queue_wait_seconds / self.batches * 1000 if self.batches else 0.0,
+            "pending_groups": len(self._pending)
+        }
+
+class BatchingLLM(BaseLLM):
+    """LLM wrapper that micro-batches concurrent async generations through a BatchScheduler"""
+
+    llm: BaseLLM
+    scheduler: BatchScheduler
+
+    @property
+    def _llm_type(self) -> str:
+        return f"batching-{self.llm._llm_type}"
+
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> LLMResult:
+        return self.llm.generate(prompts, stop=stop, callbacks=inner_callbacks(run_manager), **kwargs)
+
+    async def _agenerate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> LLMResult:
+        callbacks = inner_callbacks(run_manager)
+        generations = await asyncio.gather(*[
+            self.scheduler.submit(prompt, stop=stop, callbacks=callbacks, **kwargs)
+            for prompt in prompts
+        ])
+        return LLMResult(generations=list(generations))
@@ -0,0 +1,279 @@
+from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from langchain.llms.base import BaseLLM
+from langchain.schema import LLMResult, Generation
+
+logger = logging.getLogger(__name__)
+
+def inner_callbacks(run_manager) -> Optional[List[Any]]:
+    """Forward a wrapper LLM's callback handlers (e.g. token streaming) to the LLM it wraps"""
+    if run_manager and run_manager.handlers:
+        return run_manager.handlers
+    return None
+
+def unwrap_llm(llm: BaseLLM) -> BaseLLM:
+    """Follow a stack of wrapper LLMs down to the backend client"""
+    while isinstance(getattr(llm, "llm", None), BaseLLM):
+        llm = llm.llm
+    return llm
+
+def generation_key(llm: BaseLLM, prompt: str, stop: Optional[List[str]] = None, **overrides: Any) -> str:
+    """Hash a prompt together with the generation settings of the backend that will serve it"""
+    backend = unwrap_llm(llm)
+    settings = {
+        "temperature": getattr(backend, "temperature", None),
+        "num_ctx": getattr(backend, "num_ctx", None),
+        "num_predict": getattr(backend, "num_predict", None)
+    }
+    settings.update(overrides)
+    return ResponseCache.make_key(
+        model=getattr(backend, "model", backend._llm_type),
+        prompt=prompt,
+        stop=stop,
+        **settings
+    )
+
+class ResponseCache:
+    """Content-addressed cache for LLM completions with an in-memory LRU tier and an optional disk tier"""
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 3600.0, cache_dir: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.generations = 0
+        self.generation_seconds = 0.0
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: Any = None, num_ctx: Any = None,
+                 num_predict: Any = None, stop: Optional[List[str]] = None, **options: Any) -> str:
+        """Hash the generation parameters into a stable cache key"""
+        payload = json.dumps({
+            "model": model,
+            "prompt": prompt,
+            "temperature": temperature,
+            "num_ctx": num_ctx,
+            "num_predict": num_predict,
+            "stop": stop or [],
+            **options
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a completion, promoting disk hits into memory"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_expired(entry, now):
+                    del self._entries[key]
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry["text"]
+
+            entry = self._read_disk(key, now)
+            if entry is not None:
+                self._store_memory(key, entry)
+                self.disk_hits += 1
+                return entry["text"]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, text: str) -> None:
+        """Store a completion in every enabled tier"""
+        entry = {"text": text, "created_at": time.time()}
+        with self._lock:
+            self._store_memory(key, entry)
+            self._write_disk(key, entry)
+
+    def invalidate(self, key: str) -> None:
+        """Drop a completion from every tier"""
+        with self._lock:
+            self._entries.pop(key, None)
+            path = self._disk_path(key)
+            if path and path.exists():
+                path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries (the disk tier is left untouched)"""
+        with self._lock:
+            self._entries.clear()
+
+    def record_generation(self, seconds: float, count: int = 1) -> None:
+        """Record time spent generating cache misses, used to estimate savings"""
+        with self._lock:
+            self.generations += count
+            self.generation_seconds += seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters and the estimated latency saved by hits"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            avg_generation = self.generation_seconds / self.generations if self.generations else 0.0
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_enabled": self.cache_dir is not None,
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "avg_generation_seconds": avg_generation,
+                "estimated_seconds_saved": hits * avg_generation
+            }
+
+    def _is_expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry["created_at"] > self.ttl_seconds
+
+    def _store_memory(self, key: str, entry: Dict[str, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if not self.cache_dir:
+            return None
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        path = self._disk_path(key)
+        if not path or not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to read cache entry {key[:12]}: {e}")
+            return None
+        if self._is_expired(entry, now):
+            path.unlink(missing_ok=True)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]) -> None:
+        path = self._disk_path(key)
+        if not path:
+            return
+        try:
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key[:12]}: {e}")
+
+class CachedLLM(BaseLLM):
+    """LLM wrapper that serves repeated prompts from a ResponseCache"""
+
+    llm: BaseLLM
+    response_cache: ResponseCache
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cached-{self.llm._llm_type}"
+
+    def cache_key(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        """Build the cache key for a prompt from the wrapped LLM's settings"""
+        return generation_key(self.llm, prompt, stop, **kwargs)
+
+    def invalidate(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> None:
+        """Forget the cached completion for a prompt so the next call regenerates it"""
+        self.response_cache.invalidate(self.cache_key(prompt, stop, **kwargs))
+
+    def _lookup(self, prompts: List[str], stop: Optional[List[str]], **kwargs: Any):
+        keys = [self.cache_key(prompt, stop, **kwargs) for prompt in prompts]
+        texts = [self.response_cache.get(key) for key in keys]
+        misses = [i for i, text in enumerate(texts) if text is None]
+        return keys, texts, misses
+
+    def _store(self, keys: List[str], texts: List[Optional[str]], misses: List[int],
+               result: LLMResult, elapsed: float) -> LLMResult:
+        for index, generation in zip(misses, result.generations):
+            text = generation[0].text if generation else ""
+            texts[index] = text
+            self.response_cache.set(keys[index], text)
+        self.response_cache.record_generation(elapsed, len(misses))
+        return LLMResult(generations=[[Generation(text=text)] for text in texts])
+
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> LLMResult:
+        keys, texts, misses = self._lookup(prompts, stop, **kwargs)
+        if run_manager:
+            for text in texts:
+                if text is not None:
+                    run_manager.on_llm_new_token(text)
+        if not misses:
+            return LLMResult(generations=[[Generation(text=text)] for text in texts])
+
+        start = time.perf_counter()
+        result = self.llm.generate(
+            [prompts[i] for i in misses],
+            stop=stop,
+            callbacks=inner_callbacks(run_manager),
+            **kwargs
+        )
+        return self._store(keys, texts, misses, result, time.perf_counter() - start)
+
+    async def _agenerate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> LLMResult:
+        keys, texts, misses = self._lookup(prompts, stop, **kwargs)
+        if run_manager:
+            # Cached completions arrive as a single token for streaming consumers
+            for text in texts:
+                if text is not None:
+                    await run_manager.on_llm_new_token(text)
+        if not misses:
+            return LLMResult(generations=[[Generation(text=text)] for text in texts])
+
+        start = time.perf_counter()
+        result = await self.llm.agenerate(
+            [prompts[i] for i in misses],
+            stop=stop,
+            callbacks=inner_callbacks(run_manager),
+            **kwargs
+        )
+        return self._store(keys, texts, misses, result, time.perf_counter() - start)
+
+_shared_cache: Optional[ResponseCache] = None
+
+def get_shared_cache() -> ResponseCache:
+    """Get the process-wide response cache, configured from the environment"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ResponseCache(
+            max_size=int(os.getenv("LLM_CACHE_SIZE", 512)),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL", 3600)),
+            cache_dir=os.getenv("LLM_CACHE_DIR") or None
+        )
+    return _shared_cache
@@ -0,0 +1,170 @@
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+import asyncio
+import logging
+
+from langchain.llms.base import BaseLLM
+from langchain.schema import LLMResult
+from langchain.callbacks.base import AsyncCallbackHandler
+
+from config.llm_cache import generation_key, inner_callbacks
+
+logger = logging.getLogger(__name__)
+
+class TokenFanOut(AsyncCallbackHandler):
+    """Streams a shared generation's tokens to every caller waiting on it
+
+    The generation itself runs without any caller's callbacks. Each subscriber gets every token,
+    including those streamed before it joined, and a subscriber whose callbacks raise (e.g. its
+    StreamingValidator aborting) is detached without affecting the others.
+    """
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.subscribers: List[Dict[str, Any]] = []
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.tokens.append(token)
+        for subscriber in list(self.subscribers):
+            await self.deliver(subscriber)
+
+    def subscribe(self, on_token: Callable[[str], Awaitable[Any]]) -> Dict[str, Any]:
+        subscriber = {
+            "on_token": on_token,
+            "sent": 0,
+            "lock": asyncio.Lock(),
+            "failed": asyncio.get_running_loop().create_future()
+        }
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Dict[str, Any]) -> None:
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+
+    async def deliver(self, subscriber: Dict[str, Any]) -> None:
+        """Send a subscriber the tokens it has not seen yet"""
+        async with subscriber["lock"]:
+            while subscriber["sent"] < len(self.tokens) and not subscriber["failed"].done():
+                token = self.tokens[subscriber["sent"]]
+                subscriber["sent"] += 1
+                try:
+                    await subscriber["on_token"](token)
+                except Exception as e:
+                    subscriber["failed"].set_exception(e)
+                    self.unsubscribe(subscriber)
+
+class SingleFlight:
+    """Runs at most one generation per key; concurrent callers for the same key share its result"""
+
+    def __init__(self):
+        self._in_flight: Dict[str, Dict[str, Any]] = {}
+
+        # Counters
+        self.generations = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def run(self, key: str, generate: Callable[[TokenFanOut], Awaitable[Any]],
+                  on_token: Optional[Callable[[str], Awaitable[Any]]] = None) -> Any:
+        """Await the in-flight generation for key, starting it if nobody else has
+
+        generate receives the TokenFanOut to use as the generation's only callback; on_token
+        receives this caller's share of the streamed tokens.
+        """
+        call = self._in_flight.get(key)
+        if call is None:
+            fan_out = TokenFanOut()
+            call = {"task": asyncio.ensure_future(generate(fan_out)), "waiters": 0, "fan_out": fan_out}
+            self._in_flight[key] = call
+            call["task"].add_done_callback(lambda _task, key=key, call=call: self._forget(key, call))
+            self.generations += 1
+        else:
+            self.coalesced += 1
+            logger.debug(f"Coalesced duplicate prompt {key[:12]} ({call['waiters']} already waiting)")
+
+        subscriber = call["fan_out"].subscribe(on_token) if on_token else None
+        call["waiters"] += 1
+        try:
+            # Shield the shared task so one caller being cancelled does not cancel it for the others
+            shared = asyncio.shield(call["task"])
+            if subscriber is None:
+                return await shared
+            # Catch up on tokens streamed before this caller joined
+            await call["fan_out"].deliver(subscriber)
+            await asyncio.wait({shared, subscriber["failed"]}, return_when=asyncio.FIRST_COMPLETED)
+            if subscriber["failed"].done():
+                # This caller's own callbacks stopped it; the generation carries on for the others
+                shared.cancel()
+                raise subscriber["failed"].exception()
+            return shared.result()
+        finally:
+            if subscriber is not None:
+                call["fan_out"].unsubscribe(subscriber)
+            call["waiters"] -= 1
+            if call["waiters"] == 0 and not call["task"].done():
+                # Every caller has gone away - nobody is left to read the result
+                call["task"].cancel()
+                self.abandoned += 1
+                logger.info(f"Cancelled abandoned generation {key[:12]}")
+
+    def _forget(self, key: str, call: Dict[str, Any]) -> None:
+        if self._in_flight.get(key) is call:
+            del self._in_flight[key]
+        if not call["task"].cancelled():
+            # Mark any failure as retrieved even if every caller has already left
+            call["task"].exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing counters"""
+        requests = self.generations + self.coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "generations": self.generations,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "coalesce_rate": self.coalesced / requests if requests else 0.0
+        }
+
+class CoalescingLLM(BaseLLM):
+    """LLM wrapper that deduplicates identical prompts while they are being generated"""
+
+    llm: BaseLLM
+    single_flight: SingleFlight
+
+    @property
+    def _llm_type(self) -> str:
+        return f"coalescing-{self.llm._llm_type}"
+
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> LLMResult:
+        # Synchronous callers have nothing to share a future with
+        return self.llm.generate(prompts, stop=stop, callbacks=inner_callbacks(run_manager), **kwargs)
+
+    async def _agenerate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> LLMResult:
+        # The shared generation must not run with this caller's request-scoped callbacks (token
+        # streams, validators); its tokens reach each caller through their own run manager instead
+        on_token = run_manager.on_llm_new_token if run_manager and run_manager.handlers else None
+
+        async def generate_one(prompt: str, fan_out: TokenFanOut) -> List[Any]:
+            result = await self.llm.agenerate([prompt], stop=stop, callbacks=[fan_out], **kwargs)
+            return result.generations[0]
+
+        generations = await asyncio.gather(*[
+            self.single_flight.run(
+                generation_key(self.llm, prompt, stop, **kwargs),
+                lambda fan_out, prompt=prompt: generate_one(prompt, fan_out),
+                on_token=on_token
+            )
+            for prompt in prompts
+        ])
+        return LLMResult(generations=list(generations))
+
+_shared_single_flight: Optional[SingleFlight] = None
+
+def get_shared_single_flight() -> SingleFlight:
+    """Get the process-wide single-flight table shared by every model's LLM stack"""
+    global _shared_single_flight
+    if _shared_single_flight is None:
+        _shared_single_flight = SingleFlight()
+    return _shared_single_flight
@@ -1,21 +1,112 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, List
 from langchain_community.llms import Ollama, LlamaCpp
 from langchain.llms.base import BaseLLM
 import os
 
+from config.llm_cache import CachedLLM, ResponseCache, get_shared_cache
+from config.llm_coalescer import CoalescingLLM, get_shared_single_flight
+from config.llm_batcher import BatchingLLM, BatchScheduler
+from config.ollama_pool import PooledOllama, get_shared_connection_pool
+from config.llm_balancer import LoadBalancedLLM, LatencyTracker, get_shared_balancer, is_shared_balancer
+
 class LlamaConfig:
     """Configuration for different Llama model setups - CPU optimized"""
     
     @staticmethod
     def get_ollama_llm(model_name: str, **kwargs) -> Ollama:
-        """Get configured Ollama LLM instance"""
-        return Ollama(
+        """Get configured Ollama LLM instance on the shared keep-alive connection pool"""
+        return PooledOllama(
             model=model_name,
+            base_url=kwargs.get("base_url", os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")),
             temperature=kwargs.get("temperature", 0.7),
             num_ctx=kwargs.get("num_ctx", 1024),
-            num_predict=kwargs.get("num_predict", 256)
+            num_predict=kwargs.get("num_predict", 256),
+            keep_alive=kwargs.get("keep_alive", os.getenv("OLLAMA_KEEP_ALIVE", "30m")),  # Keep the model resident between requests
+            connection_pool=kwargs.get("connection_pool") or get_shared_connection_pool()
+        )
+    
+    @staticmethod
+    def get_endpoints(endpoints: Optional[List[str]] = None) -> List[str]:
+        """Resolve the Ollama endpoints to serve from: explicit list, OLLAMA_ENDPOINTS, or OLLAMA_BASE_URL"""
+        if endpoints:
+            return list(endpoints)
+        configured = [url.strip() for url in os.getenv("OLLAMA_ENDPOINTS", "").split(",") if url.strip()]
+        return configured or [os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")]
+    
+    @staticmethod
+    def get_balanced_llm(model_name: str, endpoints: Optional[List[str]] = None, **kwargs) -> BaseLLM:
+        """Get an Ollama LLM spread across several endpoints (a plain client when there is only one)"""
+        if "base_url" in kwargs:
+            return LlamaConfig.get_ollama_llm(model_name, **kwargs)
+        endpoints = LlamaConfig.get_endpoints(endpoints)
+        if len(endpoints) == 1:
+            return LlamaConfig.get_ollama_llm(model_name, base_url=endpoints[0], **kwargs)
+        # Hedge generations slower than this percentile of recent latency (0 disables hedging),
+        # never waiting more than half of the agent timeout before sending the duplicate
+        hedge_percentile = float(os.getenv("OLLAMA_HEDGE_PERCENTILE", 95))
+        agent_timeout = float(os.getenv("AGENT_TIMEOUT_SECONDS", 30))
+        latency = LatencyTracker(
+            percentile=hedge_percentile,
+            max_delay=float(os.getenv("OLLAMA_HEDGE_MAX_DELAY") or agent_timeout / 2)
+        ) if hedge_percentile > 0 else None
+        return LoadBalancedLLM(
+            backends=[LlamaConfig.get_ollama_llm(model_name, base_url=url, **kwargs) for url in endpoints],
+            latency=latency,
+            balancer=get_shared_balancer(
+                endpoints,
+                max_failures=int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", 3)),
+                eject_seconds=float(os.getenv("OLLAMA_EJECT_SECONDS", 30)),
+                health_check_interval=float(os.getenv("OLLAMA_HEALTH_CHECK_INTERVAL", 10))
+            )
         )
     
+    @staticmethod
+    def get_cached_llm(model_name: str, cache: ResponseCache = None, **kwargs) -> CachedLLM:
+        """Get an Ollama LLM whose completions are served from the response cache"""
+        return CachedLLM(
+            llm=LlamaConfig.get_ollama_llm(model_name, **kwargs),
+            response_cache=cache or get_shared_cache()
+        )
+    
+    @staticmethod
+    def get_serving_llm(model_name: str, cache: ResponseCache = None, batch_window_ms: float = 10.0,
+                        max_batch_size: int = 1, endpoints: Optional[List[str]] = None, **kwargs) -> CachedLLM:
+        """Get the full serving stack: response cache -> single-flight coalescing -> micro-batching -> load balancing -> Ollama"""
+        llm = LlamaConfig.get_balanced_llm(model_name, endpoints=endpoints, **kwargs)
+        if max_batch_size > 1:
+            llm = BatchingLLM(
+                llm=llm,
+                scheduler=BatchScheduler(llm, batch_window_ms=batch_window_ms, max_batch_size=max_batch_size)
+            )
+        coalescing_llm = CoalescingLLM(llm=llm, single_flight=get_shared_single_flight())
+        return CachedLLM(llm=coalescing_llm, response_cache=cache or get_shared_cache())
+    
+    @staticmethod
+    def get_llm_stats(llm: BaseLLM) -> Dict[str, Any]:
+        """Collect statistics from every layer of an LLM serving stack"""
+        stats = {}
+        while llm is not None:
+            if isinstance(llm, CachedLLM):
+                stats["cache"] = llm.response_cache.get_stats()
+            elif isinstance(llm, CoalescingLLM):
+                stats["coalescing"] = llm.single_flight.get_stats()
+            elif isinstance(llm, BatchingLLM):
+                stats["batching"] = llm.scheduler.get_stats()
+            elif isinstance(llm, LoadBalancedLLM):
+                stats["load_balancer"] = llm.get_stats()
+            elif isinstance(llm, PooledOllama):
+                stats["connections"] = llm.connection_pool.get_stats()
+            llm = getattr(llm, "llm", None)
+        return stats
+    
+    @staticmethod
+    async def aclose_llm(llm: BaseLLM) -> None:
+        """Stop the background work of an LLM serving stack that is not shared with other stacks"""
+        while llm is not None:
+            if isinstance(llm, LoadBalancedLLM) and not is_shared_balancer(llm.balancer):
+                await llm.balancer.aclose()
+            llm = getattr(llm, "llm", None)
+    
     @staticmethod
     def get_llamacpp_llm(model_path: str, **kwargs) -> BaseLLM:
         """Get LlamaCpp-based local model (CPU optimized)"""
@@ -61,21 +152,31 @@ class LlamaConfig:
         return HuggingFacePipeline(pipeline=pipe)
 
 # CPU-friendly model configurations
+# batch_window_ms / max_batch_size control micro-batching of concurrent generations
+# (max_batch_size 1 disables it; the Ollama client sends a batch's prompts one after another)
+# An optional "endpoints" list spreads a model across several Ollama instances
+# (defaults to OLLAMA_ENDPOINTS, then OLLAMA_BASE_URL)
 LLAMA_MODELS = {
     "tinyllama": {
         "type": "ollama",
         "model": "tinyllama:latest",
-        "description": "Lightweight model for basic tasks"
+        "description": "Lightweight model for basic tasks",
+        "batch_window_ms": 10,
+        "max_batch_size": 1
     },
     "llama2-7b": {
         "type": "ollama",
         "model": "tinyllama:latest",
-        "description": "Balanced model for general tasks (using tinyllama)"
+        "description": "Balanced model for general tasks (using tinyllama)",
+        "batch_window_ms": 10,
+        "max_batch_size": 1
     },
     "llama2-13b": {
         "type": "ollama",
         "model": "tinyllama:latest",
-        "description": "Advanced model for complex tasks (using tinyllama)"
+        "description": "Advanced model for complex tasks (using tinyllama)",
+        "batch_window_ms": 10,
+        "max_batch_size": 1
     },
     # Smaller, faster models for CPU
     "llama2-7b-q4": {"model": "tinyllama:latest", "type": "ollama"},
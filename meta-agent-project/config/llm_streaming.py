@@ -0,0 +1,39 @@
+from typing import Any, Optional, List
+from contextvars import ContextVar
+import asyncio
+
+from langchain.callbacks.base import AsyncCallbackHandler
+
+# Callback handlers for LLM calls made on behalf of the current request (e.g. a streaming client)
+request_callbacks: ContextVar[Optional[List[Any]]] = ContextVar("request_callbacks", default=None)
+
+class GenerationAborted(Exception):
+    """Raised from a token callback to stop a generation that can no longer produce an acceptable response"""
+
+def get_request_callbacks() -> Optional[List[Any]]:
+    """Get the callback handlers registered for the request being processed, if any"""
+    return request_callbacks.get()
+
+class TokenQueueHandler(AsyncCallbackHandler):
+    """Pushes LLM tokens onto an asyncio queue as stream events"""
+
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        await self.queue.put({"event": "token", "data": {"token": token}})
+
+class TokenBuffer(AsyncCallbackHandler):
+    """Holds back an attempt's tokens until it is known whether they should reach the client"""
+
+    def __init__(self):
+        self.tokens: List[str] = []
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.tokens.append(token)
+
+    async def replay(self, handlers: List[Any]) -> None:
+        """Send the held-back tokens, in order, to each handler"""
+        for token in self.tokens:
+            for handler in handlers:
+                await handler.on_llm_new_token(token)
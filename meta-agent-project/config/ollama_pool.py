@@ -0,0 +1,249 @@
+from typing import Dict, Any, Optional, List, Iterator, AsyncIterator
+from contextlib import contextmanager, asynccontextmanager
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import os
+import threading
+import weakref
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from langchain_community.llms import Ollama
+from langchain_community.llms.ollama import OllamaEndpointNotFoundError
+
+logger = logging.getLogger(__name__)
+
+class OllamaConnectionPool:
+    """Shared keep-alive HTTP connections to Ollama backends for sync and async clients"""
+
+    def __init__(self, max_connections_per_host: int = 8, keepalive_timeout: float = 60.0):
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[requests.Session] = None
+        self._adapter: Optional[HTTPAdapter] = None
+        self._async_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.requests = 0
+        self.in_flight: Dict[str, int] = {}
+        self.peak_in_flight = 0
+        self.saturated = 0
+        self.async_connections_created = 0
+        self.async_connections_reused = 0
+
+    def session(self) -> requests.Session:
+        """Get the shared requests session (connections are reused across calls)"""
+        with self._lock:
+            if self._session is None:
+                self._adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=self.max_connections_per_host,
+                    pool_block=True
+                )
+                self._session = requests.Session()
+                self._session.mount("http://", self._adapter)
+                self._session.mount("https://", self._adapter)
+            return self._session
+
+    def async_session(self) -> aiohttp.ClientSession:
+        """Get the aiohttp session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        session = self._async_sessions.get(loop)
+        if session is None or session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_create)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=self.max_connections_per_host,
+                    keepalive_timeout=self.keepalive_timeout
+                ),
+                trace_configs=[trace_config]
+            )
+            self._async_sessions[loop] = session
+        return session
+
+    async def _on_connection_create(self, session, context, params) -> None:
+        self.async_connections_created += 1
+
+    async def _on_connection_reuse(self, session, context, params) -> None:
+        self.async_connections_reused += 1
+
+    def _start(self, url: str) -> str:
+        host = urlsplit(url).netloc
+        with self._lock:
+            self.requests += 1
+            if self.in_flight.get(host, 0) >= self.max_connections_per_host:
+                # This request will queue for a free connection
+                self.saturated += 1
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight[host])
+        return host
+
+    def _finish(self, host: str) -> None:
+        with self._lock:
+            self.in_flight[host] -= 1
+
+    @contextmanager
+    def track(self, url: str):
+        """Track a synchronous request against the per-host connection budget"""
+        host = self._start(url)
+        try:
+            yield
+        finally:
+            self._finish(host)
+
+    @asynccontextmanager
+    async def atrack(self, url: str):
+        """Track an asynchronous request against the per-host connection budget"""
+        host = self._start(url)
+        try:
+            yield
+        finally:
+            self._finish(host)
+
+    async def aclose(self) -> None:
+        """Close every pooled connection"""
+        for session in list(self._async_sessions.values()):
+            if not session.closed:
+                await session.close()
+        self._async_sessions.clear()
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+                self._adapter = None
+
+    def _sync_connection_counts(self) -> Dict[str, int]:
+        created = 0
+        handled = 0
+        if self._adapter is not None:
+            pools = self._adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    created += pool.num_connections
+                    handled += pool.num_requests
+        return {"created": created, "reused": max(0, handled - created)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get connection reuse and saturation counters"""
+        sync_counts = self._sync_connection_counts()
+        created = sync_counts["created"] + self.async_connections_created
+        reused = sync_counts["reused"] + self.async_connections_reused
+        return {
+            "max_connections_per_host": self.max_connections_per_host,
+            "keepalive_timeout": self.keepalive_timeout,
+            "requests": self.requests,
+            "in_flight": dict(self.in_flight),
+            "peak_in_flight": self.peak_in_flight,
+            "saturated": self.saturated,
+            "connections_created": created,
+            "connections_reused": reused,
+            "reuse_rate": reused / (created + reused) if created + reused else 0.0
+        }
+
+class PooledOllama(Ollama):
+    """Ollama client that sends requests over a shared OllamaConnectionPool"""
+
+    connection_pool: OllamaConnectionPool
+
+    def _build_request(self, payload: Any, stop: Optional[List[str]] = None, **kwargs: Any) -> Dict[str, Any]:
+        """Build the Ollama request body the same way the stock client does"""
+        if self.stop is not None and stop is not None:
+            raise ValueError("`stop` found in both the input and default params.")
+        elif self.stop is not None:
+            stop = self.stop
+        elif stop is None:
+            stop = []
+
+        params = self._default_params
+        for key in self._default_params:
+            if key in kwargs:
+                params[key] = kwargs[key]
+
+        if "options" in kwargs:
+            params["options"] = kwargs["options"]
+        else:
+            params["options"] = {
+                **params["options"],
+                "stop": stop,
+                **{k: v for k, v in kwargs.items() if k not in self._default_params},
+            }
+
+        if payload.get("messages"):
+            return {"messages": payload.get("messages", []), **params}
+        return {
+            "prompt": payload.get("prompt"),
+            "images": payload.get("images", []),
+            **params,
+        }
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            **(self.headers if isinstance(self.headers, dict) else {}),
+        }
+
+    def _create_stream(self, api_url: str, payload: Any, stop: Optional[List[str]] = None,
+                       **kwargs: Any) -> Iterator[str]:
+        request_payload = self._build_request(payload, stop, **kwargs)
+        with self.connection_pool.track(api_url):
+            with self.connection_pool.session().post(
+                url=api_url,
+                headers=self._headers(),
+                json=request_payload,
+                stream=True,
+                timeout=self.timeout,
+            ) as response:
+                response.encoding = "utf-8"
+                if response.status_code != 200:
+                    if response.status_code == 404:
+                        raise OllamaEndpointNotFoundError(
+                            "Ollama call failed with status code 404. "
+                            "Maybe your model is not found "
+                            f"and you should pull the model with `ollama pull {self.model}`."
+                        )
+                    raise ValueError(
+                        f"Ollama call failed with status code {response.status_code}."
+                        f" Details: {response.text}"
+                    )
+                yield from response.iter_lines(decode_unicode=True)
+
+    async def _acreate_stream(self, api_url: str, payload: Any, stop: Optional[List[str]] = None,
+                              **kwargs: Any) -> AsyncIterator[str]:
+        request_payload = self._build_request(payload, stop, **kwargs)
+        timeout = aiohttp.ClientTimeout(total=self.timeout) if self.timeout else None
+        async with self.connection_pool.atrack(api_url):
+            async with self.connection_pool.async_session().post(
+                url=api_url,
+                headers=self._headers(),
+                json=request_payload,
+                timeout=timeout,
+            ) as response:
+                if response.status != 200:
+                    if response.status == 404:
+                        raise OllamaEndpointNotFoundError(
+                            "Ollama call failed with status code 404."
+                        )
+                    raise ValueError(
+                        f"Ollama call failed with status code {response.status}."
+                        f" Details: {await response.text()}"
+                    )
+                async for line in response.content:
+                    yield line.decode("utf-8")
+
+_shared_pool: Optional[OllamaConnectionPool] = None
+
+def get_shared_connection_pool() -> OllamaConnectionPool:
+    """Get the process-wide Ollama connection pool, configured from the environment"""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = OllamaConnectionPool(
+            max_connections_per_host=int(os.getenv("OLLAMA_MAX_CONNECTIONS_PER_HOST", 8)),
+            keepalive_timeout=float(os.getenv("OLLAMA_HTTP_KEEPALIVE", 60))
+        )
+    return _shared_pool
@@ -10,16 +10,24 @@ import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
+import asyncio
 import json
+import logging
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse, Response
 from pydantic import BaseModel, Field
 
 # Import from local modules (now in same directory)
 from meta_agent.controller import MetaAgentController
+from meta_agent.controller_pool import ControllerPool
 from meta_agent.registry import AgentRegistry
 from config.llm_config import LLAMA_MODELS
+from config.ollama_pool import get_shared_connection_pool
+from config.llm_balancer import stop_health_checks
+from api.disconnect import DisconnectCanceller, ClientDisconnected
+
+logger = logging.getLogger(__name__)
 
 # Define schemas
 class AgentBlueprint(BaseModel):
@@ -35,6 +43,7 @@ class AgentRequest(BaseModel):
     blueprint_id: str
     input_data: Dict[str, Any]
     metadata: Optional[Dict[str, Any]] = None
+    timeout_seconds: Optional[float] = Field(None, gt=0)  # End-to-end deadline (defaults to REQUEST_TIMEOUT_SECONDS)
 
 class AgentResponse(BaseModel):
     """Schema for agent processing response"""
@@ -62,6 +71,18 @@ model_name = os.getenv("LLAMA_MODEL", "tinyllama")
 controller = MetaAgentController(model_name=model_name, use_full_supervisor=True)
 registry = AgentRegistry()
 
+# Warm controllers for per-request model overrides; the default controller is pinned because
+# default-model requests use it directly and would never refresh its LRU position
+controller_pool = ControllerPool(max_size=int(os.getenv("CONTROLLER_POOL_SIZE", 4)))
+controller_pool.add(controller, pinned=True)
+
+# Cancels workflow runs whose HTTP client has disconnected
+disconnect_canceller = DisconnectCanceller()
+
+# Idle agents are also evicted on delegation; this sweep covers servers that have gone quiet
+agent_eviction_interval = float(os.getenv("AGENT_EVICTION_INTERVAL_SECONDS", 60))
+agent_eviction_task: Optional[asyncio.Task] = None
+
 # Global conversation log for markdown reporting
 conversation_log = []
 
@@ -86,6 +107,58 @@ def log_conversation(query, result, execution_details=None):
     conversation_log.append(conversation_entry)
     return conversation_entry
 
+def get_controller(model=None):
+    """Get the controller for a request, using a pooled one if the model is overridden"""
+    if model and model in LLAMA_MODELS and model != controller.model_name:
+        return controller_pool.get(model)
+    return controller
+
+def build_execution_details(result, execution_time):
+    """Build the execution details logged alongside a conversation"""
+    return {
+        "execution_time": execution_time,
+        "workflow_path": ["analyze_task", "check_registry", "delegate_task", "evaluate_output", "return_output"],
+        "decision_points": [
+            {"decision": "agent_selection", "outcome": result.get('agent_used')},
+            {"decision": "agent_creation", "outcome": result.get('was_agent_created', False)},
+            {"decision": "output_quality", "outcome": result.get('status')}
+        ],
+        "metrics": {
+            "execution_time_ms": execution_time * 1000,
+            "retry_count": result.get('retry_count', 0),
+            "agent_type": "new" if result.get('was_agent_created') else "existing"
+        }
+    }
+
+async def evict_idle_agents_periodically():
+    """Evict idle dynamic agents from every pooled controller's registry"""
+    while True:
+        await asyncio.sleep(agent_eviction_interval)
+        for pooled_controller in controller_pool.controllers():
+            try:
+                pooled_controller.evict_idle_agents()
+            except Exception:
+                logger.exception(f"⚠️ Idle agent eviction failed for model '{pooled_controller.model_name}'")
+
+@app.on_event("startup")
+async def start_agent_eviction():
+    """Start the periodic idle agent sweep"""
+    global agent_eviction_task
+    if agent_eviction_interval > 0:
+        agent_eviction_task = asyncio.ensure_future(evict_idle_agents_periodically())
+
+@app.on_event("shutdown")
+async def stop_agent_eviction():
+    """Stop the periodic idle agent sweep"""
+    if agent_eviction_task is not None:
+        agent_eviction_task.cancel()
+
+@app.on_event("shutdown")
+async def close_llm_connections():
+    """Stop LLM endpoint health checks and close pooled Ollama connections on shutdown"""
+    await stop_health_checks()
+    await get_shared_connection_pool().aclose()
+
 # API Endpoints
 @app.get("/")
 async def root():
@@ -97,9 +170,13 @@ async def root():
         "status": "active",
         "endpoints": {
             "process": "/agents/process",
+            "process_stream": "/agents/process/stream",
             "dashboard": "/workflow/dashboard", 
             "models": "/models",
-            "report": "/workflow/report"
+            "report": "/workflow/report",
+            "llm_stats": "/llm/stats",
+            "controller_stats": "/controllers/stats",
+            "cancellation_stats": "/requests/cancellations"
         }
     }
 
@@ -127,58 +204,95 @@ async def get_available_models():
         "model_info": LLAMA_MODELS
     }
 
+@app.get("/llm/stats")
+async def get_llm_stats():
+    """Get LLM serving statistics (cache, coalescing, batching and connection reuse)"""
+    return controller.get_llm_stats()
+
+@app.get("/controllers/stats")
+async def get_controller_stats():
+    """Get controller pool statistics (size, hits and build times)"""
+    return controller_pool.get_stats()
+
+@app.get("/requests/cancellations")
+async def get_cancellation_stats():
+    """Get counters for runs cancelled because their client disconnected"""
+    return disconnect_canceller.get_stats()
+
 @app.post("/agents/process", response_model=AgentResponse)
 async def process_agent_request(
     request: AgentRequest,
+    http_request: Request,
     model: str = Query(None, description="Override model for this request")
 ):
     """Process a request using the specified agent blueprint"""
     try:
         start_time = datetime.now()
         
-        # Use different controller if model override is specified
-        if model and model in LLAMA_MODELS and model != controller.model_name:
-            temp_controller = MetaAgentController(model_name=model, use_full_supervisor=True)
-            result = await temp_controller.process_request(
-                blueprint_id=request.blueprint_id,
-                input_data=request.input_data,
-                metadata=request.metadata
-            )
-        else:
-            result = await controller.process_request(
-                blueprint_id=request.blueprint_id,
-                input_data=request.input_data,
-                metadata=request.metadata
-            )
+        # Cancel the workflow (and its pending LLM call) if the client goes away
+        result = await disconnect_canceller.run(http_request, get_controller(model).process_request(
+            blueprint_id=request.blueprint_id,
+            input_data=request.input_data,
+            metadata=request.metadata,
+            timeout=request.timeout_seconds
+        ))
         
         execution_time = (datetime.now() - start_time).total_seconds()
         
         # Log the conversation for reporting
-        execution_details = {
-            "execution_time": execution_time,
-            "workflow_path": ["analyze_task", "check_registry", "delegate_task", "evaluate_output", "return_output"],
-            "decision_points": [
-                {"decision": "agent_selection", "outcome": result.get('agent_used')},
-                {"decision": "agent_creation", "outcome": result.get('was_agent_created', False)},
-                {"decision": "output_quality", "outcome": result.get('status')}
-            ],
-            "metrics": {
-                "execution_time_ms": execution_time * 1000,
-                "retry_count": result.get('retry_count', 0),
-                "agent_type": "new" if result.get('was_agent_created') else "existing"
-            }
-        }
-        
         log_conversation(
             query=str(request.input_data),
             result=result,
-            execution_details=execution_details
+            execution_details=build_execution_details(result, execution_time)
         )
         
         return AgentResponse(**result)
+    except ClientDisconnected:
+        # Nobody is listening; 499 is the conventional "client closed request" status
+        return Response(status_code=499)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/agents/process/stream")
+async def stream_agent_request(
+    request: AgentRequest,
+    model: str = Query(None, description="Override model for this request")
+):
+    """Process a request, streaming workflow progress and LLM tokens as server-sent events"""
+    active_controller = get_controller(model)
+    
+    async def event_stream():
+        start_time = datetime.now()
+        finished = False
+        try:
+            async for event in active_controller.stream_request(
+                blueprint_id=request.blueprint_id,
+                input_data=request.input_data,
+                metadata=request.metadata,
+                timeout=request.timeout_seconds
+            ):
+                if event["event"] == "result":
+                    finished = True
+                    execution_time = (datetime.now() - start_time).total_seconds()
+                    disconnect_canceller.record_completion(execution_time)
+                    log_conversation(
+                        query=str(request.input_data),
+                        result=event["data"],
+                        execution_details=build_execution_details(event["data"], execution_time)
+                    )
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client disconnected mid-stream; closing the generator cancels the workflow run
+            if not finished:
+                disconnect_canceller.record_cancellation((datetime.now() - start_time).total_seconds())
+            raise
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/agents/available")
 async def get_available_agents():
     """Get list of available agent blueprints"""
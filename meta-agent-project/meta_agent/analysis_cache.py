@@ -0,0 +1,86 @@
+from typing import Dict, Any, Optional, Iterable, Tuple
+from collections import OrderedDict
+import copy
+import re
+import threading
+import time
+
+class AnalysisCache:
+    """Bounded LRU cache of task analyses keyed on a normalized query, with TTL and hit-rate counters
+
+    Queries are folded for case, whitespace and punctuation before lookup, so near-identical
+    queries share one analysis. Punctuation listed in significant_chars (e.g. math operators
+    that the analyzer scores) is kept so queries that would analyze differently never collide.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 600.0,
+                 context_keys: Iterable[str] = (), significant_chars: str = ""):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.context_keys = tuple(context_keys)
+        folded = "".join(re.escape(char) for char in sorted(set(significant_chars)))
+        self._fold_pattern = re.compile(f"[^\\w\\s{folded}]|_")
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def normalize(self, query: str) -> str:
+        """Fold case, insignificant punctuation and runs of whitespace"""
+        return " ".join(self._fold_pattern.sub(" ", query.casefold()).split())
+
+    def make_key(self, query: str, context: Optional[Dict[str, Any]] = None) -> Tuple:
+        """Build the cache key from the normalized query and the context keys that affect analysis"""
+        context = context or {}
+        return (self.normalize(query),) + tuple(str(context.get(key)) for key in self.context_keys)
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Look up an analysis, returning a copy the caller may modify"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds > 0 and now - entry["created_at"] > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry["analysis"])
+
+    def set(self, key: Tuple, analysis: Dict[str, Any]) -> None:
+        """Store an analysis, evicting the least recently used entries past max_size"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = {"analysis": copy.deepcopy(analysis), "created_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (e.g. after the analysis backend changes)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
@@ -0,0 +1,150 @@
+from typing import Dict, List, Tuple
+import numpy as np
+
+class CapabilityMatrix:
+    """Compact agent x capability and agent x description-term matrices for vectorized best-fit scoring
+
+    Rows are agents, columns are capability terms. The capability matrix marks capabilities an
+    agent declares; the description matrix marks terms that occur in the agent's description.
+    Both grow by doubling and removed agents are swap-removed, so updates are O(terms).
+    """
+
+    CAPABILITY_WEIGHT = 2
+    DESCRIPTION_WEIGHT = 1
+    TASK_TYPE_WEIGHT = 3
+
+    def __init__(self, initial_agents: int = 16, initial_terms: int = 32):
+        self.capabilities = np.zeros((initial_agents, initial_terms), dtype=np.uint8)
+        self.descriptions = np.zeros((initial_agents, initial_terms), dtype=np.uint8)
+        self.positions = np.zeros(initial_agents, dtype=np.int64)
+        self.names: List[str] = []
+        self.name_text: List[str] = []        # Lowercased names, for task type matching
+        self.description_text: List[str] = []  # Lowercased descriptions, for new term columns
+        self.rows: Dict[str, int] = {}
+        self.terms: Dict[str, int] = {}
+        self._name_array = None  # Cached np.array of name_text, rebuilt after membership changes
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _grow(self, agents: int, terms: int) -> None:
+        rows, columns = self.capabilities.shape
+        if agents <= rows and terms <= columns:
+            return
+        new_rows = rows if agents <= rows else max(agents, rows * 2)
+        new_columns = columns if terms <= columns else max(terms, columns * 2)
+        for attribute in ("capabilities", "descriptions"):
+            grown = np.zeros((new_rows, new_columns), dtype=np.uint8)
+            old = getattr(self, attribute)
+            grown[:rows, :columns] = old
+            setattr(self, attribute, grown)
+        positions = np.zeros(new_rows, dtype=np.int64)
+        positions[:rows] = self.positions
+        self.positions = positions
+
+    def _term_column(self, term: str) -> int:
+        """Get the column for a term, adding it (and scanning existing descriptions once) if new"""
+        column = self.terms.get(term)
+        if column is None:
+            column = len(self.terms)
+            self._grow(len(self.names), column + 1)
+            self.terms[term] = column
+            needle = term.lower()
+            for row, description in enumerate(self.description_text):
+                self.descriptions[row, column] = needle in description
+        return column
+
+    def add(self, name: str, capabilities: List[str], description: str, position: int) -> None:
+        """Add or replace an agent's row"""
+        if name in self.rows:
+            self.remove(name)
+        columns = [self._term_column(capability) for capability in capabilities]
+
+        row = len(self.names)
+        self._grow(row + 1, len(self.terms))
+        self.names.append(name)
+        self.name_text.append(name.lower())
+        self.description_text.append(description.lower())
+        self.rows[name] = row
+        self.positions[row] = position
+        self._name_array = None
+
+        self.capabilities[row, :] = 0
+        self.capabilities[row, columns] = 1
+        self.descriptions[row, :] = 0
+        lowered = self.description_text[row]
+        for term, column in self.terms.items():
+            self.descriptions[row, column] = term.lower() in lowered
+
+    def remove(self, name: str) -> None:
+        """Remove an agent's row by moving the last row into its place"""
+        row = self.rows.pop(name, None)
+        if row is None:
+            return
+        last = len(self.names) - 1
+        if row != last:
+            self.capabilities[row] = self.capabilities[last]
+            self.descriptions[row] = self.descriptions[last]
+            self.positions[row] = self.positions[last]
+            self.names[row] = self.names[last]
+            self.name_text[row] = self.name_text[last]
+            self.description_text[row] = self.description_text[last]
+            self.rows[self.names[row]] = row
+        self.names.pop()
+        self.name_text.pop()
+        self.description_text.pop()
+        self.capabilities[last] = 0
+        self.descriptions[last] = 0
+        self._name_array = None
+
+    def score(self, capabilities: List[str], task_type: str = "", top_k: int = 1) -> List[Tuple[str, int]]:
+        """Score every agent in one pass and return the top-k (name, score) pairs, best first"""
+        count = len(self.names)
+        if count == 0:
+            return []
+
+        # Scoring never mutates the matrix, so published copies can be read without locks;
+        # terms no agent has registered yet are matched against the descriptions on the fly
+        terms = list(dict.fromkeys(capabilities))
+        columns = [self.terms[term] for term in terms if term in self.terms]
+        scores = np.zeros(count, dtype=np.int64)
+        if columns:
+            scores += self.CAPABILITY_WEIGHT * self.capabilities[:count, columns].sum(axis=1, dtype=np.int64)
+            scores += self.DESCRIPTION_WEIGHT * self.descriptions[:count, columns].sum(axis=1, dtype=np.int64)
+        for term in terms:
+            if term not in self.terms:
+                needle = term.lower()
+                scores += self.DESCRIPTION_WEIGHT * np.fromiter((needle in text for text in self.description_text), dtype=np.int64, count=count)
+        if task_type:
+            if self._name_array is None:
+                self._name_array = np.array(self.name_text)
+            matches = np.char.find(self._name_array, task_type.lower()) >= 0
+            scores += self.TASK_TYPE_WEIGHT * matches
+
+        # Highest score first, ties broken by registration order
+        order = np.lexsort((self.positions[:count], -scores))[:max(1, top_k)]
+        return [(self.names[row], int(scores[row])) for row in order]
+
+    def copy(self) -> "CapabilityMatrix":
+        """Copy the matrix so the original can keep changing while the copy is read"""
+        clone = CapabilityMatrix.__new__(CapabilityMatrix)
+        count = len(self.names)
+        clone.capabilities = self.capabilities[:max(count, 1)].copy()
+        clone.descriptions = self.descriptions[:max(count, 1)].copy()
+        clone.positions = self.positions[:max(count, 1)].copy()
+        clone.names = list(self.names)
+        clone.name_text = list(self.name_text)
+        clone.description_text = list(self.description_text)
+        clone.rows = dict(self.rows)
+        clone.terms = dict(self.terms)
+        clone._name_array = None
+        return clone
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get matrix dimensions and memory use"""
+        return {
+            "agents": len(self.names),
+            "terms": len(self.terms),
+            "capacity": int(self.capabilities.shape[0]),
+            "bytes": int(self.capabilities.nbytes + self.descriptions.nbytes + self.positions.nbytes)
+        }
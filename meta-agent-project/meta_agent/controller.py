@@ -1,10 +1,11 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 import sys
 import os
 import logging
 from datetime import datetime
 from pathlib import Path
 import json
+import time
 
 # Add project root to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -28,22 +29,27 @@ class MetaAgentController:
         # Get model configuration
         model_config = LLAMA_MODELS.get(model_name, LLAMA_MODELS["tinyllama"])
         
-        # Initialize Llama LLM with CPU optimizations
+        # Initialize Llama LLM with CPU optimizations, fronted by the shared cache and coalescer
         if model_config["type"] == "ollama":
-            self.llm = LlamaConfig.get_ollama_llm(
+            self.llm = LlamaConfig.get_serving_llm(
                 model_name=model_config["model"],
                 temperature=0.7,
                 num_ctx=1024,
-                num_predict=256
+                num_predict=256,
+                batch_window_ms=model_config.get("batch_window_ms", 10),
+                max_batch_size=model_config.get("max_batch_size", 1),
+                endpoints=model_config.get("endpoints")
             )
         else:
-            self.llm = LlamaConfig.get_ollama_llm("tinyllama")
+            self.llm = LlamaConfig.get_serving_llm("tinyllama")
         
         self.model_name = model_name
         self.use_full_supervisor = use_full_supervisor
         self.enable_logging = enable_logging
         self.allow_agent_creation = allow_agent_creation
         self.initial_agents = initial_agents if initial_agents is not None else ["fun_fact_agent"]
+        # End-to-end budget for one request, shared by every node of the workflow
+        self.request_timeout = float(os.getenv("REQUEST_TIMEOUT_SECONDS", 120))
         
         # Initialize conversation logging
         self.conversation_log: List[Dict[str, Any]] = []
@@ -99,52 +105,63 @@ class MetaAgentController:
         self.conversation_log.append(conversation_entry)
         return conversation_entry
 
+    def _build_task_input(self, blueprint_id: Optional[str], input_data: dict, metadata: dict,
+                          creation_setting: bool, timeout: Optional[float] = None) -> dict:
+        """Build the supervisor task input from an API request"""
+        return {
+            "task_input": input_data.get("query", "") if input_data else "",
+            "deadline": time.time() + (timeout if timeout is not None else self.request_timeout),
+            "task_context": {
+                "blueprint_id": blueprint_id,
+                "metadata": metadata or {},
+                "allow_agent_creation": creation_setting,  # Pass to context
+                **(input_data.get("context", {}) if input_data else {})
+            }
+        }
+    
+    def _log_result(self, task_input: dict, result: dict, creation_setting: bool, execution_time: float):
+        """Log a completed request for the markdown report"""
+        execution_details = {
+            "execution_time": execution_time,
+            "allow_agent_creation": creation_setting,
+            "workflow_path": ["analyze_task", "check_registry", "delegate_task", "evaluate_output", "return_output"],
+            "decision_points": [
+                {"decision": "agent_selection", "outcome": result.get('agent_used')},
+                {"decision": "agent_creation", "outcome": result.get('was_agent_created', False)},
+                {"decision": "output_quality", "outcome": result.get('status')}
+            ],
+            "metrics": {
+                "execution_time_ms": execution_time * 1000,
+                "retry_count": result.get('retry_count', 0),
+                "agent_type": "new" if result.get('was_agent_created') else "existing"
+            }
+        }
+        
+        self.log_conversation(
+            query=task_input["task_input"],
+            result=result,
+            execution_details=execution_details
+        )
+
     async def process_request(self, blueprint_id: Optional[str] = None, 
                             input_data: dict = None, metadata: dict = None, 
-                            allow_agent_creation: Optional[bool] = None) -> dict:
-        """Main entry point with automatic conversation logging"""
+                            allow_agent_creation: Optional[bool] = None,
+                            timeout: Optional[float] = None) -> dict:
+        """Main entry point with automatic conversation logging; timeout overrides the request deadline"""
         start_time = datetime.now()
         
         try:
             # Use provided setting or default
             creation_setting = allow_agent_creation if allow_agent_creation is not None else self.allow_agent_creation
             
-            task_input = {
-                "task_input": input_data.get("query", "") if input_data else "",
-                "task_context": {
-                    "blueprint_id": blueprint_id,
-                    "metadata": metadata or {},
-                    "allow_agent_creation": creation_setting,  # Pass to context
-                    **(input_data.get("context", {}) if input_data else {})
-                }
-            }
+            task_input = self._build_task_input(blueprint_id, input_data, metadata, creation_setting, timeout)
             
             result = await self.supervisor.process(task_input)
             execution_time = (datetime.now() - start_time).total_seconds()
             
             # Log the conversation if enabled
             if self.enable_logging:
-                execution_details = {
-                    "execution_time": execution_time,
-                    "allow_agent_creation": creation_setting,
-                    "workflow_path": ["analyze_task", "check_registry", "delegate_task", "evaluate_output", "return_output"],
-                    "decision_points": [
-                        {"decision": "agent_selection", "outcome": result.get('agent_used')},
-                        {"decision": "agent_creation", "outcome": result.get('was_agent_created', False)},
-                        {"decision": "output_quality", "outcome": result.get('status')}
-                    ],
-                    "metrics": {
-                        "execution_time_ms": execution_time * 1000,
-                        "retry_count": result.get('retry_count', 0),
-                        "agent_type": "new" if result.get('was_agent_created') else "existing"
-                    }
-                }
-                
-                self.log_conversation(
-                    query=task_input["task_input"],
-                    result=result,
-                    execution_details=execution_details
-                )
+                self._log_result(task_input, result, creation_setting, execution_time)
             
             # Add execution time to result
             result["execution_time"] = execution_time
@@ -174,6 +191,50 @@ class MetaAgentController:
             
             return error_result
 
+    async def stream_request(self, blueprint_id: Optional[str] = None,
+                             input_data: dict = None, metadata: dict = None,
+                             allow_agent_creation: Optional[bool] = None,
+                             timeout: Optional[float] = None) -> AsyncIterator[dict]:
+        """Streaming entry point: yields start, node, token and result events as the workflow runs"""
+        start_time = datetime.now()
+        creation_setting = allow_agent_creation if allow_agent_creation is not None else self.allow_agent_creation
+        task_input = self._build_task_input(blueprint_id, input_data, metadata, creation_setting, timeout)
+        
+        yield {"event": "start", "data": {"query": task_input["task_input"], "model": self.model_name}}
+        
+        try:
+            if hasattr(self.supervisor, 'stream'):
+                events = self.supervisor.stream(task_input)
+            else:
+                # Supervisors without streaming support report only the final result
+                async def single_result():
+                    yield {"event": "result", "data": await self.supervisor.process(task_input)}
+                events = single_result()
+            
+            async for event in events:
+                if event["event"] == "result":
+                    result = event["data"]
+                    execution_time = (datetime.now() - start_time).total_seconds()
+                    if self.enable_logging:
+                        self._log_result(task_input, result, creation_setting, execution_time)
+                    result["execution_time"] = execution_time
+                    logger.info(f"Streamed request processed by {result.get('agent_used', 'unknown')} agent")
+                yield event
+                
+        except Exception as e:
+            execution_time = (datetime.now() - start_time).total_seconds()
+            logger.error(f"Streamed request processing failed: {str(e)}")
+            yield {
+                "event": "result",
+                "data": {
+                    "status": "error",
+                    "error": str(e),
+                    "agent_used": None,
+                    "was_agent_created": False,
+                    "execution_time": execution_time
+                }
+            }
+
     def generate_markdown_report(self, filename: str = None) -> str:
         """Generate a comprehensive markdown report from conversation logs"""
         if not self.enable_logging:
@@ -441,7 +502,8 @@ Based on the execution data:
                 "llm_type": "llama-cpu",
                 "supervisor_type": supervisor_type,
                 "system_info": system_info,
-                "estimated_speed": SystemDetector.estimate_inference_time(self.model_name)
+                "estimated_speed": SystemDetector.estimate_inference_time(self.model_name),
+                "llm": self.get_llm_stats()
             }
         except Exception as e:
             logger.error(f"Stats error: {str(e)}")
@@ -450,6 +512,20 @@ Based on the execution data:
                 "error": str(e)
             }
     
+    def evict_idle_agents(self) -> List[str]:
+        """Evict idle dynamically created agents from the workflow's agent registry"""
+        if hasattr(self.supervisor, 'supervisor_graph'):
+            return self.supervisor.supervisor_graph.registry.evict_agents()
+        return []
+    
+    async def aclose(self):
+        """Release the LLM resources this controller does not share with other controllers"""
+        await LlamaConfig.aclose_llm(self.llm)
+    
+    def get_llm_stats(self) -> dict:
+        """Get statistics for the LLM serving layers (cache, coalescing, batching, connections)"""
+        return LlamaConfig.get_llm_stats(self.llm)
+    
     def _get_timestamp(self):
         """Get current timestamp for API responses"""
         return datetime.now().isoformat()
@@ -0,0 +1,112 @@
+from typing import Dict, Any, Optional, List, Tuple
+from collections import OrderedDict
+import asyncio
+import logging
+import time
+
+from meta_agent.controller import MetaAgentController
+
+logger = logging.getLogger(__name__)
+
+class ControllerPool:
+    """Bounded LRU pool of warm MetaAgentControllers keyed by model and agent settings"""
+
+    def __init__(self, max_size: int = 4, use_full_supervisor: bool = True):
+        self.max_size = max(1, max_size)
+        self.use_full_supervisor = use_full_supervisor
+        self._controllers: "OrderedDict[Tuple, MetaAgentController]" = OrderedDict()
+        self._build_times: Dict[Tuple, float] = {}
+        self._pinned: set = set()
+        self._closing: set = set()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_name: str, allow_agent_creation: bool = True,
+                 initial_agents: Optional[List[str]] = None) -> Tuple:
+        """Build the pool key for a controller configuration"""
+        agents = tuple(initial_agents) if initial_agents is not None else ("fun_fact_agent",)
+        return (model_name, allow_agent_creation, agents)
+
+    def add(self, controller: MetaAgentController, pinned: bool = False) -> None:
+        """Seed the pool with an already-built controller; pinned controllers are never evicted"""
+        key = self.make_key(controller.model_name, controller.allow_agent_creation, controller.initial_agents)
+        if pinned:
+            self._pinned.add(key)
+        self._store(key, controller)
+
+    def get(self, model_name: str, allow_agent_creation: bool = True,
+            initial_agents: Optional[List[str]] = None) -> MetaAgentController:
+        """Get a warm controller for the configuration, building it on first use"""
+        key = self.make_key(model_name, allow_agent_creation, initial_agents)
+        controller = self._controllers.get(key)
+        if controller is not None:
+            self._controllers.move_to_end(key)
+            self.hits += 1
+            return controller
+
+        self.misses += 1
+        logger.info(f"🏗️ Building controller for model '{model_name}' (pool miss)")
+        start = time.perf_counter()
+        controller = MetaAgentController(
+            model_name=model_name,
+            use_full_supervisor=self.use_full_supervisor,
+            allow_agent_creation=allow_agent_creation,
+            initial_agents=list(key[2])
+        )
+        self._build_times[key] = time.perf_counter() - start
+        self._store(key, controller)
+        return controller
+
+    def controllers(self) -> List[MetaAgentController]:
+        """Get every pooled controller"""
+        return list(self._controllers.values())
+
+    def _store(self, key: Tuple, controller: MetaAgentController) -> None:
+        self._controllers[key] = controller
+        self._controllers.move_to_end(key)
+        while len(self._controllers) > self.max_size + len(self._pinned):
+            # Least recently used first, skipping pinned controllers
+            evicted_key = next(k for k in self._controllers if k not in self._pinned)
+            evicted = self._controllers.pop(evicted_key)
+            self._build_times.pop(evicted_key, None)
+            self.evictions += 1
+            logger.info(f"♻️ Evicted controller for model '{evicted_key[0]}' from pool")
+            self._close(evicted)
+
+    def _close(self, controller: MetaAgentController) -> None:
+        """Release an evicted controller's resources in the background (only possible inside an event loop)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(controller.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool size, hit counters and controller build times"""
+        lookups = self.hits + self.misses
+        build_times = list(self._build_times.values())
+        return {
+            "size": len(self._controllers),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "avg_build_seconds": sum(build_times) / len(build_times) if build_times else 0.0,
+            "controllers": [
+                {
+                    "model": key[0],
+                    "allow_agent_creation": key[1],
+                    "initial_agents": list(key[2]),
+                    "pinned": key in self._pinned,
+                    "build_seconds": self._build_times.get(key)
+                }
+                for key in self._controllers
+            ]
+        }
@@ -0,0 +1,100 @@
+from typing import Dict, List, Set
+from collections import deque
+
+try:
+    # Optional C implementation; the pure-Python automaton below is used without it
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that scores keyword groups in a single pass over the text
+
+    Built once from {group: [keywords]}; score() counts, per group, how many distinct
+    keywords occur anywhere in the text (the same result as `sum(k in text for k in keywords)`).
+    Uses pyahocorasick when it is installed and an equivalent pure-Python DFA otherwise.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]]):
+        self.groups = list(groups)
+        self.keywords: List[str] = []
+        self.keyword_groups: List[List[str]] = []
+
+        keyword_ids: Dict[str, int] = {}
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                if keyword not in keyword_ids:
+                    keyword_ids[keyword] = len(self.keywords)
+                    self.keywords.append(keyword)
+                    self.keyword_groups.append([])
+                if group not in self.keyword_groups[keyword_ids[keyword]]:
+                    self.keyword_groups[keyword_ids[keyword]].append(group)
+
+        self._automaton = None
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword_id, keyword in enumerate(self.keywords):
+                self._automaton.add_word(keyword, keyword_id)
+            self._automaton.make_automaton()
+            return
+        self._build(self.keywords)
+
+    def _build(self, keywords: List[str]) -> None:
+        """Build the pure-Python trie, failure links and transition tables"""
+        # Trie
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[Set[int]] = [set()]
+        for keyword_id, keyword in enumerate(keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._output.append(set())
+                state = next_state
+            self._output[state].add(keyword_id)
+
+        # Failure links (breadth first), folding each state's suffix outputs into its own and
+        # resolving them into full transition tables so matching never walks failure links
+        fail = [0] * len(self._goto)
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] + [None] * (len(self._goto) - 1)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail[next_state] = self._delta[fail[state]].get(char, 0) if state else 0
+                self._output[next_state] |= self._output[fail[next_state]]
+            if state:
+                self._delta[state] = {**self._delta[fail[state]], **self._goto[state]}
+
+        self._output_tuples = [tuple(output) for output in self._output]
+
+    def find(self, text: str) -> Set[int]:
+        """Get the ids of every keyword occurring in the text"""
+        if self._automaton is not None:
+            return {keyword_id for _, keyword_id in self._automaton.iter(text)}
+
+        delta = self._delta
+        outputs = self._output_tuples
+        found: Set[int] = set()
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+    def match_groups(self, text: str) -> Set[str]:
+        """Get the groups with at least one keyword in the text"""
+        return {group for keyword_id in self.find(text) for group in self.keyword_groups[keyword_id]}
+
+    def score(self, text: str) -> Dict[str, int]:
+        """Count distinct keyword matches per group, in group definition order"""
+        scores = {group: 0 for group in self.groups}
+        for keyword_id in self.find(text):
+            for group in self.keyword_groups[keyword_id]:
+                scores[group] += 1
+        return scores
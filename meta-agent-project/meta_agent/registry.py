@@ -1,42 +1,291 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple, FrozenSet, Mapping
+from collections import Counter, OrderedDict
+from types import MappingProxyType
+from langchain.llms.base import BaseLLM
 from agents.agent_factory import BaseAgent
+from meta_agent.capability_matrix import CapabilityMatrix
+from meta_agent.reliability import ReliabilityTracker
+from pathlib import Path
+import json
 import logging
+import os
+import sys
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BLUEPRINTS_PATH = Path(__file__).resolve().parent.parent / "data" / "blueprints.json"
+
+class RegistrySnapshot:
+    """Immutable, versioned view of the registered agents
+
+    A request pins one snapshot and reads from it without locking; registry writes
+    publish a new snapshot instead of mutating this one.
+    """
+    
+    def __init__(self, version: int, agents: Mapping[str, BaseAgent],
+                 capability_index: Mapping[str, FrozenSet[str]], positions: Mapping[str, int],
+                 matrix: CapabilityMatrix):
+        self.version = version
+        self.agents = agents
+        self.capability_index = capability_index
+        self.positions = positions
+        self.matrix = matrix
+    
+    def __len__(self) -> int:
+        return len(self.agents)
+    
+    def get_agent(self, name: str) -> Optional[BaseAgent]:
+        """Get an agent by name"""
+        return self.agents.get(name)
+    
+    def get_available_agents(self) -> List[BaseAgent]:
+        """Get all available agents"""
+        return list(self.agents.values())
+    
+    def find_agents_by_capability(self, capability: str) -> List[BaseAgent]:
+        """Find agents that have a specific capability"""
+        names = self.capability_index.get(capability, ())
+        return [self.agents[name] for name in sorted(names, key=self.positions.get)]
+    
+    def find_agents_by_capabilities(self, capabilities: List[str], match: str = "any") -> List[BaseAgent]:
+        """Find agents covering any (or all) of the capabilities, ranked by how many they cover"""
+        overlap = Counter()
+        for capability in set(capabilities):
+            overlap.update(self.capability_index.get(capability, ()))
+        
+        if match == "all":
+            required = len(set(capabilities))
+            overlap = Counter({name: count for name, count in overlap.items() if count == required})
+        
+        # Highest overlap first; ties keep registration order
+        ranked = sorted(overlap, key=lambda name: (-overlap[name], self.positions[name]))
+        return [self.agents[name] for name in ranked]
+    
+    def rank_agents(self, capabilities: List[str], task_type: str = "", top_k: int = 1) -> List[Tuple[BaseAgent, int]]:
+        """Score all agents for best fit (capability overlap, description terms, task type) and return the top-k"""
+        return [(self.agents[name], score) for name, score in self.matrix.score(capabilities, task_type, top_k)]
+
 class AgentRegistry:
-    """Manages agent blueprints and results"""
+    """Manages agent blueprints and results
     
-    def __init__(self):
+    Agent lookups read the current RegistrySnapshot; register_agent/remove_agent change a
+    private working copy under a writer lock and publish a new snapshot (copy-on-write).
+    """
+    
+    def __init__(self, max_agents: Optional[int] = None, idle_timeout: Optional[float] = None):
         self.agents: Dict[str, BaseAgent] = {}
         self.blueprints: Dict[str, Dict[str, Any]] = {}
+        # Inverted index: capability -> names of agents that have it (frozensets, replaced on change)
+        self.capability_index: Dict[str, FrozenSet[str]] = {}
+        self._positions: Dict[str, int] = {}  # Registration order, used to break ranking ties
+        self._next_position = 0
+        # Vectorized agent x capability / description-term matrices for best-fit scoring
+        self.matrix = CapabilityMatrix()
+        
+        # Copy-on-write publication: writers serialize on this lock, readers never take it
+        self._write_lock = threading.RLock()
+        self._snapshot = RegistrySnapshot(0, MappingProxyType({}), MappingProxyType({}), MappingProxyType({}), self.matrix.copy())
+        self.publications = 0
+        
+        # Lifecycle: unpinned (dynamically spawned) agents are capped and evicted LRU / when idle
+        self.max_agents = max_agents if max_agents is not None else int(os.getenv("AGENT_REGISTRY_MAX_AGENTS", 50))
+        self.idle_timeout = idle_timeout if idle_timeout is not None else float(os.getenv("AGENT_IDLE_TIMEOUT_SECONDS", 1800))
+        self.pinned: Set[str] = set()
+        self.last_used: "OrderedDict[str, float]" = OrderedDict()  # Least recently used first
+        self.uses: Dict[str, int] = {}
+        self.reuses = 0
+        self.lru_evictions = 0
+        self.idle_evictions = 0
+        
+        # Validator pass rate per (agent, task type), used to sample validation for proven agents
+        self.reliability = ReliabilityTracker(
+            reliable_threshold=float(os.getenv("VALIDATION_RELIABLE_THRESHOLD") or 0.95),
+            min_samples=int(os.getenv("VALIDATION_MIN_SAMPLES") or 10),
+            sample_rate=float(os.getenv("VALIDATION_SAMPLE_RATE") or 0.2)
+        )
+    
+    def snapshot(self) -> RegistrySnapshot:
+        """Get the current published registry snapshot"""
+        return self._snapshot
     
-    def register_agent(self, agent: BaseAgent):
-        """Register an agent in the registry"""
-        self.agents[agent.name] = agent
-        logger.info(f"Registered agent: {agent.name}")
+    def _publish(self):
+        self._snapshot = RegistrySnapshot(
+            version=self._snapshot.version + 1,
+            agents=MappingProxyType(dict(self.agents)),
+            capability_index=MappingProxyType(dict(self.capability_index)),
+            positions=MappingProxyType(dict(self._positions)),
+            matrix=self.matrix.copy()
+        )
+        self.publications += 1
+    
+    def register_agent(self, agent: BaseAgent, pinned: bool = False):
+        """Register an agent in the registry; pinned agents are never evicted"""
+        with self._write_lock:
+            if agent.name in self.agents:
+                self._unindex_agent(self.agents[agent.name])
+                if self.agents[agent.name] is not agent:
+                    self.reliability.forget_agent(agent.name)
+            else:
+                self._positions[agent.name] = self._next_position
+                self._next_position += 1
+            self.agents[agent.name] = agent
+            self._index_agent(agent)
+            self.matrix.add(
+                agent.name,
+                list(getattr(agent, 'capabilities', [])),
+                getattr(agent, 'description', '') or '',
+                self._positions[agent.name]
+            )
+            if pinned:
+                self.pinned.add(agent.name)
+            self.uses.setdefault(agent.name, 0)
+            self.touch(agent.name)
+            logger.info(f"Registered agent: {agent.name}")
+            self._evict(keep=agent.name)
+            self._publish()
+    
+    def touch(self, name: str):
+        """Mark an agent as just used"""
+        if name in self.agents:
+            self.last_used[name] = time.monotonic()
+            self.last_used.move_to_end(name)
+    
+    def record_use(self, name: str):
+        """Record a delegation to an agent, evicting agents that have gone idle meanwhile"""
+        if name in self.agents:
+            self.uses[name] = self.uses.get(name, 0) + 1
+            self.touch(name)
+        if self._has_idle_agents():
+            self.evict_agents()
+    
+    def _has_idle_agents(self) -> bool:
+        """Check (oldest first, stopping at the first recently used agent) for evictable idle agents"""
+        now = time.monotonic()
+        for name, last_used in list(self.last_used.items()):
+            if now - last_used < self.idle_timeout:
+                return False
+            if name not in self.pinned:
+                return True
+        return False
+    
+    def find_reusable_agent(self, capabilities: List[str], exclude: List[str] = None,
+                            snapshot: Optional[RegistrySnapshot] = None) -> Optional[BaseAgent]:
+        """Find a dynamic agent with exactly this capability set, most recently used first"""
+        exclude = set(exclude or [])
+        wanted = set(capabilities)
+        candidates = [
+            agent for agent in (snapshot or self._snapshot).find_agents_by_capabilities(capabilities, match="all")
+            if agent.name not in self.pinned and agent.name not in exclude
+            and set(getattr(agent, 'capabilities', [])) == wanted
+        ]
+        if not candidates:
+            return None
+        agent = max(candidates, key=lambda candidate: self.last_used.get(candidate.name, 0.0))
+        self.reuses += 1
+        self.touch(agent.name)
+        return agent
+    
+    def evict_agents(self) -> List[str]:
+        """Evict idle dynamic agents, then least recently used ones above the live agent cap"""
+        with self._write_lock:
+            evicted = self._evict()
+            if evicted:
+                self._publish()
+            return evicted
+    
+    def _evict(self, keep: Optional[str] = None) -> List[str]:
+        protected = self.pinned | ({keep} if keep else set())
+        evicted = []
+        now = time.monotonic()
+        for name, last_used in list(self.last_used.items()):
+            if now - last_used < self.idle_timeout:
+                break
+            if name not in protected:
+                self._remove(name)
+                self.idle_evictions += 1
+                evicted.append(name)
+        
+        if len(self.agents) > self.max_agents:
+            for name in list(self.last_used):
+                if len(self.agents) <= self.max_agents:
+                    break
+                if name not in protected:
+                    self._remove(name)
+                    self.lru_evictions += 1
+                    evicted.append(name)
+        
+        if evicted:
+            logger.info(f"♻️ Evicted {len(evicted)} agents: {evicted}")
+        return evicted
+    
+    def _index_agent(self, agent: BaseAgent):
+        for capability in getattr(agent, 'capabilities', []):
+            self.capability_index[capability] = self.capability_index.get(capability, frozenset()) | {agent.name}
+    
+    def _unindex_agent(self, agent: BaseAgent):
+        for capability in getattr(agent, 'capabilities', []):
+            names = self.capability_index.get(capability, frozenset()) - {agent.name}
+            if names:
+                self.capability_index[capability] = names
+            else:
+                self.capability_index.pop(capability, None)
     
     def get_agent(self, name: str) -> Optional[BaseAgent]:
         """Get an agent by name"""
-        return self.agents.get(name)
+        return self._snapshot.get_agent(name)
     
     def get_available_agents(self) -> List[BaseAgent]:
         """Get all available agents"""
-        return list(self.agents.values())
+        return self._snapshot.get_available_agents()
     
     def find_agents_by_capability(self, capability: str) -> List[BaseAgent]:
         """Find agents that have a specific capability"""
-        matching_agents = []
-        for agent in self.agents.values():
-            if hasattr(agent, 'capabilities') and capability in agent.capabilities:
-                matching_agents.append(agent)
-        return matching_agents
+        return self._snapshot.find_agents_by_capability(capability)
+    
+    def find_agents_by_capabilities(self, capabilities: List[str], match: str = "any") -> List[BaseAgent]:
+        """Find agents covering any (or all) of the capabilities, ranked by how many they cover"""
+        return self._snapshot.find_agents_by_capabilities(capabilities, match)
+    
+    def rank_agents(self, capabilities: List[str], task_type: str = "", top_k: int = 1) -> List[Tuple[BaseAgent, int]]:
+        """Score all agents for best fit (capability overlap, description terms, task type) and return the top-k"""
+        return self._snapshot.rank_agents(capabilities, task_type, top_k)
     
     def register_blueprint(self, blueprint_id: str, blueprint: Dict[str, Any]):
         """Register an agent blueprint"""
         self.blueprints[blueprint_id] = blueprint
         logger.info(f"Registered blueprint: {blueprint_id}")
     
+    def load_blueprints(self, path: Optional[str] = None, source: Optional[str] = None) -> int:
+        """Load agent blueprints from the JSON file (or MongoDB) as lightweight descriptors"""
+        source = source or os.getenv("BLUEPRINT_SOURCE", "file")
+        path = path or os.getenv("BLUEPRINTS_PATH") or DEFAULT_BLUEPRINTS_PATH
+        
+        blueprints = None
+        origin = "MongoDB"
+        if source == "mongo":
+            try:
+                from mongodb.connector import MongoDBConnector
+                blueprints = MongoDBConnector().get_all_blueprints()
+                if not blueprints:
+                    # A fresh store has nothing in it yet; start from the bundled blueprints
+                    logger.warning(f"⚠️ MongoDB has no agent blueprints; using {path}")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load blueprints from MongoDB ({e}); using {path}")
+        if not blueprints:
+            origin = str(path)
+            with open(path, encoding="utf-8") as f:
+                blueprints = json.load(f)
+        
+        for blueprint_id, blueprint in blueprints.items():
+            # The blueprint id doubles as the agent name used for routing
+            descriptor = {key: value for key, value in blueprint.items() if key != "_id"}
+            descriptor["name"] = blueprint_id
+            self.blueprints[blueprint_id] = descriptor
+        logger.info(f"Loaded {len(blueprints)} agent blueprints from {origin}")
+        return len(blueprints)
+    
     def get_blueprint(self, blueprint_id: str) -> Optional[Dict[str, Any]]:
         """Get a blueprint by ID"""
         return self.blueprints.get(blueprint_id)
@@ -47,13 +296,69 @@ class AgentRegistry:
     
     def remove_agent(self, agent_id: str) -> bool:
         """Remove an agent from the registry"""
+        with self._write_lock:
+            removed = self._remove(agent_id)
+            if removed:
+                self._publish()
+            return removed
+    
+    def _remove(self, agent_id: str) -> bool:
         if agent_id in self.agents:
-            del self.agents[agent_id]
+            self._unindex_agent(self.agents.pop(agent_id))
+            self.matrix.remove(agent_id)
+            del self._positions[agent_id]
+            self.pinned.discard(agent_id)
+            self.last_used.pop(agent_id, None)
+            self.uses.pop(agent_id, None)
+            self.reliability.forget_agent(agent_id)
             logger.info(f"Removed agent: {agent_id}")
             return True
         return False
     
+    def get_lifecycle_stats(self) -> Dict[str, Any]:
+        """Get live agent counts, reuse/eviction counters and approximate memory per agent"""
+        now = time.monotonic()
+        agents = [
+            {
+                "name": name,
+                "pinned": name in self.pinned,
+                "uses": self.uses.get(name, 0),
+                "idle_seconds": now - self.last_used.get(name, now),
+                "approx_bytes": _deep_sizeof(agent)
+            }
+            for name, agent in self.agents.items()
+        ]
+        return {
+            "snapshot_version": self._snapshot.version,
+            "live_agents": len(self.agents),
+            "max_agents": self.max_agents,
+            "idle_timeout": self.idle_timeout,
+            "reuses": self.reuses,
+            "lru_evictions": self.lru_evictions,
+            "idle_evictions": self.idle_evictions,
+            "total_approx_bytes": sum(agent["approx_bytes"] for agent in agents),
+            "agents": agents
+        }
+    
     def store_result(self, blueprint_id: str, result: dict) -> None:
         """Store an agent execution result"""
         # Implementation needed
         pass
+
+
+def _deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Approximate the memory held by an object, excluding shared LLM clients"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, BaseLLM):
+        return 0
+    seen.add(id(obj))
+    
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(key, seen) + _deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += _deep_sizeof(vars(obj), seen)
+    return size
@@ -0,0 +1,91 @@
+from typing import Dict, Any, Tuple
+import logging
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+class ReliabilityTracker:
+    """EWMA of validator pass rate per (agent, task type), used to sample full validation
+
+    Pairs with enough history and a pass rate at or above reliable_threshold are "trusted": only
+    sample_rate of their outputs get full validation, the rest a cheap check. Every full
+    validation updates the average, so a drop in quality returns the pair to strict mode.
+    """
+
+    def __init__(self, alpha: float = 0.2, reliable_threshold: float = 0.95,
+                 min_samples: int = 10, sample_rate: float = 0.2):
+        self.alpha = alpha
+        self.reliable_threshold = reliable_threshold
+        self.min_samples = min_samples
+        self.sample_rate = sample_rate
+        self._scores: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        # Counters
+        self.full_validations = 0
+        self.fast_accepts = 0
+        self.fast_rejects = 0
+
+    def record(self, agent_name: str, task_type: str, passed: bool) -> None:
+        """Record the outcome of a full validation"""
+        with self._lock:
+            self.full_validations += 1
+            entry = self._scores.setdefault((agent_name, task_type), {"pass_rate": None, "samples": 0})
+            was_trusted = self._is_trusted(entry)
+            value = 1.0 if passed else 0.0
+            if entry["pass_rate"] is None:
+                entry["pass_rate"] = value
+            else:
+                entry["pass_rate"] = (1 - self.alpha) * entry["pass_rate"] + self.alpha * value
+            entry["samples"] += 1
+            if was_trusted and not self._is_trusted(entry):
+                logger.warning(f"📉 {agent_name} reliability on {task_type} dropped to {entry['pass_rate']:.2f} - back to strict validation")
+
+    def is_trusted(self, agent_name: str, task_type: str) -> bool:
+        """Check whether a pair has earned sampled validation"""
+        with self._lock:
+            entry = self._scores.get((agent_name, task_type))
+            return entry is not None and self._is_trusted(entry)
+
+    def needs_full_validation(self, agent_name: str, task_type: str) -> bool:
+        """Decide whether this output gets full validation (always, unless the pair is trusted and not sampled)"""
+        return not self.is_trusted(agent_name, task_type) or random.random() < self.sample_rate
+
+    def record_fast_check(self, passed: bool) -> None:
+        with self._lock:
+            if passed:
+                self.fast_accepts += 1
+            else:
+                self.fast_rejects += 1
+
+    def forget_agent(self, agent_name: str) -> None:
+        """Drop an agent's history (e.g. when it is evicted from the registry)"""
+        with self._lock:
+            for key in [key for key in self._scores if key[0] == agent_name]:
+                del self._scores[key]
+
+    def _is_trusted(self, entry: Dict[str, Any]) -> bool:
+        return (self.sample_rate < 1.0 and entry["samples"] >= self.min_samples
+                and entry["pass_rate"] >= self.reliable_threshold)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get validation counters and per-agent reliability"""
+        with self._lock:
+            outputs = self.full_validations + self.fast_accepts
+            return {
+                "sample_rate": self.sample_rate,
+                "reliable_threshold": self.reliable_threshold,
+                "full_validations": self.full_validations,
+                "fast_accepts": self.fast_accepts,
+                "fast_rejects": self.fast_rejects,
+                "full_validation_rate": self.full_validations / outputs if outputs else 1.0,
+                "agents": {
+                    f"{agent_name}:{task_type}": {
+                        "pass_rate": entry["pass_rate"],
+                        "samples": entry["samples"],
+                        "mode": "sampled" if self._is_trusted(entry) else "strict"
+                    }
+                    for (agent_name, task_type), entry in self._scores.items()
+                }
+            }
@@ -0,0 +1,48 @@
+from typing import Dict, Any, Callable, Optional
+from collections import OrderedDict
+import re
+import threading
+
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+class RoutingCache:
+    """Bounded LRU of how past queries were successfully routed, keyed on the query's shape
+
+    The shape is the normalized query with numbers masked, so "calculate 6 * 7" and
+    "calculate 12 * 9" share a route. Used to predict the agent for a new query before it
+    has been analyzed.
+    """
+
+    def __init__(self, normalize: Callable[[str], str], max_size: int = 1024, min_hits: int = 1):
+        self.normalize = normalize
+        self.max_size = max_size
+        self.min_hits = min_hits
+        self._routes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def shape(self, query: str) -> str:
+        return NUMBER_PATTERN.sub("#", self.normalize(query))
+
+    def predict(self, query: str) -> Optional[Dict[str, Any]]:
+        """Get the {agent, task_type} that served queries of this shape, if it has done so often enough"""
+        with self._lock:
+            route = self._routes.get(self.shape(query))
+            if route is None or route["hits"] < self.min_hits:
+                return None
+            return {"agent": route["agent"], "task_type": route["task_type"]}
+
+    def record(self, query: str, agent_name: str, task_type: str) -> None:
+        """Remember the agent and task type that successfully served a query"""
+        key = self.shape(query)
+        with self._lock:
+            route = self._routes.get(key)
+            if route and route["agent"] == agent_name and route["task_type"] == task_type:
+                route["hits"] += 1
+            else:
+                self._routes[key] = {"agent": agent_name, "task_type": task_type, "hits": 1}
+            self._routes.move_to_end(key)
+            while len(self._routes) > self.max_size:
+                self._routes.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._routes)
@@ -1,4 +1,4 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator
 import logging
 
 from workflow.supervisor_graph import SupervisorGraph
@@ -34,7 +34,8 @@ class SupervisorAgent:
             result = await self.supervisor_graph.process_task(
                 query, 
                 context, 
-                allow_agent_creation=allow_agent_creation
+                allow_agent_creation=allow_agent_creation,
+                deadline=task_input.get("deadline")
             )
             
             logger.info(f"LangGraph workflow completed: {result.get('status')}")
@@ -49,6 +50,20 @@ class SupervisorAgent:
                 "was_agent_created": False
             }
     
+    async def stream(self, task_input: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Process a task through the LangGraph workflow, yielding progress and token events"""
+        query = task_input.get("task_input", "")
+        context = task_input.get("task_context", {})
+        allow_agent_creation = context.get("allow_agent_creation", self.allow_agent_creation)
+        
+        async for event in self.supervisor_graph.stream_task(
+            query,
+            context,
+            allow_agent_creation=allow_agent_creation,
+            deadline=task_input.get("deadline")
+        ):
+            yield event
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get supervisor statistics"""
         try:
@@ -1,39 +1,118 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langchain.llms.base import BaseLLM
 import logging
+import os
+
+from meta_agent.keyword_matcher import KeywordAutomaton
+from meta_agent.analysis_cache import AnalysisCache
 
 logger = logging.getLogger(__name__)
 
+# Keywords per task type (dict order breaks score ties)
+TASK_KEYWORDS = {
+    "mathematics": ['calculate', 'math', 'solve', '+', '-', '*', '/', 'compound', 'interest', 'formula', 'equation', 'percentage', 'rate'],
+    "personal_development": ['feel', 'reflect', 'journal', 'emotion', 'stress', 'overwhelmed', 'thoughts', 'feelings', 'clarity', 'myself'],
+    "academic": ['research', 'analyze', 'analysis', 'paper', 'study', 'impacts', 'consider', 'potential', 'future', 'trends'],
+    "planning": ['plan', 'create', 'meal', 'schedule', 'organize', 'budget', 'prepare', 'week', 'daily'],
+    "fun_facts": ['true or false', 't/f', 'true false', 'is it true', 'fact or fiction', 'fun fact', 'did you know', 'trivia', 'history', 'historical', 'science fact', 'geography', 'culture', 'nature fact', 'space', 'astronomy', 'art history', 'sports fact', 'yes or no', 'is it correct', 'is that right', 'can you tell me', 'do you know', 'what about', 'is there', 'does it', 'will it', 'has it', 'was it', 'were they', 'are they', 'general knowledge', 'interesting fact', 'is the', 'is china', 'is america', 'is africa', 'is europe', 'miles', 'kilometers', 'longer than', 'bigger than', 'taller than', 'wall of china', 'great wall', 'do elephants', 'do animals', 'do humans', 'can animals', 'can humans', 'will animals', 'have good memory', 'memory', 'elephant', 'animal fact', 'do they', 'can they', 'will they', 'animal', 'nature', 'wildlife']
+}
+
+# Map task types to capabilities
+CAPABILITY_MAP = {
+    "mathematics": ["calculation", "arithmetic", "algebra", "statistics"],
+    "personal_development": ["reflect", "write", "emotional_support"],
+    "academic": ["analyze", "summarize", "research"],
+    "planning": ["organize", "plan", "create"],
+    "fun_facts": ["true_false_questions", "yes_no_questions", "historical_facts", "general_knowledge", "trivia"],
+    "general": ["general"]
+}
+
+# Compiled once and shared: scores every task type in a single pass over the input
+KEYWORD_AUTOMATON = KeywordAutomaton(TASK_KEYWORDS)
+
+# Task context keys that are part of the analysis cache key
+ANALYSIS_CONTEXT_KEYS = ("blueprint_id",)
+
+# Punctuation the keyword lists score on, kept when normalizing cache keys
+SIGNIFICANT_CHARS = "".join(sorted({char for keywords in TASK_KEYWORDS.values() for keyword in keywords
+                                    for char in keyword if not char.isalnum() and not char.isspace()}))
+
 class TaskAnalyzer:
-    def __init__(self, llm: BaseLLM):
+    def __init__(self, llm: BaseLLM, classifier: Optional[Any] = None):
         self.llm = llm
+        # Optional trained classifier; the keyword heuristic is used without one
+        self.classifier = classifier if classifier is not None else self._load_classifier()
+        self.min_classifier_confidence = float(os.getenv("TASK_CLASSIFIER_MIN_CONFIDENCE") or 0.5)
+        self.cache = AnalysisCache(
+            max_size=int(os.getenv("TASK_ANALYSIS_CACHE_SIZE") or 1024),
+            ttl_seconds=float(os.getenv("TASK_ANALYSIS_CACHE_TTL") or 600),
+            context_keys=ANALYSIS_CONTEXT_KEYS,
+            significant_chars=SIGNIFICANT_CHARS
+        )
+    
+    @staticmethod
+    def _load_classifier() -> Optional[Any]:
+        """Load the trained task classifier when TASK_ANALYZER_BACKEND=classifier"""
+        if os.getenv("TASK_ANALYZER_BACKEND", "keywords") != "classifier":
+            return None
+        try:
+            from meta_agent.task_classifier import HashedTfidfClassifier
+            classifier = HashedTfidfClassifier.load(os.getenv("TASK_CLASSIFIER_PATH") or None)
+            logger.info(f"🧮 Task classifier loaded ({len(classifier.labels)} task types)")
+            return classifier
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load task classifier ({e}); using keyword analysis")
+            return None
     
     async def analyze_task(self, task_input: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Analyze a task to determine required capabilities"""
-        task_lower = task_input.lower()
+        result = self.analyze_batch([task_input], [context])[0]
+        
+        logger.info(f"📊 Task analysis: {result['task_type']} (confidence: {result['confidence']:.2f})")
+        logger.info(f"🔍 Keyword scores: {result['keyword_scores']}")
         
-        # More comprehensive keyword matching
-        math_keywords = ['calculate', 'math', 'solve', '+', '-', '*', '/', 'compound', 'interest', 'formula', 'equation', 'percentage', 'rate']
-        reflection_keywords = ['feel', 'reflect', 'journal', 'emotion', 'stress', 'overwhelmed', 'thoughts', 'feelings', 'clarity', 'myself']
-        research_keywords = ['research', 'analyze', 'analysis', 'paper', 'study', 'impacts', 'consider', 'potential', 'future', 'trends']
-        planning_keywords = ['plan', 'create', 'meal', 'schedule', 'organize', 'budget', 'prepare', 'week', 'daily']
-        fun_fact_keywords = ['true or false', 't/f', 'true false', 'is it true', 'fact or fiction', 'fun fact', 'did you know', 'trivia', 'history', 'historical', 'science fact', 'geography', 'culture', 'nature fact', 'space', 'astronomy', 'art history', 'sports fact', 'yes or no', 'is it correct', 'is that right', 'can you tell me', 'do you know', 'what about', 'is there', 'does it', 'will it', 'has it', 'was it', 'were they', 'are they', 'general knowledge', 'interesting fact', 'is the', 'is china', 'is america', 'is africa', 'is europe', 'miles', 'kilometers', 'longer than', 'bigger than', 'taller than', 'wall of china', 'great wall', 'do elephants', 'do animals', 'do humans', 'can animals', 'can humans', 'will animals', 'have good memory', 'memory', 'elephant', 'animal fact', 'do they', 'can they', 'will they', 'animal', 'nature', 'wildlife']
+        return result
+    
+    def analyze_batch(self, task_inputs: List[str], contexts: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Analyze several tasks at once, serving repeats from the cache and classifying the rest in one call"""
+        contexts = contexts or [None] * len(task_inputs)
+        keys = [self.cache.make_key(task_input, context) for task_input, context in zip(task_inputs, contexts)]
+        results = [self.cache.get(key) for key in keys]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            logger.debug(f"🗃️ Analysis cache: {len(task_inputs) - len(misses)} hits, {len(misses)} misses")
+            # Analyze the normalized text the key is built from, so every spelling sharing a key
+            # gets the same analysis whichever of them arrived first
+            normalized = [self.cache.normalize(task_inputs[i]) for i in misses]
+            for i, result in zip(misses, self._analyze(normalized)):
+                results[i] = result
+                self.cache.set(keys[i], result)
+        return results
+    
+    def _analyze(self, task_inputs: List[str]) -> List[Dict[str, Any]]:
+        """Analyze tasks without the cache"""
+        results = [self._keyword_analysis(task_input) for task_input in task_inputs]
+        if self.classifier is None or not task_inputs:
+            return results
         
-        # Count keyword matches
-        math_score = sum(1 for word in math_keywords if word in task_lower)
-        reflection_score = sum(1 for word in reflection_keywords if word in task_lower)
-        research_score = sum(1 for word in research_keywords if word in task_lower)
-        planning_score = sum(1 for word in planning_keywords if word in task_lower)
-        fun_fact_score = sum(1 for word in fun_fact_keywords if word in task_lower)
+        for result, (task_type, probability) in zip(results, self.classifier.classify_batch(task_inputs)):
+            # Low-confidence predictions keep the keyword heuristic's answer
+            if probability < self.min_classifier_confidence:
+                continue
+            result.update({
+                "task_type": task_type,
+                "capabilities_required": CAPABILITY_MAP.get(task_type, ["general"]),
+                "confidence": probability,
+                "classifier": "tfidf"
+            })
+        return results
+    
+    def _keyword_analysis(self, task_input: str) -> Dict[str, Any]:
+        """Keyword heuristic analysis"""
+        task_lower = task_input.lower()
         
-        # Determine task type based on highest score
-        scores = {
-            "mathematics": math_score,
-            "personal_development": reflection_score,
-            "academic": research_score,
-            "planning": planning_score,
-            "fun_facts": fun_fact_score
-        }
+        # Count keyword matches for every task type at once
+        scores = KEYWORD_AUTOMATON.score(task_lower)
         
         task_type = max(scores, key=scores.get)
         max_score = scores[task_type]
@@ -42,26 +121,11 @@ class TaskAnalyzer:
         if max_score == 0:
             task_type = "general"
         
-        # Map task types to capabilities
-        capability_map = {
-            "mathematics": ["calculation", "arithmetic", "algebra", "statistics"],
-            "personal_development": ["reflect", "write", "emotional_support"],
-            "academic": ["analyze", "summarize", "research"],
-            "planning": ["organize", "plan", "create"],
-            "fun_facts": ["true_false_questions", "yes_no_questions", "historical_facts", "general_knowledge", "trivia"],
-            "general": ["general"]
-        }
-        
-        result = {
+        return {
             "task_type": task_type,
-            "capabilities_required": capability_map.get(task_type, ["general"]),
+            "capabilities_required": CAPABILITY_MAP.get(task_type, ["general"]),
             "complexity": "medium",
             "estimated_time": "45s",
             "confidence": max_score / max(1, len(task_input.split())),  # Confidence based on keyword density
             "keyword_scores": scores
         }
-        
-        logger.info(f"📊 Task analysis: {task_type} (confidence: {result['confidence']:.2f})")
-        logger.info(f"🔍 Keyword scores: {scores}")
-        
-        return result 
\ No newline at end of file
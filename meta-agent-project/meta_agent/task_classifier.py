@@ -0,0 +1,179 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import Counter
+from pathlib import Path
+import argparse
+import glob
+import json
+import logging
+import re
+import zlib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODEL_PATH = PROJECT_ROOT / "data" / "task_classifier.npz"
+DEFAULT_REPORTS_DIR = PROJECT_ROOT / "reports"
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+class HashedTfidfClassifier:
+    """Multinomial logistic regression over hashed TF-IDF features, in NumPy
+
+    Tokens (words, symbols such as '+', and word bigrams) are hashed into a fixed number of
+    feature columns, so there is no vocabulary to store. Feature rows are kept sparse as
+    (row, column, value) triples, which lets a whole batch be scored in one vectorized call.
+    """
+
+    def __init__(self, n_features: int = 2 ** 14):
+        self.n_features = n_features
+        self.labels: List[str] = []
+        self.idf = np.ones(n_features, dtype=np.float32)
+        self.weights = np.zeros((n_features, 0), dtype=np.float32)
+        self.bias = np.zeros(0, dtype=np.float32)
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Split text into lowercased unigrams plus word bigrams"""
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        return tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+    def _hash_counts(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Hash each text into sparse (row, column, count) triples"""
+        rows, columns, counts = [], [], []
+        for row, text in enumerate(texts):
+            hashed = Counter(zlib.crc32(token.encode("utf-8")) % self.n_features for token in self.tokenize(text))
+            rows.extend([row] * len(hashed))
+            columns.extend(hashed.keys())
+            counts.extend(hashed.values())
+        return (np.array(rows, dtype=np.int64),
+                np.array(columns, dtype=np.int64),
+                np.array(counts, dtype=np.float32))
+
+    def _features(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sparse L2-normalized TF-IDF rows (sublinear term frequency)"""
+        rows, columns, counts = self._hash_counts(texts)
+        values = (1.0 + np.log(counts)) * self.idf[columns]
+        norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(texts)))
+        values = values / np.maximum(norms[rows], 1e-12)
+        return rows, columns, values.astype(np.float32)
+
+    def _logits(self, rows: np.ndarray, columns: np.ndarray, values: np.ndarray, count: int) -> np.ndarray:
+        logits = np.tile(self.bias, (count, 1))
+        np.add.at(logits, rows, values[:, None] * self.weights[columns])
+        return logits
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return shifted / shifted.sum(axis=1, keepdims=True)
+
+    def fit(self, texts: List[str], labels: List[str], epochs: int = 300,
+            learning_rate: float = 2.0, l2: float = 1e-4) -> "HashedTfidfClassifier":
+        """Train on labelled texts with full-batch gradient descent"""
+        if len(set(labels)) < 2:
+            raise ValueError("Training the task classifier needs examples of at least two task types")
+
+        self.labels = sorted(set(labels))
+        label_ids = np.array([self.labels.index(label) for label in labels])
+        count = len(texts)
+
+        # Smoothed IDF over the hashed columns
+        rows, columns, _ = self._hash_counts(texts)
+        document_frequency = np.bincount(columns, minlength=self.n_features)
+        self.idf = (np.log((1 + count) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        rows, columns, values = self._features(texts)
+        targets = np.zeros((count, len(self.labels)), dtype=np.float32)
+        targets[np.arange(count), label_ids] = 1
+        self.weights = np.zeros((self.n_features, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+
+        for _ in range(epochs):
+            errors = (self._softmax(self._logits(rows, columns, values, count)) - targets) / count
+            gradient = l2 * self.weights
+            np.add.at(gradient, columns, values[:, None] * errors[rows])
+            self.weights -= learning_rate * gradient
+            self.bias -= learning_rate * errors.sum(axis=0)
+
+        accuracy = float((self.predict_proba(texts).argmax(axis=1) == label_ids).mean())
+        logger.info(f"🧮 Trained task classifier on {count} examples, {len(self.labels)} task types (train accuracy {accuracy:.2f})")
+        return self
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Get a (texts x task types) probability matrix for a batch of texts"""
+        if not texts:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        rows, columns, values = self._features(texts)
+        return self._softmax(self._logits(rows, columns, values, len(texts)))
+
+    def classify_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """Get the most likely (task type, probability) for each text"""
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        return [(self.labels[label_id], float(probabilities[row, label_id])) for row, label_id in enumerate(best)]
+
+    def save(self, path: Optional[str] = None) -> str:
+        """Save the trained model as a .npz file"""
+        path = Path(path or DEFAULT_MODEL_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, labels=np.array(self.labels), idf=self.idf,
+                                weights=self.weights, bias=self.bias)
+        logger.info(f"💾 Task classifier saved: {path}")
+        return str(path)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "HashedTfidfClassifier":
+        """Load a model saved with save()"""
+        with np.load(path or DEFAULT_MODEL_PATH) as data:
+            classifier = cls(n_features=int(data["idf"].shape[0]))
+            classifier.labels = [str(label) for label in data["labels"]]
+            classifier.idf = data["idf"]
+            classifier.weights = data["weights"]
+            classifier.bias = data["bias"]
+        return classifier
+
+def load_training_examples(reports_dir: Optional[str] = None, use_mongo: bool = False) -> Tuple[List[str], List[str]]:
+    """Collect (query, task type) pairs from exported conversation logs and MongoDB history
+
+    Only runs that succeeded on the first routing (no retries) are kept, so the model learns
+    the routes that worked rather than the ones that needed a retry or a new agent.
+    """
+    entries: List[Dict[str, Any]] = []
+    for filename in sorted(glob.glob(str(Path(reports_dir or DEFAULT_REPORTS_DIR) / "conversation_log_*.json"))):
+        with open(filename, encoding="utf-8") as f:
+            entries.extend(json.load(f))
+
+    if use_mongo:
+        try:
+            from mongodb.connector import MongoDBConnector
+            entries.extend(record.get("result", {}) for record in MongoDBConnector().results.find())
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load task history from MongoDB: {e}")
+
+    texts, labels = [], []
+    for entry in entries:
+        query = entry.get("query") or entry.get("task_input")
+        if query and entry.get("task_type") and entry.get("status") == "success" and not entry.get("retry_count"):
+            texts.append(query)
+            labels.append(entry["task_type"])
+    return texts, labels
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the task classifier from conversation history")
+    parser.add_argument("--reports-dir", default=str(DEFAULT_REPORTS_DIR))
+    parser.add_argument("--output", default=str(DEFAULT_MODEL_PATH))
+    parser.add_argument("--mongo", action="store_true", help="Also train on MongoDB result history")
+    parser.add_argument("--features", type=int, default=2 ** 14)
+    parser.add_argument("--epochs", type=int, default=300)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    texts, labels = load_training_examples(args.reports_dir, use_mongo=args.mongo)
+    logger.info(f"📚 Loaded {len(texts)} training examples: {dict(Counter(labels))}")
+    classifier = HashedTfidfClassifier(n_features=args.features).fit(texts, labels, epochs=args.epochs)
+    classifier.save(args.output)
+
+if __name__ == "__main__":
+    main()
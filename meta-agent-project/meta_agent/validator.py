@@ -1,108 +1,82 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set
 from langchain.llms.base import BaseLLM
+from langchain.callbacks.base import AsyncCallbackHandler
 import logging
 
+from config.llm_streaming import GenerationAborted
+from meta_agent.keyword_matcher import KeywordAutomaton
+
 logger = logging.getLogger(__name__)
 
+# Indicator groups looked for in the task text
+TASK_INDICATORS = {
+    "math": ["calculate", "math", "+", "-", "*", "/", "="],
+    "reflection": ["feel", "reflect", "stress", "emotion", "journal"],
+    "explanation": ["explain", "how", "what", "why", "describe"],
+    "planning": ["plan", "schedule", "organize", "workout", "meal"]
+}
+
+# Indicator groups looked for in the (lowercased) response text
+RESPONSE_INDICATORS = {
+    "fallback": [
+        "i'm having trouble generating",
+        "having trouble generating a detailed response",
+        "understand your request about the topic",
+        "but i'm having trouble",
+        "can't generate a detailed response",
+        "trouble generating a response"
+    ],
+    "digits": list("0123456789"),
+    "math_details": ["=", "answer", "result", "calculation", "solve"],
+    "empathy": ["understand", "sounds", "difficult", "challenging", "feel", "emotions"],
+    "guidance": ["try", "consider", "might", "could", "suggest", "help", "?"],
+    "explanation": ["process", "works", "because", "therefore", "first", "then", "when"],
+    "planning_structure": ["step", "first", "then", "next", "schedule", "time", "daily", "weekly"],
+    "error": ["error", "failed", "couldn't", "unable", "sorry", "can't", "cannot"]
+}
+
+# STRICT validation rules, applied in order. Each rule applies to every task ("when": None) or only
+# to tasks matching a task indicator group, and fails when the response contains a "forbid" group,
+# lacks a "require" group, or is shorter than "min_chars" / "min_words".
+VALIDATION_RULES: List[Dict[str, Any]] = [
+    # Generic fallback responses (MAJOR ISSUE) - immediate failure
+    {"when": None, "forbid": "fallback", "penalty": 1.0, "issue": "Generic fallback response - agent failed to process task"},
+    {"when": None, "min_chars": 20, "penalty": 0.8, "issue": "Response too short - needs more detail"},
+    {"when": "math", "require": "digits", "penalty": 0.9, "issue": "Math task requires numerical answer"},
+    {"when": "math", "require": "math_details", "penalty": 0.7, "issue": "Math response lacks calculation details"},
+    {"when": "reflection", "require": "empathy", "penalty": 0.8, "issue": "Reflection response lacks empathetic content"},
+    {"when": "reflection", "require": "guidance", "penalty": 0.6, "issue": "Reflection response lacks guidance"},
+    {"when": "explanation", "require": "explanation", "penalty": 0.8, "issue": "Explanation lacks educational content"},
+    {"when": "planning", "require": "planning_structure", "penalty": 0.8, "issue": "Planning response lacks structured approach"},
+    {"when": None, "forbid": "error", "penalty": 0.9, "issue": "Response indicates failure or inability"},
+    {"when": None, "min_words": 10, "penalty": 0.7, "issue": "Response lacks substantial content"}
+]
+
+# Compiled once: each text is matched against every indicator group in a single traversal
+TASK_AUTOMATON = KeywordAutomaton(TASK_INDICATORS)
+RESPONSE_AUTOMATON = KeywordAutomaton(RESPONSE_INDICATORS)
+
 class ResponseValidator:
     def __init__(self, llm: BaseLLM):
         self.llm = llm
     
-    async def validate_response(self, task_input: str, agent_output: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate if an agent's response is acceptable"""
-        if not agent_output or not agent_output.get("data"):
-            return {
-                "is_valid": False,
-                "confidence": 0.0,
-                "issues": ["No output provided"],
-                "suggestions": ["Retry with different approach"]
-            }
-        
-        response_text = agent_output.get("data", {}).get("response", "")
-        
-        # STRICT validation criteria
+    @staticmethod
+    def apply_rules(task_groups: Set[str], response_groups: Set[str], char_count: int, word_count: int) -> Dict[str, Any]:
+        """Apply VALIDATION_RULES to the matched indicator groups and response size"""
         issues = []
         confidence = 1.0
-        
-        # Check for generic fallback responses (MAJOR ISSUE)
-        fallback_indicators = [
-            "i'm having trouble generating",
-            "having trouble generating a detailed response",
-            "understand your request about the topic",
-            "but I'm having trouble",
-            "can't generate a detailed response",
-            "trouble generating a response"
-        ]
-        
-        response_lower = response_text.lower()
-        for indicator in fallback_indicators:
-            if indicator in response_lower:
-                issues.append("Generic fallback response - agent failed to process task")
-                confidence = 0.0  # Immediate failure
-                break
-        
-        # Check minimum length (increased)
-        if len(response_text.strip()) < 20:
-            issues.append("Response too short - needs more detail")
-            confidence -= 0.8
-        
-        # Check for actual task completion
-        task_lower = task_input.lower()
-        
-        # Math task validation
-        if any(word in task_lower for word in ["calculate", "math", "+", "-", "*", "/", "="]):
-            # Must contain numbers and/or mathematical operations
-            if not any(char.isdigit() for char in response_text):
-                issues.append("Math task requires numerical answer")
-                confidence -= 0.9
-            
-            # Look for actual calculation
-            math_indicators = ["=", "answer", "result", "calculation", "solve"]
-            if not any(indicator in response_lower for indicator in math_indicators):
-                issues.append("Math response lacks calculation details")
-                confidence -= 0.7
-        
-        # Reflection/journal task validation
-        if any(word in task_lower for word in ["feel", "reflect", "stress", "emotion", "journal"]):
-            empathy_words = ["understand", "sounds", "difficult", "challenging", "feel", "emotions"]
-            if not any(word in response_lower for word in empathy_words):
-                issues.append("Reflection response lacks empathetic content")
-                confidence -= 0.8
-            
-            # Should have some advice or questions
-            advice_indicators = ["try", "consider", "might", "could", "suggest", "help", "?"]
-            if not any(indicator in response_lower for indicator in advice_indicators):
-                issues.append("Reflection response lacks guidance")
-                confidence -= 0.6
-        
-        # Explanation task validation
-        if any(word in task_lower for word in ["explain", "how", "what", "why", "describe"]):
-            explanation_words = ["process", "works", "because", "therefore", "first", "then", "when"]
-            if not any(word in response_lower for word in explanation_words):
-                issues.append("Explanation lacks educational content")
-                confidence -= 0.8
-        
-        # Planning task validation
-        if any(word in task_lower for word in ["plan", "schedule", "organize", "workout", "meal"]):
-            planning_words = ["step", "first", "then", "next", "schedule", "time", "daily", "weekly"]
-            if not any(word in response_lower for word in planning_words):
-                issues.append("Planning response lacks structured approach")
-                confidence -= 0.8
-        
-        # Check for error indicators
-        error_indicators = ["error", "failed", "couldn't", "unable", "sorry", "can't", "cannot"]
-        if any(indicator in response_lower for indicator in error_indicators):
-            issues.append("Response indicates failure or inability")
-            confidence -= 0.9
-        
-        # Check for substantive content
-        word_count = len(response_text.split())
-        if word_count < 10:
-            issues.append("Response lacks substantial content")
-            confidence -= 0.7
-        elif word_count < 5:
-            issues.append("Response is extremely brief")
-            confidence -= 0.9
+        for rule in VALIDATION_RULES:
+            if rule["when"] is not None and rule["when"] not in task_groups:
+                continue
+            failed = (
+                ("forbid" in rule and rule["forbid"] in response_groups) or
+                ("require" in rule and rule["require"] not in response_groups) or
+                ("min_chars" in rule and char_count < rule["min_chars"]) or
+                ("min_words" in rule and word_count < rule["min_words"])
+            )
+            if failed:
+                issues.append(rule["issue"])
+                confidence -= rule["penalty"]
         
         # Final confidence adjustment
         confidence = max(0.0, min(1.0, confidence))
@@ -110,15 +84,71 @@ class ResponseValidator:
         # STRICT acceptance criteria - no tolerance for garbage
         is_valid = confidence >= 0.7 and len(issues) == 0
         
-        result = {
+        return {
             "is_valid": is_valid,
             "confidence": confidence,
             "issues": issues,
-            "suggestions": ["Provide actual task completion", "Include relevant details", "Avoid generic responses"] if not is_valid else []
+            "suggestions": ["Provide actual task completion", "Include relevant details", "Avoid generic responses"] if not is_valid else [],
+            "indicators": sorted(response_groups)
         }
+    
+    def quick_check(self, response_text: str) -> Dict[str, Any]:
+        """Cheap task-independent validation (length and forbidden indicators only)"""
+        response_groups = RESPONSE_AUTOMATON.match_groups(response_text.lower())
+        return self.apply_rules(set(), response_groups, len(response_text.strip()), len(response_text.split()))
+    
+    async def validate_response(self, task_input: str, agent_output: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate if an agent's response is acceptable"""
+        if not agent_output or not agent_output.get("data"):
+            return {
+                "is_valid": False,
+                "confidence": 0.0,
+                "issues": ["No output provided"],
+                "suggestions": ["Retry with different approach"]
+            }
+        
+        response_text = agent_output.get("data", {}).get("response", "")
+        
+        result = self.apply_rules(
+            TASK_AUTOMATON.match_groups(task_input.lower()),
+            RESPONSE_AUTOMATON.match_groups(response_text.lower()),
+            len(response_text.strip()),
+            len(response_text.split())
+        )
         
-        logger.info(f"🔍 Validation result: valid={is_valid}, confidence={confidence:.2f}")
-        if issues:
-            logger.warning(f"⚠️ Quality issues found: {issues}")
+        logger.info(f"🔍 Validation result: valid={result['is_valid']}, confidence={result['confidence']:.2f}")
+        if result["issues"]:
+            logger.warning(f"⚠️ Quality issues found: {result['issues']}")
         
-        return result 
\ No newline at end of file
+        return result
+
+class StreamingValidator(AsyncCallbackHandler):
+    """Checks tokens as they stream from the LLM and aborts the generation on a fatal indicator
+
+    Any issue rejects a response, so once a forbidden indicator group (e.g. a generic fallback)
+    appears the attempt is doomed and the rest of the generation is skipped. Only the new token
+    plus a short tail of earlier text is scanned, so indicators split across tokens are caught.
+    """
+    
+    # Let GenerationAborted propagate out of the callback and stop the LLM call
+    raise_error = True
+    
+    def __init__(self, task_input: str):
+        task_groups = TASK_AUTOMATON.match_groups(task_input.lower())
+        self.rules = [rule for rule in VALIDATION_RULES
+                      if "forbid" in rule and (rule["when"] is None or rule["when"] in task_groups)]
+        self.fatal_groups = {rule["forbid"] for rule in self.rules}
+        self.overlap = max(len(keyword) for keyword in RESPONSE_AUTOMATON.keywords) - 1
+        self.tail = ""
+        self.tokens = 0
+        self.aborted_issue: Optional[str] = None
+    
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.tokens += 1
+        window = self.tail + token.lower()
+        self.tail = window[-self.overlap:]
+        matched = RESPONSE_AUTOMATON.match_groups(window) & self.fatal_groups
+        if matched:
+            self.aborted_issue = next(rule["issue"] for rule in self.rules if rule["forbid"] in matched)
+            logger.warning(f"🛑 Aborting generation after {self.tokens} tokens: {self.aborted_issue}")
+            raise GenerationAborted(self.aborted_issue)
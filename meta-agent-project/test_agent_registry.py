@@ -0,0 +1,158 @@
+import sys
+import os
+import json
+import logging
+import threading
+from typing import List
+from unittest import mock
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from meta_agent.registry import AgentRegistry, DEFAULT_BLUEPRINTS_PATH
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+class StubAgent:
+    def __init__(self, name: str, capabilities: List[str]):
+        self.name = name
+        self.capabilities = capabilities
+        self.description = f"{name} agent"
+
+class FakeClock:
+    """Stands in for time.monotonic so idle timeouts can be crossed instantly"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def build_registry(clock: FakeClock) -> AgentRegistry:
+    registry = AgentRegistry(max_agents=10, idle_timeout=1800)
+    registry.register_agent(StubAgent("math_agent", ["mathematics"]), pinned=True)
+    registry.register_agent(StubAgent("dynamic_poetry", ["poetry"]))
+    registry.register_agent(StubAgent("dynamic_cooking", ["cooking"]))
+    return registry
+
+def test_delegation_evicts_agents_that_went_idle():
+    """Idle dynamic agents are evicted on the next delegation, even if no new agent is registered"""
+    clock = FakeClock()
+    with mock.patch("meta_agent.registry.time.monotonic", clock):
+        registry = build_registry(clock)
+
+        clock.now = 1000
+        registry.record_use("dynamic_cooking")
+        assert registry.idle_evictions == 0
+
+        clock.now = 1801
+        registry.record_use("math_agent")
+        assert registry.idle_evictions == 1
+        assert registry.get_agent("dynamic_poetry") is None
+        assert registry.get_agent("dynamic_cooking") is not None
+        # Pinned agents are never evicted, however long they sit idle
+        clock.now = 10000
+        registry.record_use("dynamic_cooking")
+        assert registry.get_agent("math_agent") is not None
+        assert registry.get_agent("dynamic_cooking") is not None
+        assert registry.find_agents_by_capability("poetry") == []
+
+def test_idle_sweep_without_delegations():
+    """evict_agents alone (the server's periodic sweep) reclaims idle agents on a quiet registry"""
+    clock = FakeClock()
+    with mock.patch("meta_agent.registry.time.monotonic", clock):
+        registry = build_registry(clock)
+        version = registry.snapshot().version
+
+        clock.now = 1799
+        assert registry.evict_agents() == []
+        assert registry.snapshot().version == version
+
+        clock.now = 1800
+        assert sorted(registry.evict_agents()) == ["dynamic_cooking", "dynamic_poetry"]
+        assert registry.snapshot().version == version + 1
+        assert [agent.name for agent in registry.get_available_agents()] == ["math_agent"]
+
+def test_empty_blueprint_store_falls_back_to_file():
+    """A fresh (empty) MongoDB blueprint store loads the bundled data/blueprints.json instead"""
+    with open(DEFAULT_BLUEPRINTS_PATH, encoding="utf-8") as f:
+        bundled = json.load(f)
+
+    with mock.patch("mongodb.connector.MongoDBConnector") as connector:
+        connector.return_value.get_all_blueprints.return_value = {}
+        registry = AgentRegistry()
+        assert registry.load_blueprints(source="mongo") == len(bundled)
+        assert set(bundled) <= set(registry.blueprints)
+
+        connector.return_value.get_all_blueprints.return_value = {"stored_agent": {"_id": "x", "type": "dynamic"}}
+        registry = AgentRegistry()
+        assert registry.load_blueprints(source="mongo") == 1
+        assert registry.get_blueprint("stored_agent") == {"type": "dynamic", "name": "stored_agent"}
+
+def test_pinned_snapshot_is_unaffected_by_later_writes():
+    """A request reads the snapshot it started with, whatever is registered or removed meanwhile"""
+    registry = AgentRegistry(max_agents=10)
+    registry.register_agent(StubAgent("math_agent", ["mathematics"]), pinned=True)
+    registry.register_agent(StubAgent("dynamic_poetry", ["poetry"]))
+    pinned = registry.snapshot()
+
+    registry.register_agent(StubAgent("dynamic_cooking", ["cooking", "poetry"]))
+    assert registry.remove_agent("dynamic_poetry")
+
+    assert [agent.name for agent in pinned.find_agents_by_capability("poetry")] == ["dynamic_poetry"]
+    assert pinned.get_agent("dynamic_cooking") is None
+    assert len(pinned) == 2
+    current = registry.snapshot()
+    assert current.version > pinned.version
+    assert [agent.name for agent in current.find_agents_by_capability("poetry")] == ["dynamic_cooking"]
+    assert current.get_agent("dynamic_poetry") is None
+
+    # Snapshots are read-only
+    try:
+        pinned.agents["intruder"] = StubAgent("intruder", [])
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("expected a read-only snapshot")
+
+def test_concurrent_writers_publish_consistent_snapshots():
+    """Readers racing with writers always see an agent table and capability index that agree"""
+    registry = AgentRegistry(max_agents=1000, idle_timeout=3600)
+    stop = threading.Event()
+    errors = []
+
+    def write(worker: int):
+        for i in range(100):
+            registry.register_agent(StubAgent(f"dynamic_{worker}_{i}", [f"skill_{i % 5}"]))
+
+    def read():
+        while not stop.is_set():
+            snapshot = registry.snapshot()
+            for capability, names in snapshot.capability_index.items():
+                for name in names:
+                    if snapshot.get_agent(name) is None:
+                        errors.append((snapshot.version, capability, name))
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    writers = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    snapshot = registry.snapshot()
+    assert len(snapshot) == 400
+    assert snapshot.version == registry.publications
+    assert sum(len(snapshot.find_agents_by_capability(f"skill_{i}")) for i in range(5)) == 400
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
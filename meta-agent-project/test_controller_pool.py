@@ -0,0 +1,83 @@
+import sys
+import os
+import asyncio
+import logging
+from unittest import mock
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.llm_balancer import EndpointBalancer, LoadBalancedLLM
+from meta_agent.controller_pool import ControllerPool
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = "http://127.0.0.1:31434,http://127.0.0.1:31435"
+
+def find_balancer(llm) -> EndpointBalancer:
+    while not isinstance(llm, LoadBalancedLLM):
+        llm = llm.llm
+    return llm.balancer
+
+def test_evicted_controller_is_closed_without_touching_shared_endpoints():
+    """Evicting a controller releases its own resources; the endpoint balancer other controllers use keeps running"""
+    async def scenario():
+        with mock.patch.dict(os.environ, {"OLLAMA_ENDPOINTS": ENDPOINTS, "OLLAMA_HEALTH_CHECK_INTERVAL": "30"}):
+            pool = ControllerPool(max_size=1)
+            first = pool.get("tinyllama")
+            shared = find_balancer(first.llm)
+            shared.ensure_health_checks()
+
+            with mock.patch.object(type(first), "aclose", wraps=first.aclose, autospec=True) as aclose:
+                second = pool.get("phi")
+                await asyncio.sleep(0)
+                await asyncio.sleep(0)
+                assert aclose.call_count == 1
+                assert aclose.call_args.args[0] is first
+
+            assert pool.evictions == 1
+            assert pool.controllers() == [second]
+            assert find_balancer(second.llm) is shared
+            assert shared._health_task is not None and not shared._health_task.done()
+            await shared.aclose()
+
+    asyncio.run(scenario())
+
+def test_evicted_controller_stops_its_private_health_checks():
+    """A controller with a balancer of its own has that balancer's health-check loop stopped on eviction"""
+    async def scenario():
+        with mock.patch.dict(os.environ, {"OLLAMA_ENDPOINTS": ENDPOINTS}):
+            pool = ControllerPool(max_size=1)
+            first = pool.get("tinyllama")
+            balanced = first.llm
+            while not isinstance(balanced, LoadBalancedLLM):
+                balanced = balanced.llm
+            balanced.balancer = EndpointBalancer(ENDPOINTS.split(","), health_check_interval=30)
+            balanced.balancer.ensure_health_checks()
+            health_task = balanced.balancer._health_task
+
+            pool.get("phi")
+            await asyncio.gather(*pool._closing)
+            assert health_task.cancelled()
+            assert balanced.balancer._health_task is None
+
+    asyncio.run(scenario())
+
+def test_pinned_controller_is_never_evicted():
+    with mock.patch.dict(os.environ, {"OLLAMA_ENDPOINTS": ""}):
+        pool = ControllerPool(max_size=1)
+        default = pool.get("tinyllama")
+        pool.add(default, pinned=True)
+        pool.get("phi")
+        pool.get("llama2-7b")
+        assert pool.evictions == 1
+        assert default in pool.controllers()
+        assert len(pool.controllers()) == 2
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,118 @@
+import sys
+import os
+import asyncio
+import logging
+from typing import Any, Dict, List
+from unittest import mock
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.llm_balancer import EndpointBalancer
+from config.llm_streaming import request_callbacks, get_request_callbacks
+from workflow.supervisor_graph import SupervisorGraph
+from test_helpers import TokenRecorder
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+class StubAgent:
+    """Streams a fixed answer to the request callbacks, one word per token_delay"""
+
+    def __init__(self, name: str, answer: str, token_delay: float):
+        self.name = name
+        self.capabilities = ["mathematics"]
+        self.description = f"{name} agent"
+        self.answer = answer
+        self.token_delay = token_delay
+        self.tokens_sent = 0
+        self.cancelled = False
+
+    async def process(self, agent_input: Dict[str, Any]) -> Dict[str, Any]:
+        callbacks = get_request_callbacks() or []
+        try:
+            for word in self.answer.split(" "):
+                await asyncio.sleep(self.token_delay)
+                self.tokens_sent += 1
+                for handler in callbacks:
+                    await handler.on_llm_new_token(word + " ")
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        except Exception as e:
+            # Like BaseAgent, report failures (including validator aborts) as an error result
+            return {"status": "error", "error": str(e)}
+        return {"status": "success", "response": self.answer}
+
+def build_state(graph: SupervisorGraph, agents: List[StubAgent]):
+    state = graph._create_initial_state("Calculate 6 * 7", allow_agent_creation=False)
+    state["task_type"] = "math"
+    state["chosen_agent"] = agents[0]
+    state["available_agents"] = agents
+    return state
+
+def endpoints(count: int) -> EndpointBalancer:
+    return EndpointBalancer([f"http://127.0.0.1:{11434 + i}" for i in range(count)], health_check_interval=0)
+
+def test_fanout_streams_only_the_winner():
+    """The client receives the winning agent's text even when the top-ranked agent streamed first"""
+    async def scenario():
+        agents = [
+            # Top-ranked and fastest, but its answer is rejected (aborted mid-stream)
+            StubAgent("math_agent", "Sorry, an error stopped the calculation of 6 * 7 before it finished.", 0.005),
+            StubAgent("backup_math", "First multiply the numbers: 6 * 7 = 42. The answer is 42, because six "
+                                     "groups of seven make forty-two.", 0.01),
+            StubAgent("slow_math", "Multiplying 6 by 7 gives 42, so the answer is 42 since six sevens make "
+                                   "forty-two.", 0.5)
+        ]
+        graph = SupervisorGraph(None, allow_agent_creation=False, initial_agents=[])
+        graph.fanout = 3
+        graph.streaming_validation = True
+        state = build_state(graph, agents)
+
+        recorder = TokenRecorder()
+        token = request_callbacks.set([recorder])
+        try:
+            with mock.patch.object(graph, "_llm_balancer", return_value=endpoints(3)):
+                await graph.delegate_task(state)
+        finally:
+            request_callbacks.reset(token)
+
+        assert state["execution_success"] is True
+        assert state["chosen_agent"] is agents[1]
+        assert state["agent_output"]["response"] == agents[1].answer
+        assert "".join(recorder.tokens).strip() == agents[1].answer
+        # The rejected top-ranked attempt streamed tokens, but none of them reached the client
+        assert agents[0].tokens_sent > 0 and not agents[0].cancelled
+        assert agents[2].cancelled and agents[2].tokens_sent < len(agents[2].answer.split(" "))
+        assert (graph.fanouts, graph.fanout_wins, graph.fanout_alternate_wins, graph.fanout_cancelled) == (1, 1, 1, 1)
+        assert graph.early_aborts == 1
+        assert state["agent_attempts"] == {agent.name: 1 for agent in agents}
+
+    asyncio.run(scenario())
+
+def test_fanout_width_follows_idle_endpoints():
+    """Fan-out only spreads over idle endpoints; a single endpoint (no balancer) never fans out"""
+    agents = [StubAgent(f"agent_{i}", "unused", 0.0) for i in range(3)]
+    graph = SupervisorGraph(None, allow_agent_creation=False, initial_agents=[])
+    graph.fanout = 3
+    state = build_state(graph, agents)
+
+    assert graph._llm_balancer() is None
+    assert graph._fanout_candidates(state) == [agents[0]]
+
+    balancer = endpoints(3)
+    with mock.patch.object(graph, "_llm_balancer", return_value=balancer):
+        assert graph._fanout_candidates(state) == agents
+        balancer.acquire()
+        assert graph._fanout_candidates(state) == agents[:2]
+        balancer.acquire()
+        balancer.acquire()
+        assert graph._fanout_candidates(state) == [agents[0]]
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,81 @@
+import sys
+import os
+import asyncio
+import logging
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.disconnect import DisconnectCanceller, ClientDisconnected
+from workflow.supervisor_graph import SupervisorGraph
+from test_helpers import ScriptedLLM, chunks
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+LONG_ANSWER = "First multiply the numbers: 6 * 7 = 42. The answer is 42, because six groups of seven make forty-two. " * 4
+
+class StubRequest:
+    """Stands in for a Starlette request whose client disconnects after a given time"""
+
+    def __init__(self, disconnect_after: float):
+        self.disconnect_at = time.perf_counter() + disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        return time.perf_counter() >= self.disconnect_at
+
+def build_graph(llm: ScriptedLLM) -> SupervisorGraph:
+    graph = SupervisorGraph(llm, allow_agent_creation=False, initial_agents=["math_agent"])
+    graph.fast_path_enabled = False
+    graph.speculative_delegation = False
+    return graph
+
+def test_disconnect_cancels_the_running_workflow():
+    """A client going away mid-generation cancels the workflow and its pending LLM call"""
+    async def scenario():
+        llm = ScriptedLLM(responses=[LONG_ANSWER], token_delay=0.02)
+        graph = build_graph(llm)
+        canceller = DisconnectCanceller(poll_interval=0.05)
+        start = time.perf_counter()
+        try:
+            await canceller.run(StubRequest(disconnect_after=0.3), graph.process_task("Calculate 6 * 7", allow_agent_creation=False))
+        except ClientDisconnected:
+            pass
+        else:
+            raise AssertionError("expected ClientDisconnected")
+
+        assert time.perf_counter() - start < 0.6
+        # The generation stopped where it was cancelled instead of running to the end
+        tokens_at_cancel = llm.tokens_sent[0]
+        await asyncio.sleep(0.2)
+        assert llm.tokens_sent[0] == tokens_at_cancel < len(chunks(LONG_ANSWER))
+        stats = canceller.get_stats()
+        assert (stats["completed_runs"], stats["cancelled_runs"]) == (0, 1)
+
+    asyncio.run(scenario())
+
+def test_connected_client_gets_the_result():
+    async def scenario():
+        llm = ScriptedLLM(responses=[LONG_ANSWER], token_delay=0.001)
+        graph = build_graph(llm)
+        canceller = DisconnectCanceller(poll_interval=0.05)
+        result = await canceller.run(StubRequest(disconnect_after=60), graph.process_task("Calculate 6 * 7", allow_agent_creation=False))
+        assert result["status"] == "success"
+        assert llm.tokens_sent[0] == len(chunks(LONG_ANSWER))
+        stats = canceller.get_stats()
+        assert (stats["completed_runs"], stats["cancelled_runs"]) == (1, 0)
+        assert stats["avg_run_seconds"] > 0
+
+        # A later cancellation is credited with the run time it did not use
+        canceller.record_cancellation(0.0)
+        assert canceller.get_stats()["reclaimed_seconds"] == stats["avg_run_seconds"]
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
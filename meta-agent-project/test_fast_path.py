@@ -0,0 +1,48 @@
+import sys
+import os
+import asyncio
+import logging
+from unittest import mock
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from workflow.supervisor_graph import SupervisorGraph
+from test_helpers import ScriptedLLM
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+GOOD_MATH = "First multiply the numbers: 6 * 7 = 42. The answer is 42, because six groups of seven make forty-two."
+
+def test_fast_path_fallback_continues_without_reanalysis():
+    """A rejected fast path attempt resumes in the graph with the same analysis and agent"""
+    async def scenario():
+        llm = ScriptedLLM(responses=["42", GOOD_MATH])
+        graph = SupervisorGraph(llm, allow_agent_creation=False, initial_agents=["math_agent"])
+        graph.fast_path_enabled = True
+        graph.fast_path_min_confidence = 0.0
+
+        with mock.patch.object(graph.analyzer, "analyze_task", wraps=graph.analyzer.analyze_task) as analyze, \
+                mock.patch.object(graph, "_registry_view", wraps=graph._registry_view) as lookup:
+            response = await graph.process_task("Calculate 6 * 7", allow_agent_creation=False)
+
+        assert response["status"] == "success"
+        assert response["agent_used"] == "math_agent"
+        assert GOOD_MATH in str(response)
+        assert analyze.call_count == 1
+        assert lookup.call_count == 1
+        assert graph.analyzer.cache.hits == 0
+        assert graph.route_counts["fast_path_fallback"] == 1
+        # The rejected fast path attempt was the first try, so the graph's delegation is a retry
+        assert len(llm.prompts) == 2
+        assert "A previous answer to this request was rejected" in llm.prompts[1]
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,82 @@
+"""Stub LLMs and callback handlers shared by the test_*.py suites"""
+import asyncio
+from typing import Any, Dict, List
+
+from langchain.llms.base import BaseLLM
+from langchain.schema import LLMResult, Generation
+from langchain.callbacks.base import AsyncCallbackHandler
+
+from config.llm_streaming import GenerationAborted
+
+def chunks(text: str, size: int = 5) -> List[str]:
+    """Split text into fixed-size tokens, so indicators straddle token boundaries"""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+class StubLLM(BaseLLM):
+    """Streams a fixed token sequence per prompt, with a short pause before each token"""
+
+    tokens: List[str] = ["The ", "answer ", "is ", "42 "]
+    token_delay: float = 0.02
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _generate(self, prompts, stop=None, run_manager=None, **kwargs: Any) -> LLMResult:
+        raise NotImplementedError("stub is async only")
+
+    async def _agenerate(self, prompts, stop=None, run_manager=None, **kwargs: Any) -> LLMResult:
+        self.calls += 1
+        generations = []
+        for prompt in prompts:
+            text = ""
+            for token in self.tokens:
+                await asyncio.sleep(self.token_delay)
+                text += token
+                if run_manager:
+                    await run_manager.on_llm_new_token(token)
+            generations.append([Generation(text=text)])
+        return LLMResult(generations=generations)
+
+class ScriptedLLM(BaseLLM):
+    """Streams one scripted response per call, recording prompts, sampling kwargs and tokens sent"""
+
+    responses: List[str] = []
+    token_delay: float = 0.0
+    prompts: List[str] = []
+    call_kwargs: List[Dict[str, Any]] = []
+    tokens_sent: List[int] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, prompts, stop=None, run_manager=None, **kwargs: Any) -> LLMResult:
+        raise NotImplementedError("scripted LLM is async only")
+
+    async def _agenerate(self, prompts, stop=None, run_manager=None, **kwargs: Any) -> LLMResult:
+        text = self.responses.pop(0)
+        self.prompts.append(prompts[0])
+        self.call_kwargs.append(kwargs)
+        self.tokens_sent.append(0)
+        for token in chunks(text):
+            await asyncio.sleep(self.token_delay)
+            self.tokens_sent[-1] += 1
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+        return LLMResult(generations=[[Generation(text=text)]])
+
+class TokenRecorder(AsyncCallbackHandler):
+    """Records streamed tokens, optionally aborting on one of them"""
+
+    raise_error = True
+
+    def __init__(self, abort_on: str = None):
+        self.tokens: List[str] = []
+        self.abort_on = abort_on
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.tokens.append(token)
+        if self.abort_on and token.strip() == self.abort_on:
+            raise GenerationAborted(f"saw {self.abort_on}")
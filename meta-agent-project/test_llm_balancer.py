@@ -0,0 +1,336 @@
+import sys
+import os
+import asyncio
+import json
+import logging
+import time
+from typing import Any, List
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aiohttp import web
+
+from config.llm_config import LlamaConfig
+from config.llm_coalescer import CoalescingLLM, SingleFlight
+from config.llm_balancer import EndpointBalancer, LoadBalancedLLM, LatencyTracker, stop_health_checks
+from config.ollama_pool import OllamaConnectionPool
+from test_helpers import TokenRecorder
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+class StubOllama:
+    """Minimal stand-in for an Ollama server: /api/tags for health checks, /api/generate streams NDJSON"""
+
+    def __init__(self, name: str, token_delay: float = 0.01, first_token_delay: float = 0.0,
+                 tail_token_delay: float = None):
+        self.name = name
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.tail_token_delay = tail_token_delay  # delay before each token after the first (default token_delay)
+        self.healthy = True
+        self.fail = False            # answer /api/generate with a 500 before any token
+        self.drop_after = None       # close the connection after this many tokens
+        self.generations = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.runner = None
+        self.url = None
+
+    async def start(self) -> "StubOllama":
+        app = web.Application()
+        app.router.add_get("/api/tags", self.tags)
+        app.router.add_post("/api/generate", self.generate)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self) -> None:
+        await self.runner.cleanup()
+
+    def tokens(self) -> List[str]:
+        return [f"{self.name} ", "says ", "the ", "answer ", "is ", "42"]
+
+    async def tags(self, request: web.Request) -> web.Response:
+        if not self.healthy:
+            return web.Response(status=503)
+        return web.json_response({"models": []})
+
+    async def generate(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.generations += 1
+        if self.fail:
+            return web.Response(status=500, text="stub failure")
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await response.prepare(request)
+            await asyncio.sleep(self.first_token_delay)
+            for count, token in enumerate(self.tokens()):
+                if self.drop_after is not None and count >= self.drop_after:
+                    request.transport.close()
+                    return response
+                tail = count > 0 and self.tail_token_delay is not None
+                await asyncio.sleep(self.tail_token_delay if tail else self.token_delay)
+                await response.write((json.dumps({"model": body["model"], "response": token, "done": False}) + "\n").encode())
+            await response.write((json.dumps({"model": body["model"], "response": "", "done": True}) + "\n").encode())
+            await response.write_eof()
+            return response
+        finally:
+            self.in_flight -= 1
+
+def build_llm(stubs: List[StubOllama], pool: OllamaConnectionPool, max_failures: int = 1,
+              latency: LatencyTracker = None) -> LoadBalancedLLM:
+    urls = [stub.url for stub in stubs]
+    return LoadBalancedLLM(
+        backends=[LlamaConfig.get_ollama_llm("stub", base_url=url, connection_pool=pool) for url in urls],
+        balancer=EndpointBalancer(urls, max_failures=max_failures, eject_seconds=60, health_check_interval=0),
+        latency=latency
+    )
+
+async def start_stubs(*names: str, **kwargs: Any) -> List[StubOllama]:
+    return [await StubOllama(name, **kwargs).start() for name in names]
+
+async def stop_stubs(stubs: List[StubOllama], pool: OllamaConnectionPool) -> None:
+    await pool.aclose()
+    for stub in stubs:
+        await stub.stop()
+
+def test_least_outstanding_requests_selection():
+    """Reservations go to the endpoint with the fewest requests in flight"""
+    balancer = EndpointBalancer(["http://a", "http://b", "http://c"], health_check_interval=0)
+    first, second, third = balancer.acquire(), balancer.acquire(), balancer.acquire()
+    assert sorted([first, second, third]) == [0, 1, 2]
+
+    balancer.release(second, 0.1, True)
+    assert balancer.acquire() == second
+    assert balancer.idle_count() == 0
+
+def test_llms_for_the_same_endpoints_share_one_balancer():
+    """Controllers for different models route over the same endpoints with one view of their load"""
+    endpoints = ["http://127.0.0.1:21434", "http://127.0.0.1:21435/"]
+    llama = LlamaConfig.get_balanced_llm("llama", endpoints=endpoints)
+    mistral = LlamaConfig.get_balanced_llm("mistral", endpoints=endpoints)
+    assert llama.balancer is mistral.balancer
+    assert LlamaConfig.get_balanced_llm("llama", endpoints=endpoints[:1] + ["http://127.0.0.1:21436"]).balancer is not llama.balancer
+
+    # A request in flight for one model steers the other model's next request to the idle endpoint
+    busy = llama.balancer.acquire()
+    assert mistral.balancer.acquire() != busy
+
+def test_concurrent_generations_spread_across_endpoints():
+    async def scenario():
+        stubs = await start_stubs("a", "b", token_delay=0.05)
+        pool = OllamaConnectionPool()
+        try:
+            llm = build_llm(stubs, pool)
+            results = await asyncio.gather(*[llm.agenerate([f"prompt {i}"]) for i in range(4)])
+            assert all(result.generations[0][0].text.endswith("is 42") for result in results)
+            assert [stub.generations for stub in stubs] == [2, 2]
+            assert [stub.peak_in_flight for stub in stubs] == [2, 2]
+            assert all(endpoint["outstanding"] == 0 for endpoint in llm.balancer.endpoints)
+        finally:
+            await stop_stubs(stubs, pool)
+
+    asyncio.run(scenario())
+
+def test_failing_endpoint_is_ejected_and_readmitted_by_health_check():
+    async def scenario():
+        stubs = await start_stubs("a", "b")
+        pool = OllamaConnectionPool()
+        try:
+            llm = build_llm(stubs, pool)
+            stubs[0].fail = True
+            stubs[0].healthy = False
+            for i in range(3):
+                result = await llm.agenerate([f"prompt {i}"])
+                assert result.generations[0][0].text.startswith("b ")
+            # One failure ejects "a" (max_failures=1); afterwards it gets no traffic
+            assert stubs[0].generations == 1
+            assert llm.balancer.ejections == 1
+            assert llm.balancer.get_stats()["endpoints"][0]["healthy"] is False
+
+            stubs[0].fail = False
+            stubs[0].healthy = True
+            assert await llm.balancer.check_health() == {stubs[0].url: True, stubs[1].url: True}
+            assert llm.balancer.get_stats()["endpoints"][0]["healthy"] is True
+
+            results = await asyncio.gather(*[llm.agenerate([f"again {i}"]) for i in range(2)])
+            assert sorted(result.generations[0][0].text.split()[0] for result in results) == ["a", "b"]
+        finally:
+            await stop_stubs(stubs, pool)
+
+    asyncio.run(scenario())
+
+def test_failover_before_first_token():
+    """An endpoint failing before it streams anything is retried on another endpoint"""
+    async def scenario():
+        stubs = await start_stubs("a", "b")
+        pool = OllamaConnectionPool()
+        try:
+            llm = build_llm(stubs, pool, max_failures=3)
+            stubs[0].fail = True
+            recorder = TokenRecorder()
+            for i in range(2):
+                result = await llm.agenerate([f"prompt {i}"], callbacks=[recorder])
+                assert result.generations[0][0].text == "b says the answer is 42"
+            assert stubs[1].generations == 2
+            assert llm.balancer.ejections == 0
+            assert "".join(recorder.tokens) == "b says the answer is 42" * 2
+        finally:
+            await stop_stubs(stubs, pool)
+
+    asyncio.run(scenario())
+
+def test_no_failover_after_tokens_streamed():
+    """Once the caller has received tokens, a failure is reported instead of streaming a second answer"""
+    async def scenario():
+        stubs = await start_stubs("a", "b")
+        pool = OllamaConnectionPool()
+        try:
+            llm = build_llm(stubs, pool, max_failures=3)
+            stubs[0].drop_after = 2
+            stubs[1].drop_after = 2
+            recorder = TokenRecorder()
+            try:
+                await llm.agenerate(["prompt"], callbacks=[recorder])
+            except Exception:
+                pass
+            else:
+                raise AssertionError("expected the dropped stream to fail")
+            assert sum(stub.generations for stub in stubs) == 1
+            assert len(recorder.tokens) == 2
+
+            # Without a streaming caller nothing has been seen yet, so the request still fails over
+            stubs[1].drop_after = None
+            for i in range(2):
+                result = await llm.agenerate([f"silent {i}"])
+                assert result.generations[0][0].text.endswith("is 42")
+        finally:
+            await stop_stubs(stubs, pool)
+
+    asyncio.run(scenario())
+
+def test_hedge_that_finishes_first_owns_the_answer():
+    """A hedge beating a stalled primary is streamed and returned; the primary is cancelled"""
+    async def scenario():
+        stubs = await start_stubs("a", "b")
+        stubs[0].first_token_delay = 1.0
+        pool = OllamaConnectionPool()
+        try:
+            latency = LatencyTracker(initial_delay=0.1)
+            llm = build_llm(stubs, pool, latency=latency)
+            recorder = TokenRecorder()
+            start = time.perf_counter()
+            result = await llm.agenerate(["prompt"], callbacks=[recorder])
+            assert time.perf_counter() - start < stubs[0].first_token_delay
+            assert result.generations[0][0].text == "b says the answer is 42"
+            assert "".join(recorder.tokens) == result.generations[0][0].text
+            assert (llm.hedges, llm.hedges_won) == (1, 1)
+            # The cancelled primary counts as a lower-bound sample next to the winner's latency
+            assert len(latency.samples) == 2
+            assert all(endpoint["outstanding"] == 0 for endpoint in llm.balancer.endpoints)
+        finally:
+            await stop_stubs(stubs, pool)
+
+    asyncio.run(scenario())
+
+def test_slow_tail_is_hedged_through_the_serving_stack():
+    """A primary with a fast first token but a slow tail is hedged, even for a streaming caller
+
+    Goes through CoalescingLLM, which always streams to the balancer, so the caller's tokens
+    must come from the hedge that answered rather than from the primary that started first.
+    """
+    async def scenario():
+        stubs = await start_stubs("a", "b", token_delay=0.01)
+        stubs[0].tail_token_delay = 0.4
+        pool = OllamaConnectionPool()
+        try:
+            balanced = build_llm(stubs, pool, latency=LatencyTracker(initial_delay=0.1))
+            llm = CoalescingLLM(llm=balanced, single_flight=SingleFlight())
+            recorder = TokenRecorder()
+            start = time.perf_counter()
+            result = await llm.agenerate(["prompt"], callbacks=[recorder])
+            assert time.perf_counter() - start < 5 * stubs[0].tail_token_delay
+            assert result.generations[0][0].text == "b says the answer is 42"
+            assert "".join(recorder.tokens) == result.generations[0][0].text
+            assert (balanced.hedges, balanced.hedges_won) == (1, 1)
+            assert all(endpoint["outstanding"] == 0 for endpoint in balanced.balancer.endpoints)
+        finally:
+            await stop_stubs(stubs, pool)
+
+    asyncio.run(scenario())
+
+def test_fast_primary_is_not_hedged():
+    """A primary finishing within the hedge delay answers alone, and its tokens reach the caller"""
+    async def scenario():
+        stubs = await start_stubs("a", "b", token_delay=0.005)
+        pool = OllamaConnectionPool()
+        try:
+            llm = build_llm(stubs, pool, latency=LatencyTracker(initial_delay=0.5))
+            recorder = TokenRecorder()
+            result = await llm.agenerate(["prompt"], callbacks=[recorder])
+            assert result.generations[0][0].text == "a says the answer is 42"
+            assert "".join(recorder.tokens) == result.generations[0][0].text
+            assert llm.hedges == 0
+            assert stubs[1].generations == 0
+        finally:
+            await stop_stubs(stubs, pool)
+
+    asyncio.run(scenario())
+
+def test_unhedgeable_primary_streams_live():
+    """With no spare endpoint to hedge to, a slow primary streams its tokens as they arrive"""
+    async def scenario():
+        stubs = await start_stubs("a", token_delay=0.1)
+        pool = OllamaConnectionPool()
+        try:
+            latency = LatencyTracker(initial_delay=0.05)
+            llm = LoadBalancedLLM(
+                backends=[LlamaConfig.get_ollama_llm("stub", base_url=stubs[0].url, connection_pool=pool)],
+                balancer=EndpointBalancer([stubs[0].url], health_check_interval=0),
+                latency=latency
+            )
+            arrivals = []
+
+            class Timed(TokenRecorder):
+                async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+                    arrivals.append(time.perf_counter())
+                    await super().on_llm_new_token(token, **kwargs)
+
+            recorder = Timed()
+            result = await llm.agenerate(["prompt"], callbacks=[recorder])
+            assert "".join(recorder.tokens) == result.generations[0][0].text
+            assert llm.hedges == 0
+            # Tokens were delivered as generated, not all at once at the end
+            assert arrivals[-1] - arrivals[1] > 0.2
+        finally:
+            await stop_stubs(stubs, pool)
+
+    asyncio.run(scenario())
+
+def test_stop_health_checks_cancels_the_loop():
+    async def scenario():
+        balancer = EndpointBalancer(["http://127.0.0.1:9"], health_check_interval=30)
+        balancer.ensure_health_checks()
+        task = balancer._health_task
+        await asyncio.sleep(0)
+        await stop_health_checks()
+        assert task.cancelled()
+        assert balancer._health_task is None
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,133 @@
+import sys
+import os
+import asyncio
+import logging
+import tempfile
+from unittest import mock
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.llm_cache import CachedLLM, ResponseCache
+from config.llm_coalescer import CoalescingLLM, SingleFlight
+from config.llm_batcher import BatchingLLM, BatchScheduler
+from config.llm_streaming import GenerationAborted
+from test_helpers import StubLLM, TokenRecorder
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def test_repeated_prompt_is_served_from_the_cache():
+    """A repeated prompt skips the backend, and is still streamed to the caller as one token"""
+    async def scenario():
+        stub = StubLLM()
+        llm = CachedLLM(llm=stub, response_cache=ResponseCache())
+        first = await llm.agenerate(["prompt"])
+        recorder = TokenRecorder()
+        second = await llm.agenerate(["prompt"], callbacks=[recorder])
+        assert stub.calls == 1
+        assert first.generations[0][0].text == second.generations[0][0].text == "The answer is 42 "
+        assert recorder.tokens == ["The answer is 42 "]
+
+        # Different sampling settings are a different completion
+        await llm.agenerate(["prompt"], temperature=0.9)
+        assert stub.calls == 2
+        stats = llm.response_cache.get_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+
+        llm.invalidate("prompt")
+        await llm.agenerate(["prompt"])
+        assert stub.calls == 3
+
+    asyncio.run(scenario())
+
+def test_disk_tier_outlives_the_process_cache_and_expires():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        key = ResponseCache.make_key(model="stub", prompt="prompt")
+        ResponseCache(cache_dir=cache_dir).set(key, "cached text")
+
+        restarted = ResponseCache(cache_dir=cache_dir, ttl_seconds=60)
+        assert restarted.get(key) == "cached text"
+        assert restarted.disk_hits == 1
+
+        with mock.patch("config.llm_cache.time.time", return_value=10 ** 12):
+            assert ResponseCache(cache_dir=cache_dir, ttl_seconds=60).get(key) is None
+
+def test_coalesced_callers_each_get_the_token_stream():
+    """Every caller sharing a generation receives all of its tokens, including late joiners"""
+    async def scenario():
+        llm = CoalescingLLM(llm=StubLLM(), single_flight=SingleFlight())
+        first, late = TokenRecorder(), TokenRecorder()
+
+        async def join_late():
+            await asyncio.sleep(0.03)
+            return await llm.agenerate(["prompt"], callbacks=[late])
+
+        results = await asyncio.gather(llm.agenerate(["prompt"], callbacks=[first]), join_late())
+        assert llm.llm.calls == 1
+        assert llm.single_flight.coalesced == 1
+        assert [result.generations[0][0].text for result in results] == ["The answer is 42 "] * 2
+        assert first.tokens == late.tokens == StubLLM().tokens
+
+    asyncio.run(scenario())
+
+def test_coalesced_abort_only_stops_its_own_caller():
+    """One caller's validator aborting leaves the shared generation running for the others"""
+    async def scenario():
+        llm = CoalescingLLM(llm=StubLLM(), single_flight=SingleFlight())
+        aborting, other = TokenRecorder(abort_on="is"), TokenRecorder()
+
+        results = await asyncio.gather(
+            llm.agenerate(["prompt"], callbacks=[aborting]),
+            llm.agenerate(["prompt"], callbacks=[other]),
+            return_exceptions=True
+        )
+        assert isinstance(results[0], GenerationAborted)
+        assert results[1].generations[0][0].text == "The answer is 42 "
+        assert aborting.tokens == ["The ", "answer ", "is "]
+        assert other.tokens == StubLLM().tokens
+        assert llm.single_flight.abandoned == 0
+
+    asyncio.run(scenario())
+
+def test_coalesced_abort_cancels_unshared_generation():
+    """A lone caller aborting abandons the generation instead of letting it run on"""
+    async def scenario():
+        llm = CoalescingLLM(llm=StubLLM(), single_flight=SingleFlight())
+        try:
+            await llm.agenerate(["prompt"], callbacks=[TokenRecorder(abort_on="answer")])
+        except GenerationAborted:
+            pass
+        else:
+            raise AssertionError("expected GenerationAborted")
+        assert llm.single_flight.abandoned == 1
+
+    asyncio.run(scenario())
+
+def test_batch_streams_only_to_the_surviving_caller():
+    """A batch left with one item after cancellations streams to that item's own callbacks"""
+    async def scenario():
+        stub = StubLLM()
+        llm = BatchingLLM(llm=stub, scheduler=BatchScheduler(stub, batch_window_ms=50, max_batch_size=4))
+        cancelled, survivor = TokenRecorder(), TokenRecorder()
+
+        first = asyncio.ensure_future(llm.agenerate(["first"], callbacks=[cancelled]))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(llm.agenerate(["second"], callbacks=[survivor]))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        result = await second
+        assert result.generations[0][0].text == "The answer is 42 "
+        assert survivor.tokens == StubLLM().tokens
+        assert cancelled.tokens == []
+        assert llm.scheduler.batches == 1
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,88 @@
+import sys
+import os
+import asyncio
+import logging
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from workflow.supervisor_graph import SupervisorGraph
+from test_helpers import ScriptedLLM
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def build_graph(llm: ScriptedLLM) -> SupervisorGraph:
+    graph = SupervisorGraph(llm, allow_agent_creation=False, initial_agents=["math_agent"])
+    graph.fast_path_enabled = False
+    graph.speculative_delegation = False
+    return graph
+
+def test_slow_generation_is_cut_off_at_the_deadline():
+    """An agent still generating when the deadline arrives is abandoned and the request gives up"""
+    async def scenario():
+        llm = ScriptedLLM(responses=["The answer to 6 * 7 is 42. " * 20] * 3, token_delay=0.05)
+        graph = build_graph(llm)
+        start = time.perf_counter()
+        response = await graph.process_task("Calculate 6 * 7", allow_agent_creation=False, deadline=time.time() + 0.5)
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 1.0
+        assert response["status"] == "error"
+        assert "deadline" in response["response"].lower()
+        assert graph.deadline_give_ups == 1
+        assert len(llm.prompts) == 1
+
+    asyncio.run(scenario())
+
+def test_rejected_attempts_stop_when_no_retry_fits():
+    """Retries continue while another attempt fits the budget, then the request gives up instead of overrunning"""
+    async def scenario():
+        llm = ScriptedLLM(responses=["42"] * 20, token_delay=0.8)
+        graph = build_graph(llm)
+        start = time.perf_counter()
+        response = await graph.process_task("Calculate 6 * 7", allow_agent_creation=False, deadline=time.time() + 2.6)
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 2.6
+        assert response["status"] == "error"
+        assert "deadline" in response["response"].lower()
+        assert graph.deadline_give_ups == 1
+        # The first rejection leaves over a second, enough for one retry; the second does not
+        assert len(llm.prompts) == 2
+        assert response["agent_attempts"] == {"math_agent": 2}
+
+    asyncio.run(scenario())
+
+def test_unbounded_request_is_not_given_up():
+    async def scenario():
+        good = "First multiply the numbers: 6 * 7 = 42. The answer is 42, because six groups of seven make forty-two."
+        llm = ScriptedLLM(responses=["42", good])
+        graph = build_graph(llm)
+        response = await graph.process_task("Calculate 6 * 7", allow_agent_creation=False)
+        assert response["status"] == "success"
+        assert graph.deadline_give_ups == 0
+
+    asyncio.run(scenario())
+
+def test_api_rejects_non_positive_timeouts():
+    from fastapi.testclient import TestClient
+    import fastapi_server
+
+    client = TestClient(fastapi_server.app)
+    for timeout in (0, -5):
+        response = client.post("/agents/process", json={
+            "blueprint_id": "math_agent",
+            "input_data": {"query": "Calculate 6 * 7"},
+            "timeout_seconds": timeout
+        })
+        assert response.status_code == 422
+        assert "timeout_seconds" in response.text
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,71 @@
+import sys
+import os
+import asyncio
+import logging
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.llm_cache import CachedLLM, ResponseCache
+from workflow.supervisor_graph import SupervisorGraph
+from test_helpers import ScriptedLLM
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+GOOD_MATH = "First multiply the numbers: 6 * 7 = 42. The answer is 42, because six groups of seven make forty-two."
+
+def build_graph(backend: ScriptedLLM) -> SupervisorGraph:
+    llm = CachedLLM(llm=backend, response_cache=ResponseCache())
+    graph = SupervisorGraph(llm, allow_agent_creation=False, initial_agents=["math_agent"])
+    graph.fast_path_enabled = False
+    graph.speculative_delegation = False
+    graph.fanout = 1
+    return graph
+
+def test_retry_sends_feedback_and_varies_sampling():
+    async def scenario():
+        backend = ScriptedLLM(responses=["42", GOOD_MATH])
+        graph = build_graph(backend)
+        response = await graph.process_task("Calculate 6 * 7", allow_agent_creation=False)
+        assert response["status"] == "success"
+        assert len(backend.prompts) == 2
+        assert "A previous answer to this request was rejected" not in backend.prompts[0]
+        assert "A previous answer to this request was rejected" in backend.prompts[1]
+        assert backend.call_kwargs[0] == {}
+        assert backend.call_kwargs[1]["seed"] == 1
+        assert backend.call_kwargs[1]["temperature"] > 0.7
+        assert sum(graph.retries_by_issue.values()) >= 1
+        assert graph.retry_successes_by_issue == graph.retries_by_issue
+
+    asyncio.run(scenario())
+
+def test_rejected_answer_is_not_replayed_from_the_cache():
+    """Repeating a query whose first answer was rejected regenerates it instead of paying the retry again"""
+    async def scenario():
+        backend = ScriptedLLM(responses=["42", GOOD_MATH, GOOD_MATH])
+        graph = build_graph(backend)
+        first = await graph.process_task("Calculate 6 * 7", allow_agent_creation=False)
+        assert first["status"] == "success"
+        assert first["retry_count"] == 1
+        assert len(backend.prompts) == 2
+
+        second = await graph.process_task("Calculate 6 * 7", allow_agent_creation=False)
+        assert second["status"] == "success"
+        assert second["retry_count"] == 0
+        assert len(backend.prompts) == 3
+        assert backend.prompts[2] == backend.prompts[0]
+
+        # Now the accepted answer is cached: a third repeat costs nothing
+        third = await graph.process_task("Calculate 6 * 7", allow_agent_creation=False)
+        assert third["retry_count"] == 0
+        assert len(backend.prompts) == 3
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,69 @@
+import sys
+import os
+import asyncio
+import logging
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from workflow.supervisor_graph import SupervisorGraph
+from test_helpers import ScriptedLLM, chunks
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+GOOD_MATH = "First multiply the numbers: 6 * 7 = 42. The answer is 42, because six groups of seven make forty-two."
+FUN_FACT = "Did you know that octopuses have three hearts? Two pump blood to the gills and one to the body. " * 3
+
+def build_graph(llm: ScriptedLLM) -> SupervisorGraph:
+    graph = SupervisorGraph(llm, allow_agent_creation=False, initial_agents=["math_agent", "fun_fact_agent"])
+    graph.fast_path_enabled = False
+    graph.speculative_delegation = True
+    return graph
+
+def test_matching_speculation_is_kept():
+    """A query shaped like one math_agent served before starts on it early, and that generation is used"""
+    async def scenario():
+        llm = ScriptedLLM(responses=[GOOD_MATH, GOOD_MATH])
+        graph = build_graph(llm)
+        first = await graph.process_task("Calculate 6 * 7", allow_agent_creation=False)
+        assert first["agent_used"] == "math_agent"
+        assert graph.speculations == 0
+
+        second = await graph.process_task("Calculate 12 * 9", allow_agent_creation=False)
+        assert second["status"] == "success"
+        assert second["agent_used"] == "math_agent"
+        assert (graph.speculations, graph.speculations_kept, graph.speculations_cancelled) == (1, 1, 0)
+        assert graph.route_counts["speculative"] == 1
+        # The speculative generation was the delegation: no second LLM call for the request
+        assert len(llm.prompts) == 2
+        assert "12 * 9" in llm.prompts[1]
+
+    asyncio.run(scenario())
+
+def test_mispredicted_speculation_is_cancelled():
+    """A prediction the analysis disagrees with is cancelled mid-generation and the chosen agent runs instead"""
+    async def scenario():
+        llm = ScriptedLLM(responses=[FUN_FACT, GOOD_MATH], token_delay=0.02)
+        graph = build_graph(llm)
+        graph.routing_cache.record("Calculate 6 * 7", "fun_fact_agent", "creative")
+
+        response = await graph.process_task("Calculate 6 * 7", allow_agent_creation=False)
+        assert response["status"] == "success"
+        assert response["agent_used"] == "math_agent"
+        assert response["response"] == GOOD_MATH
+        assert (graph.speculations, graph.speculations_kept, graph.speculations_cancelled) == (1, 0, 1)
+        assert graph.route_counts["speculative"] == 0
+
+        # The speculative generation stopped when it was cancelled
+        await asyncio.sleep(0.1)
+        assert llm.tokens_sent[0] < len(chunks(FUN_FACT))
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,90 @@
+import sys
+import os
+import asyncio
+import json
+import logging
+from unittest import mock
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from workflow.supervisor_graph import SupervisorGraph
+from test_helpers import ScriptedLLM, chunks
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+GOOD_MATH = "First multiply the numbers: 6 * 7 = 42. The answer is 42, because six groups of seven make forty-two."
+
+def build_graph(llm: ScriptedLLM) -> SupervisorGraph:
+    graph = SupervisorGraph(llm, allow_agent_creation=False, initial_agents=["math_agent"])
+    graph.fast_path_enabled = False
+    graph.speculative_delegation = False
+    return graph
+
+def test_stream_task_yields_nodes_tokens_and_result():
+    async def scenario():
+        llm = ScriptedLLM(responses=[GOOD_MATH])
+        graph = build_graph(llm)
+        events = [event async for event in graph.stream_task("Calculate 6 * 7", allow_agent_creation=False)]
+
+        nodes = [event["data"]["node"] for event in events if event["event"] == "node"]
+        assert nodes == ["analyze_task", "check_registry", "delegate_task", "evaluate_output", "return_output"]
+        tokens = [event["data"]["token"] for event in events if event["event"] == "token"]
+        assert tokens == chunks(GOOD_MATH)
+        # Tokens arrive while the agent runs: after the registry check, before delegation completes
+        kinds = [event["data"].get("node", event["event"]) for event in events]
+        assert kinds.index("check_registry") < kinds.index("token") < kinds.index("delegate_task")
+        assert events[-1]["event"] == "result"
+        assert events[-1]["data"]["status"] == "success"
+        assert events[-1]["data"]["response"] == GOOD_MATH
+
+    asyncio.run(scenario())
+
+def test_closing_the_stream_cancels_the_run():
+    """A client that stops reading (disconnects) cancels the workflow and its generation"""
+    async def scenario():
+        llm = ScriptedLLM(responses=[GOOD_MATH * 4], token_delay=0.02)
+        graph = build_graph(llm)
+        stream = graph.stream_task("Calculate 6 * 7", allow_agent_creation=False)
+        async for event in stream:
+            if event["event"] == "token":
+                break
+        await stream.aclose()
+        await asyncio.sleep(0.1)
+        sent = llm.tokens_sent[0]
+        await asyncio.sleep(0.1)
+        assert llm.tokens_sent[0] == sent < len(chunks(GOOD_MATH * 4))
+
+    asyncio.run(scenario())
+
+def test_sse_endpoint_frames_events():
+    from fastapi.testclient import TestClient
+    import fastapi_server
+
+    class StubController:
+        async def stream_request(self, **kwargs):
+            yield {"event": "start", "data": {"query": kwargs["input_data"]["query"]}}
+            yield {"event": "token", "data": {"token": "42"}}
+            yield {"event": "result", "data": {"status": "success", "response": "42"}}
+
+    client = TestClient(fastapi_server.app)
+    completed = fastapi_server.disconnect_canceller.completed
+    with mock.patch.object(fastapi_server, "get_controller", return_value=StubController()):
+        response = client.post("/agents/process/stream", json={
+            "blueprint_id": "math_agent",
+            "input_data": {"query": "Calculate 6 * 7"}
+        })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = [frame for frame in response.text.split("\n\n") if frame]
+    assert [frame.split("\n")[0] for frame in frames] == ["event: start", "event: token", "event: result"]
+    assert json.loads(frames[-1].split("\n")[1][len("data: "):]) == {"status": "success", "response": "42"}
+    assert fastapi_server.disconnect_canceller.completed == completed + 1
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,115 @@
+import sys
+import os
+import asyncio
+import logging
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.llm_streaming import GenerationAborted
+from meta_agent.validator import ResponseValidator, StreamingValidator, VALIDATION_RULES
+from workflow.supervisor_graph import SupervisorGraph
+from test_helpers import ScriptedLLM, chunks
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+FALLBACK_ISSUE = next(rule["issue"] for rule in VALIDATION_RULES if rule.get("forbid") == "fallback")
+FORBID_ISSUES = {rule["issue"] for rule in VALIDATION_RULES if "forbid" in rule}
+
+GOOD_MATH = "First multiply the numbers: 6 * 7 = 42. The answer is 42, because six groups of seven make forty-two."
+DOOMED = ("I'm math_agent, and I understand your request about the topic, but I'm having trouble "
+          "generating a detailed response right now. " + "Padding that should never be generated. " * 20)
+
+async def stream(monitor: StreamingValidator, text: str) -> None:
+    for token in chunks(text):
+        await monitor.on_llm_new_token(token)
+
+def test_doomed_stream_is_aborted_early():
+    async def scenario():
+        monitor = StreamingValidator("Calculate 6 * 7")
+        try:
+            await stream(monitor, DOOMED)
+        except GenerationAborted as e:
+            assert str(e) == FALLBACK_ISSUE
+        else:
+            raise AssertionError("expected GenerationAborted")
+        assert monitor.aborted_issue == FALLBACK_ISSUE
+        assert monitor.tokens < len(chunks(DOOMED)) / 4
+
+    asyncio.run(scenario())
+
+def test_valid_stream_is_not_aborted():
+    async def scenario():
+        monitor = StreamingValidator("Calculate 6 * 7")
+        await stream(monitor, GOOD_MATH)
+        assert monitor.aborted_issue is None
+        assert monitor.tokens == len(chunks(GOOD_MATH))
+
+    asyncio.run(scenario())
+
+def test_streaming_verdict_matches_validate_response():
+    """A stream is aborted exactly when validate_response would report a forbidden indicator on the full text"""
+    cases = [
+        ("Calculate 6 * 7", GOOD_MATH),
+        ("Calculate 6 * 7", DOOMED),
+        ("Calculate 6 * 7", "Sorry, I cannot solve that calculation right now, the result is unknown."),
+        ("How do I feel less stressed?", "It sounds difficult. Consider a short walk, you might feel better after it."),
+        ("Explain how tides work", "Tides happen because the moon pulls on the oceans; first one side bulges, then the other."),
+        ("Explain how tides work", "This is an explanation that failed to load, so here is nothing useful at all."),
+        ("Plan my week", "Step one: schedule daily workouts, then plan meals for the next weekly shop."),
+    ]
+    validator = ResponseValidator(llm=None)
+
+    async def scenario():
+        for task, text in cases:
+            verdict = await validator.validate_response(task, {"data": {"response": text}})
+            forbidden = [issue for issue in verdict["issues"] if issue in FORBID_ISSUES]
+
+            monitor = StreamingValidator(task)
+            try:
+                await stream(monitor, text)
+            except GenerationAborted:
+                pass
+            assert (monitor.aborted_issue is not None) == bool(forbidden), (task, text, verdict)
+            if monitor.aborted_issue is not None:
+                assert monitor.aborted_issue == forbidden[0]
+                assert not verdict["is_valid"]
+
+    asyncio.run(scenario())
+
+def test_aborted_delegation_fails_and_feeds_the_retry():
+    """delegate_task turns an aborted stream into a failed attempt whose issue goes with the retry"""
+    async def scenario():
+        llm = ScriptedLLM(responses=[DOOMED, GOOD_MATH])
+        graph = SupervisorGraph(llm, allow_agent_creation=False, initial_agents=["math_agent"])
+        graph.streaming_validation = True
+        state = graph._create_initial_state("Calculate 6 * 7", allow_agent_creation=False)
+        await graph.analyze_task(state)
+        await graph.check_registry(state)
+        assert state["chosen_agent"].name == "math_agent"
+
+        await graph.delegate_task(state)
+        assert state["execution_success"] is False
+        assert state["evaluation_result"]["issues"] == [FALLBACK_ISSUE]
+        assert "Generation aborted" in state["agent_output"]["error"]
+        assert graph.early_aborts == 1
+        assert llm.tokens_sent[0] == graph.aborted_tokens < len(chunks(DOOMED)) / 4
+
+        # handle_failure counts the retry; the next attempt carries the abort reason
+        state["retry_count"] += 1
+        await graph.delegate_task(state)
+        assert state["retry_feedback"]["issues"] == [FALLBACK_ISSUE]
+        assert FALLBACK_ISSUE in llm.prompts[1]
+        assert state["execution_success"] is True
+        assert graph.early_aborts == 1
+        assert graph.retries_by_issue == {FALLBACK_ISSUE: 1}
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,51 @@
+import sys
+import os
+import logging
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from meta_agent.task_analyzer import TaskAnalyzer
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Spellings that normalize to the same analysis cache key
+EQUIVALENT_SPELLINGS = [
+    ("is it true, false?", "is it true false"),
+    ("Calculate 15 * 23 + 7!", "calculate 15 * 23 + 7"),
+    ("I feel   STRESSED... help me reflect", "i feel stressed help me reflect"),
+    ("Did you know: the Great Wall of China?", "did you know the great wall of china")
+]
+
+def analysis_of(result):
+    return {key: result[key] for key in ("task_type", "capabilities_required", "confidence", "keyword_scores")}
+
+def test_equivalent_spellings_share_one_analysis_in_either_order():
+    for first, second in EQUIVALENT_SPELLINGS:
+        fresh = TaskAnalyzer(llm=None)
+        assert fresh.cache.make_key(first) == fresh.cache.make_key(second)
+        expected = [analysis_of(fresh._analyze([fresh.cache.normalize(text)])[0]) for text in (first, second)]
+        assert expected[0] == expected[1]
+
+        for order in ((first, second), (second, first)):
+            analyzer = TaskAnalyzer(llm=None)
+            results = [analysis_of(analyzer.analyze_batch([text])[0]) for text in order]
+            assert results[0] == results[1] == expected[0], (order, results)
+            assert analyzer.cache.hits == 1
+
+def test_cached_analysis_matches_uncached():
+    """Disabling the cache must not change any analysis"""
+    cached = TaskAnalyzer(llm=None)
+    uncached = TaskAnalyzer(llm=None)
+    uncached.cache.max_size = 0
+    for pair in EQUIVALENT_SPELLINGS:
+        for text in pair:
+            assert analysis_of(cached.analyze_batch([text])[0]) == analysis_of(uncached.analyze_batch([text])[0])
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
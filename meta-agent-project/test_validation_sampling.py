@@ -0,0 +1,77 @@
+import sys
+import os
+import asyncio
+import logging
+from unittest import mock
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from meta_agent.reliability import ReliabilityTracker
+from workflow.supervisor_graph import SupervisorGraph
+from test_helpers import ScriptedLLM
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+GOOD_MATH = "First multiply the numbers: 6 * 7 = 42. The answer is 42, because six groups of seven make forty-two."
+
+def test_agent_earns_and_loses_sampled_validation():
+    tracker = ReliabilityTracker(min_samples=10, reliable_threshold=0.95, sample_rate=0.2)
+    for _ in range(9):
+        tracker.record("math_agent", "mathematics", True)
+    assert not tracker.is_trusted("math_agent", "mathematics")
+    tracker.record("math_agent", "mathematics", True)
+    assert tracker.is_trusted("math_agent", "mathematics")
+    assert not tracker.is_trusted("math_agent", "creative")
+
+    # Trusted pairs get full validation only when sampled
+    with mock.patch("meta_agent.reliability.random.random", return_value=0.5):
+        assert not tracker.needs_full_validation("math_agent", "mathematics")
+        assert tracker.needs_full_validation("math_agent", "creative")
+    with mock.patch("meta_agent.reliability.random.random", return_value=0.1):
+        assert tracker.needs_full_validation("math_agent", "mathematics")
+
+    # One failed full validation drops the pass rate below the threshold: back to strict mode
+    tracker.record("math_agent", "mathematics", False)
+    assert not tracker.is_trusted("math_agent", "mathematics")
+    assert tracker.get_stats()["agents"]["math_agent:mathematics"]["mode"] == "strict"
+
+    tracker.forget_agent("math_agent")
+    assert tracker.get_stats()["agents"] == {}
+
+def test_sample_rate_one_always_validates():
+    tracker = ReliabilityTracker(min_samples=1, sample_rate=1.0)
+    tracker.record("math_agent", "mathematics", True)
+    assert not tracker.is_trusted("math_agent", "mathematics")
+
+def test_trusted_agent_output_skips_full_validation():
+    """Once an agent is trusted, unsampled outputs are accepted on the quick check alone"""
+    async def scenario():
+        llm = ScriptedLLM(responses=[GOOD_MATH] * 12)
+        graph = SupervisorGraph(llm, allow_agent_creation=False, initial_agents=["math_agent"])
+        graph.fast_path_enabled = False
+        graph.speculative_delegation = False
+        reliability = graph.registry.reliability
+
+        with mock.patch("meta_agent.reliability.random.random", return_value=0.99), \
+                mock.patch.object(graph.validator, "validate_response", wraps=graph.validator.validate_response) as validate:
+            for i in range(12):
+                response = await graph.process_task(f"Calculate {i} * 7", allow_agent_creation=False)
+                assert response["status"] == "success"
+
+        # The first min_samples outputs are fully validated; after that the agent is trusted
+        assert validate.call_count == reliability.min_samples
+        stats = reliability.get_stats()
+        assert stats["full_validations"] == reliability.min_samples
+        assert stats["fast_accepts"] == 12 - reliability.min_samples
+        assert stats["fast_rejects"] == 0
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
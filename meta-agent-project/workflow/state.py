@@ -12,6 +12,7 @@ class AgentSystemState(TypedDict):
     task_type: str
     
     # Agent matching
+    registry_snapshot: Optional[Any]  # RegistrySnapshot pinned for this request
     available_agents: List[Any]
     chosen_agent: Optional[Any]
     agent_created: bool
@@ -33,6 +34,9 @@ class AgentSystemState(TypedDict):
     spawn_attempted: bool
     correction_attempted: bool
     allow_agent_creation: bool
+    deadline: Optional[float]  # Absolute time.time() by which the request must finish (None = unbounded)
+    retry_feedback: Optional[Dict[str, Any]]  # Issues/suggestions of the last rejection, sent with the next attempt
+    speculation: Optional[Dict[str, Any]]  # Generation started on the predicted agent before analysis finished
     
     # Final output
     final_response: Optional[Dict[str, Any]]
@@ -1,15 +1,22 @@
 from langgraph.graph import StateGraph, END
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 import logging
 import io
 import base64
 import asyncio
+import math
+import os
+import time
+from collections import deque
 
 from .state import AgentSystemState
 from meta_agent.task_analyzer import TaskAnalyzer
 from meta_agent.registry import AgentRegistry
-from meta_agent.validator import ResponseValidator
-from agents.agent_factory import AgentFactory, BaseAgent
+from meta_agent.validator import ResponseValidator, StreamingValidator
+from meta_agent.routing_cache import RoutingCache
+from agents.agent_factory import AgentFactory, BaseAgent, LazyAgent
+from config.llm_streaming import request_callbacks, get_request_callbacks, TokenQueueHandler, TokenBuffer
+from config.llm_cache import unwrap_llm
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +28,41 @@ class SupervisorGraph:
         self.validator = ResponseValidator(llm)
         self.factory = AgentFactory(llm)
         self.allow_agent_creation = allow_agent_creation
+        # Upper bound on one agent execution; slow generations inside it are hedged by the LLM load balancer
+        self.agent_timeout = float(os.getenv("AGENT_TIMEOUT_SECONDS", 30))
+        # Running average of one delegation, used to decide whether another attempt fits the deadline
+        self.avg_attempt_seconds: Optional[float] = None
+        self.deadline_give_ups = 0
+        # Validate tokens as they stream and stop generations that can no longer pass validation
+        self.streaming_validation = os.getenv("STREAMING_VALIDATION", "true").lower() == "true"
+        self.early_aborts = 0
+        self.aborted_tokens = 0
+        # Retries carry the rejection feedback and sample hotter, so they don't repeat the rejected answer
+        self.retry_temperature_step = float(os.getenv("RETRY_TEMPERATURE_STEP") or 0.2)
+        self.retries_by_issue: Dict[str, int] = {}
+        self.retry_successes_by_issue: Dict[str, int] = {}
+        # Fast path: confidently routed tasks call the agent directly and enter the graph only on failure
+        self.fast_path_enabled = os.getenv("FAST_PATH_ENABLED", "false").lower() == "true"
+        self.fast_path_min_confidence = float(os.getenv("FAST_PATH_MIN_CONFIDENCE") or 0.5)
+        self.route_latency = {route: deque(maxlen=200) for route in ("fast_path", "fast_path_fallback", "graph", "speculative")}
+        self.route_counts = {route: 0 for route in self.route_latency}
+        # Fan-out: delegate to up to this many top-ranked agents at once (capped by idle LLM endpoints)
+        self.fanout = int(os.getenv("DELEGATION_FANOUT") or 1)
+        self.fanouts = 0
+        self.fanout_wins = 0
+        self.fanout_alternate_wins = 0
+        self.fanout_cancelled = 0
+        # Speculative delegation: start the agent that served similar queries while the task is still analyzed
+        self.speculative_delegation = os.getenv("SPECULATIVE_DELEGATION", "false").lower() == "true"
+        self.routing_cache = RoutingCache(
+            self.analyzer.cache.normalize,
+            max_size=int(os.getenv("SPECULATION_CACHE_SIZE") or 1024),
+            min_hits=int(os.getenv("SPECULATION_MIN_HITS") or 1)
+        )
+        self.speculations = 0
+        self.speculations_kept = 0
+        self.speculations_cancelled = 0
+        self.speculation_lead_seconds = 0.0
         
         # Set default initial agents to only fun_fact_agent
         if initial_agents is None:
@@ -73,6 +115,7 @@ class SupervisorGraph:
                     ("check_registry", "spawn_agent"),
                     ("delegate_task", "evaluate_output"),
                     ("delegate_task", "handle_failure"),
+                    ("delegate_task", "return_output"),
                     ("evaluate_output", "return_output"),
                     ("evaluate_output", "handle_failure"),
                     ("handle_failure", "delegate_task"),
@@ -100,6 +143,7 @@ graph TD
     E --> G{Execution Success?}
     G -->|Yes| H[evaluate_output]
     G -->|No| I[handle_failure]
+    G -->|Trusted agent, fast check OK| END2
     
     H --> J{Output Acceptable?}
     J -->|Yes| END2[return_output - Success]
@@ -158,7 +202,7 @@ graph TD
         print("\n🔄 Decision Points:")
         decisions = [
             "• Agent Found? → Delegate vs Spawn",
-            "• Execution Success? → Evaluate vs Retry",
+            "• Execution Success? → Evaluate vs Retry (vs Accept for trusted agents)",
             "• Output Quality? → Return vs Improve",
             "• Retry Strategy? → Same Agent vs New Agent vs Give Up"
         ]
@@ -180,73 +224,65 @@ graph TD
             "max_retries_per_agent": 3,
             "max_agents_spawnable": 3,
             "recursion_limit": 25,
-            "available_agents": len(self.registry.get_available_agents()),
-            "agent_types": [agent.name for agent in self.registry.get_available_agents()]
-        }
-    
-    def _initialize_agents(self):
-        """Initialize registry with specified agents"""
-        # Available agent templates
-        agent_templates = {
-            "math_agent": {
-                "name": "math_agent",
-                "type": "math",
-                "capabilities": ["calculation", "arithmetic", "algebra", "statistics"],
-                "description": "Specialized agent for mathematical calculations and problem solving",
-                "config": {"temperature": 0.1}
-            },
-            "fun_fact_agent": {
-                "name": "fun_fact_agent",
-                "type": "fun_fact",
-                "capabilities": ["true_false_questions", "yes_no_questions", "historical_facts", "general_knowledge", "trivia"],
-                "description": "Specialized agent for answering true/false questions, yes/no questions, and sharing fun facts about history, science, and general knowledge",
-                "config": {"temperature": 0.3}
+            "agent_timeout_seconds": self.agent_timeout,
+            "avg_attempt_seconds": self.avg_attempt_seconds,
+            "deadline_give_ups": self.deadline_give_ups,
+            "routes": self._route_stats(),
+            "fanout": {
+                "max_width": self.fanout,
+                "fanouts": self.fanouts,
+                "wins": self.fanout_wins,
+                "alternate_agent_wins": self.fanout_alternate_wins,
+                "cancelled_attempts": self.fanout_cancelled
             },
-            "research_agent": {
-                "name": "research_agent",
-                "type": "research",
-                "capabilities": ["research", "analysis", "information_gathering", "web_search"],
-                "description": "Specialized agent for research and information gathering tasks",
-                "config": {"temperature": 0.2}
+            "speculation": {
+                "enabled": self.speculative_delegation,
+                "known_query_shapes": len(self.routing_cache),
+                "started": self.speculations,
+                "kept": self.speculations_kept,
+                "cancelled": self.speculations_cancelled,
+                "hit_rate": self.speculations_kept / self.speculations if self.speculations else 0.0,
+                "avg_lead_seconds": self.speculation_lead_seconds / self.speculations_kept if self.speculations_kept else None
             },
-            "writing_agent": {
-                "name": "writing_agent",
-                "type": "writing",
-                "capabilities": ["writing", "editing", "creative_writing", "documentation"],
-                "description": "Specialized agent for writing and editing tasks",
-                "config": {"temperature": 0.5}
+            "validation_sampling": self.registry.reliability.get_stats(),
+            "streaming_validation": {
+                "enabled": self.streaming_validation,
+                "early_aborts": self.early_aborts,
+                "tokens_before_abort": self.aborted_tokens
             },
-            "code_agent": {
-                "name": "code_agent",
-                "type": "code",
-                "capabilities": ["coding", "programming", "debugging", "code_review"],
-                "description": "Specialized agent for programming and code-related tasks",
-                "config": {"temperature": 0.1}
+            "retry_feedback": {
+                issue: {
+                    "retries": retries,
+                    "successes": self.retry_successes_by_issue.get(issue, 0),
+                    "success_rate": self.retry_successes_by_issue.get(issue, 0) / retries
+                }
+                for issue, retries in self.retries_by_issue.items()
             },
-            "planning_agent": {
-                "name": "planning_agent",
-                "type": "planning",
-                "capabilities": ["planning", "strategy", "project_management", "task_breakdown"],
-                "description": "Specialized agent for planning and strategy tasks",
-                "config": {"temperature": 0.3}
-            }
+            "agent_lifecycle": self.registry.get_lifecycle_stats(),
+            "agents_built": LazyAgent.built_count,
+            "analysis_cache": self.analyzer.cache.get_stats(),
+            "available_agents": len(self.registry.get_available_agents()),
+            "agent_types": [agent.name for agent in self.registry.get_available_agents()]
         }
+    
+    def _initialize_agents(self):
+        """Register the specified agents as lazy descriptors from the blueprint store"""
+        try:
+            self.registry.load_blueprints()
+        except Exception as e:
+            logger.error(f"❌ Failed to load agent blueprints: {e}")
         
-        # Initialize only the specified agents
+        # Agents are built on their first delegation, so startup cost does not grow with the blueprint count
         initialized_count = 0
         for agent_name in self.initial_agents:
-            if agent_name in agent_templates:
-                template = agent_templates[agent_name]
-                try:
-                    agent = self.factory.create_agent(template)
-                    self.registry.register_agent(agent)
-                    initialized_count += 1
-                    logger.info(f"✅ Initialized {agent_name}")
-                except Exception as e:
-                    logger.error(f"❌ Failed to initialize {agent_name}: {e}")
+            blueprint = self.registry.get_blueprint(agent_name)
+            if blueprint:
+                self.registry.register_agent(self.factory.create_lazy_agent(blueprint), pinned=True)
+                initialized_count += 1
+                logger.info(f"✅ Registered {agent_name}")
             else:
                 logger.warning(f"⚠️ Unknown agent template: {agent_name}")
-                logger.info(f"Available templates: {list(agent_templates.keys())}")
+                logger.info(f"Available templates: {list(self.registry.blueprints.keys())}")
         
         logger.info(f"Initialized {initialized_count}/{len(self.initial_agents)} requested agents")
     
@@ -291,6 +327,7 @@ graph TD
             self._delegation_result,
             {
                 "evaluate": "evaluate_output",
+                "accept": "return_output",
                 "retry": "handle_failure",
                 "error": "return_output"
             }
@@ -323,7 +360,11 @@ graph TD
     
     # Node implementations with enhanced logging and limits
     async def analyze_task(self, state: AgentSystemState) -> AgentSystemState:
-        """Analyze the incoming task"""
+        """Analyze the incoming task, unless the fast path already did"""
+        if state.get("task_analysis"):
+            logger.info("🧠 Task already analyzed - reusing the fast path analysis")
+            return state
+        
         try:
             logger.info("🧠 Analyzing task...")
             analysis = await self.analyzer.analyze_task(
@@ -345,32 +386,26 @@ graph TD
         return state
     
     async def check_registry(self, state: AgentSystemState) -> AgentSystemState:
-        """Check for available agents"""
+        """Check for available agents, keeping the fast path's choice when it falls back to the graph"""
+        if state.get("chosen_agent"):
+            logger.info(f"🎯 Keeping selected agent: {state['chosen_agent'].name}")
+            return state
+        
         try:
             logger.info("🔍 Checking agent registry...")
             
-            # Find agents with required capabilities
-            suitable_agents = []
-            for capability in state["capabilities_required"]:
-                agents = self.registry.find_agents_by_capability(capability)
-                suitable_agents.extend(agents)
-            
-            # Remove duplicates while preserving order
-            seen = set()
-            unique_agents = []
-            for agent in suitable_agents:
-                if agent.name not in seen:
-                    unique_agents.append(agent)
-                    seen.add(agent.name)
+            # Find agents with required capabilities, best capability overlap first
+            unique_agents = self._registry_view(state).find_agents_by_capabilities(state["capabilities_required"])
             
             state["available_agents"] = unique_agents
             
             if unique_agents:
-                # Choose the best agent (first match for now)
+                # Choose the best agent (highest capability overlap)
                 state["chosen_agent"] = unique_agents[0]
                 logger.info(f"🎯 Selected agent: {unique_agents[0].name}")
                 logger.info(f"🔧 Agent capabilities: {unique_agents[0].capabilities}")
                 logger.info(f"📝 Agent description: {unique_agents[0].description}")
+                self._resolve_speculation(state)
             else:
                 logger.info("❌ No suitable agents found")
                 state["chosen_agent"] = None
@@ -394,7 +429,11 @@ graph TD
     async def delegate_task(self, state: AgentSystemState) -> AgentSystemState:
         """Delegate task to chosen agent"""
         try:
-            if state["chosen_agent"]:
+            candidates = self._fanout_candidates(state)
+            if len(candidates) > 1:
+                self._cancel_speculation(state, "fan-out delegation")
+                await self._delegate_fanout(state, candidates)
+            elif state["chosen_agent"]:
                 # Increment delegation attempts for current agent
                 current_agent_name = state["chosen_agent"].name
                 agent_attempts = state.get("agent_attempts", {})
@@ -402,6 +441,7 @@ graph TD
                 state["agent_attempts"] = agent_attempts
                 
                 attempt_num = agent_attempts[current_agent_name]
+                self.registry.record_use(current_agent_name)
                 logger.info(f"📤 Delegating to {current_agent_name} (attempt {attempt_num}/3)...")
                 
                 # Prepare input for agent
@@ -411,21 +451,44 @@ graph TD
                     "task_type": state["task_type"],
                     "attempt": attempt_num
                 }
+                self._add_retry_feedback(state, agent_input)
+                speculation = self._claim_speculation(state, agent_input)
+                
+                # Execute agent with timeout protection, never running past the request deadline
+                timeout = self._attempt_timeout(state)
+                
+                # The agent task copies the context, so the validator must be registered before it starts
+                if speculation:
+                    monitor = speculation["monitor"]
+                    callbacks_token = None
+                else:
+                    monitor = StreamingValidator(state["task_input"]) if self.streaming_validation else None
+                    callbacks_token = request_callbacks.set((get_request_callbacks() or []) + [monitor]) if monitor else None
                 
-                # Execute agent with timeout protection
+                start = speculation["started"] if speculation else time.perf_counter()
                 try:
-                    # 30 second timeout to prevent hanging
+                    if timeout <= 0:
+                        if speculation:
+                            speculation["task"].cancel()
+                        raise asyncio.TimeoutError()
                     result = await asyncio.wait_for(
-                        state["chosen_agent"].process(agent_input),
-                        timeout=30.0
+                        speculation["task"] if speculation else state["chosen_agent"].process(agent_input),
+                        timeout=timeout
                     )
+                    if monitor and monitor.aborted_issue:
+                        result = self._aborted_result(state, current_agent_name, monitor)
+                    else:
+                        self._record_attempt(time.perf_counter() - start)
                 except asyncio.TimeoutError:
-                    logger.error(f"⏰ Agent {current_agent_name} timed out after 30 seconds")
+                    logger.error(f"⏰ Agent {current_agent_name} timed out after {timeout:.1f} seconds")
                     result = {
                         "status": "error",
-                        "error": "Agent execution timed out after 30 seconds",
+                        "error": f"Agent execution timed out after {timeout:.1f} seconds",
                         "response": "Task execution timed out. Please try a simpler request."
                     }
+                finally:
+                    if callbacks_token:
+                        request_callbacks.reset(callbacks_token)
                 
                 state["agent_output"] = result
                 state["execution_success"] = result.get("status") == "success"
@@ -440,6 +503,7 @@ graph TD
                     else:
                         response_preview = str(result)[:100]
                     logger.info(f"📄 Response preview: {response_preview}...")
+                    self._fast_accept(state, current_agent_name, result)
                 else:
                     logger.warning(f"⚠️ Agent execution failed: {result.get('error', 'Unknown error')}")
                 
@@ -455,6 +519,129 @@ graph TD
             
         return state
     
+    def _fanout_candidates(self, state: AgentSystemState) -> List[Any]:
+        """The chosen agent plus the next-ranked agents with attempts left, when fan-out is enabled"""
+        chosen = state.get("chosen_agent")
+        if self.fanout <= 1 or not chosen:
+            return [chosen] if chosen else []
+        
+        balancer = self._llm_balancer()
+        if balancer is None:
+            # With a single endpoint the candidates would all generate on the same backend,
+            # adding load instead of cutting latency
+            return [chosen]
+        width = min(self.fanout, max(1, balancer.idle_count()))
+        
+        agent_attempts = state.get("agent_attempts", {})
+        candidates = [chosen]
+        for agent in state.get("available_agents", []):
+            if len(candidates) >= width:
+                break
+            if agent.name != chosen.name and agent_attempts.get(agent.name, 0) < 3:
+                candidates.append(agent)
+        return candidates
+    
+    def _llm_balancer(self):
+        """Find the endpoint balancer in the LLM wrapper stack, if there is one"""
+        llm = self.llm
+        while llm is not None and not hasattr(llm, "balancer"):
+            llm = getattr(llm, "llm", None)
+        return llm.balancer if llm is not None else None
+    
+    async def _delegate_fanout(self, state: AgentSystemState, candidates: List[Any]) -> None:
+        """Run the task on several agents at once, validate results as they arrive and keep the first valid one"""
+        self.fanouts += 1
+        agent_attempts = state.get("agent_attempts", {})
+        template = {
+            "query": state["task_input"],
+            "context": state["task_context"],
+            "task_type": state["task_type"]
+        }
+        self._add_retry_feedback(state, template)
+        logger.info(f"🔀 Fanning out to {len(candidates)} agents: {[agent.name for agent in candidates]}")
+        
+        tasks = {}
+        client_callbacks = get_request_callbacks() or []
+        start = time.perf_counter()
+        for agent in candidates:
+            agent_attempts[agent.name] = agent_attempts.get(agent.name, 0) + 1
+            self.registry.record_use(agent.name)
+            agent_input = {**template, "attempt": agent_attempts[agent.name]}
+            
+            # Every attempt is validated as it streams; its tokens are held back until the winner is known,
+            # so a streaming client only ever receives the text of the answer that is returned
+            monitor = StreamingValidator(state["task_input"]) if self.streaming_validation else None
+            buffer = TokenBuffer() if client_callbacks else None
+            callbacks_token = request_callbacks.set([handler for handler in (buffer, monitor) if handler])
+            try:
+                tasks[asyncio.ensure_future(agent.process(agent_input))] = (agent, monitor, buffer)
+            finally:
+                request_callbacks.reset(callbacks_token)
+        state["agent_attempts"] = agent_attempts
+        
+        winner = None
+        rejected = None
+        pending = set(tasks)
+        timeout = self._attempt_timeout(state)
+        end = time.perf_counter() + timeout
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, end - time.perf_counter()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.error(f"⏰ Fan-out timed out after {timeout:.1f} seconds")
+                    break
+                for task in done:
+                    agent, monitor, buffer = tasks[task]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.warning(f"⚠️ Agent {agent.name} failed during fan-out: {e}")
+                        continue
+                    if monitor and monitor.aborted_issue:
+                        result = self._aborted_result(state, agent.name, monitor)
+                        rejected = rejected or (agent, result, state["evaluation_result"])
+                        continue
+                    if result.get("status") != "success":
+                        continue
+                    evaluation = await self.validator.validate_response(state["task_input"], {"data": result})
+                    self.registry.reliability.record(agent.name, state["task_type"], evaluation["is_valid"])
+                    if evaluation["is_valid"] and winner is None:
+                        winner = (agent, result, evaluation, buffer)
+                    elif not evaluation["is_valid"]:
+                        rejected = rejected or (agent, result, evaluation)
+        finally:
+            # Cancel the slower attempts and let them release their LLM endpoints
+            for task in pending:
+                task.cancel()
+            self.fanout_cancelled += len(pending)
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        if winner:
+            agent, result, evaluation, buffer = winner
+            if buffer:
+                await buffer.replay(client_callbacks)
+            self.fanout_wins += 1
+            if agent is not candidates[0]:
+                self.fanout_alternate_wins += 1
+            self._record_attempt(time.perf_counter() - start)
+            logger.info(f"🏆 {agent.name} produced the first valid answer")
+            state["chosen_agent"] = agent
+            state["agent_output"] = result
+            state["execution_success"] = True
+            state["evaluation_result"] = evaluation
+            state["output_acceptable"] = True
+            state["review_notes"] = f"Confidence: {evaluation['confidence']:.2f} | First valid of {len(candidates)} agents"
+            self._record_retry_success(state)
+        else:
+            # No valid answer: fail the delegation so handle_failure retries with the rejection's feedback
+            logger.warning(f"⚠️ None of the {len(candidates)} agents produced a valid answer")
+            state["execution_success"] = False
+            if rejected:
+                _, state["agent_output"], state["evaluation_result"] = rejected
+            else:
+                state["agent_output"] = {"status": "error", "error": "No agent produced a result in time"}
+    
     async def evaluate_output(self, state: AgentSystemState) -> AgentSystemState:
         """Evaluate the output quality"""
         try:
@@ -468,6 +655,10 @@ graph TD
                 
                 state["evaluation_result"] = evaluation
                 state["output_acceptable"] = evaluation["is_valid"]
+                if state.get("chosen_agent"):
+                    self.registry.reliability.record(state["chosen_agent"].name, state["task_type"], evaluation["is_valid"])
+                if evaluation["is_valid"]:
+                    self._record_retry_success(state)
                 state["review_notes"] = f"Confidence: {evaluation['confidence']:.2f}"
                 
                 if evaluation["issues"]:
@@ -498,6 +689,11 @@ graph TD
             state["retry_count"] = state.get("retry_count", 0) + 1
             current_agent = state.get("chosen_agent")
             
+            if not self._has_time_for_attempt(state):
+                self.deadline_give_ups += 1
+                logger.warning(f"⏰ Request deadline too close for another attempt ({self._remaining_budget(state):.1f}s left)")
+                state["error_message"] = "Request deadline exceeded before the task could be completed"
+            
             if current_agent:
                 agent_attempts = state.get("agent_attempts", {})
                 current_attempts = agent_attempts.get(current_agent.name, 0)
@@ -528,6 +724,18 @@ graph TD
                 state["error_message"] = f"Maximum agent creation limit ({max_agents}) reached"
                 return state
             
+            # Reuse a previously spawned agent with the same capabilities if one is still live
+            reusable_agent = self.registry.find_reusable_agent(
+                state["capabilities_required"],
+                exclude=list(state.get("agent_attempts", {}))
+            )
+            if reusable_agent:
+                state["registry_snapshot"] = self.registry.snapshot()
+                state["chosen_agent"] = reusable_agent
+                state["agents_created"] = agents_created + 1
+                logger.info(f"♻️ Reusing existing agent {reusable_agent.name} ({agents_created + 1}/{max_agents})")
+                return state
+            
             logger.info(f"🏭 Spawning new agent ({agents_created + 1}/{max_agents})...")
             
             # Create blueprint for new agent
@@ -549,6 +757,8 @@ graph TD
             # Create and register new agent
             new_agent = self.factory.create_agent(blueprint)
             self.registry.register_agent(new_agent)
+            # Publishing created a new registry version; this request continues on it
+            state["registry_snapshot"] = self.registry.snapshot()
             
             state["chosen_agent"] = new_agent
             state["agents_created"] = agents_created + 1
@@ -655,7 +865,8 @@ graph TD
         if state.get("error_message"):
             return "error"
         elif state.get("execution_success"):
-            return "evaluate"
+            # Outputs of trusted agents that passed the fast check skip full evaluation
+            return "accept" if state.get("output_acceptable") else "evaluate"
         else:
             return "retry"
     
@@ -683,8 +894,103 @@ graph TD
         # If can't create agents or reached limit, return what we have
         return "success"  # Give up and return what we have
     
+    def _add_retry_feedback(self, state: AgentSystemState, agent_input: Dict[str, Any]) -> None:
+        """After a rejection, send its issues with the next attempt and vary the sampling parameters"""
+        evaluation = state.get("evaluation_result")
+        retries = state.get("retry_count", 0)
+        if retries == 0 or not evaluation or evaluation.get("is_valid"):
+            state["retry_feedback"] = None
+            return
+        
+        feedback = {"issues": evaluation.get("issues", []), "suggestions": evaluation.get("suggestions", [])}
+        base_temperature = getattr(unwrap_llm(self.llm), "temperature", None)
+        if base_temperature is None:
+            base_temperature = 0.7
+        agent_input["feedback"] = feedback
+        agent_input["sampling"] = {
+            "temperature": round(min(1.0, base_temperature + self.retry_temperature_step * retries), 2),
+            "seed": retries
+        }
+        state["retry_feedback"] = feedback
+        for issue in feedback["issues"]:
+            self.retries_by_issue[issue] = self.retries_by_issue.get(issue, 0) + 1
+        logger.info(f"🔁 Retrying with feedback on {len(feedback['issues'])} issue(s) at temperature {agent_input['sampling']['temperature']:.2f}")
+    
+    def _record_retry_success(self, state: AgentSystemState) -> None:
+        """Credit the issues a retry was told about once its output is accepted"""
+        feedback = state.get("retry_feedback")
+        if feedback:
+            for issue in feedback["issues"]:
+                self.retry_successes_by_issue[issue] = self.retry_successes_by_issue.get(issue, 0) + 1
+    
+    def _fast_accept(self, state: AgentSystemState, agent_name: str, result: Dict[str, Any]) -> None:
+        """Accept a trusted agent's output on a cheap check unless it was sampled for full validation"""
+        reliability = self.registry.reliability
+        if reliability.needs_full_validation(agent_name, state["task_type"]):
+            return
+        passed = self.validator.quick_check(result.get("response", ""))["is_valid"]
+        reliability.record_fast_check(passed)
+        if passed:
+            state["output_acceptable"] = True
+            state["evaluation_result"] = {"is_valid": True, "confidence": 1.0, "issues": [], "suggestions": [], "sampled": False}
+            state["review_notes"] = "Fast check passed (trusted agent, full validation not sampled)"
+            self._record_retry_success(state)
+            logger.info(f"⚡ {agent_name} is trusted for {state['task_type']} - accepted on fast check")
+    
+    def _aborted_result(self, state: AgentSystemState, agent_name: str, monitor: StreamingValidator) -> Dict[str, Any]:
+        """Turn an attempt stopped by streaming validation into a failed delegation"""
+        self.early_aborts += 1
+        self.aborted_tokens += monitor.tokens
+        state["evaluation_result"] = {
+            "is_valid": False,
+            "confidence": 0.0,
+            "issues": [monitor.aborted_issue],
+            "suggestions": ["Provide actual task completion", "Include relevant details", "Avoid generic responses"]
+        }
+        return {
+            "status": "error",
+            "error": f"Generation aborted after {monitor.tokens} tokens: {monitor.aborted_issue}",
+            "agent": agent_name
+        }
+    
+    def _registry_view(self, state: AgentSystemState):
+        """Get the registry snapshot this request reads from"""
+        snapshot = state.get("registry_snapshot")
+        return snapshot if snapshot is not None else self.registry.snapshot()
+    
+    def _attempt_timeout(self, state: AgentSystemState) -> float:
+        """Timeout for one delegation: the agent timeout, but never past the request deadline"""
+        timeout = self.agent_timeout
+        remaining = self._remaining_budget(state)
+        if remaining is not None:
+            timeout = max(0.0, min(timeout, remaining))
+        return timeout
+    
+    def _remaining_budget(self, state: AgentSystemState) -> Optional[float]:
+        """Seconds left before the request deadline, or None when the request is unbounded"""
+        deadline = state.get("deadline")
+        if deadline is None:
+            return None
+        return deadline - time.time()
+    
+    def _record_attempt(self, seconds: float) -> None:
+        if self.avg_attempt_seconds is None:
+            self.avg_attempt_seconds = seconds
+        else:
+            self.avg_attempt_seconds = 0.8 * self.avg_attempt_seconds + 0.2 * seconds
+    
+    def _has_time_for_attempt(self, state: AgentSystemState) -> bool:
+        """Check whether another delegation is likely to finish before the deadline"""
+        remaining = self._remaining_budget(state)
+        if remaining is None:
+            return True
+        return remaining >= max(1.0, self.avg_attempt_seconds or 0.0)
+    
     def _failure_strategy(self, state: AgentSystemState) -> str:
         """Determine failure handling strategy"""
+        if not self._has_time_for_attempt(state):
+            return "give_up"
+        
         current_agent = state.get("chosen_agent")
         
         if current_agent:
@@ -703,56 +1009,33 @@ graph TD
         
         return "give_up"
     
-    def _find_best_fit_agent(self, state: AgentSystemState) -> Optional[Any]:
+    def _find_best_fit_agent(self, state: AgentSystemState, top_k: int = 3) -> Optional[Any]:
         """Find the best fit agent when no exact matches are found and creation is disabled"""
-        all_agents = self.registry.get_available_agents()
-        if not all_agents:
+        # One vectorized pass over the registry's capability and description matrices
+        ranked = self._registry_view(state).rank_agents(
+            state["capabilities_required"],
+            state.get("task_type", ""),
+            top_k=top_k
+        )
+        if not ranked:
             return None
         
-        required_capabilities = state["capabilities_required"]
-        task_type = state.get("task_type", "").lower()
-        
-        # Score agents based on capability overlap and task type match
-        best_agent = None
-        best_score = -1
-        
-        for agent in all_agents:
-            score = 0
-            agent_capabilities = getattr(agent, 'capabilities', [])
-            
-            # Score for capability overlap
-            capability_overlap = len(set(required_capabilities) & set(agent_capabilities))
-            score += capability_overlap * 2
-            
-            # Score for task type match (check if agent name contains task type)
-            if task_type and task_type in agent.name.lower():
-                score += 3
-            
-            # Score for agent description relevance
-            description = getattr(agent, 'description', '').lower()
-            for capability in required_capabilities:
-                if capability.lower() in description:
-                    score += 1
-            
-            logger.info(f"🔍 Agent {agent.name} score: {score} (capabilities: {agent_capabilities})")
-            
-            if score > best_score:
-                best_score = score
-                best_agent = agent
-        
-        if best_agent:
-            logger.info(f"🏆 Best fit agent: {best_agent.name} (score: {best_score})")
-        
+        state["available_agents"] = [agent for agent, _ in ranked]
+        best_agent, best_score = ranked[0]
+        logger.info(f"🏆 Best fit agent: {best_agent.name} (score: {best_score}, "
+                    f"top {len(ranked)}: {[(agent.name, score) for agent, score in ranked]})")
         return best_agent
     
-    async def process_task(self, task_input: str, task_context: Dict[str, Any] = None, allow_agent_creation: bool = True) -> Dict[str, Any]:
-        """Process a task through the workflow"""
-        initial_state = AgentSystemState(
+    def _create_initial_state(self, task_input: str, task_context: Dict[str, Any] = None, allow_agent_creation: bool = True,
+                              deadline: Optional[float] = None) -> AgentSystemState:
+        """Build the initial workflow state for a task"""
+        return AgentSystemState(
             task_input=task_input,
             task_context=task_context or {},
             task_analysis=None,
             capabilities_required=[],
             task_type="",
+            registry_snapshot=self.registry.snapshot(),
             available_agents=[],
             chosen_agent=None,
             agent_created=False,
@@ -766,19 +1049,83 @@ graph TD
             spawn_attempted=False,
             correction_attempted=False,
             allow_agent_creation=allow_agent_creation,  # Add control parameter
+            deadline=deadline,
+            retry_feedback=None,
+            speculation=None,
             final_response=None,
             error_message=None,
             agents_created=0,  # Track number of agents created
             agent_attempts={}   # Track attempts per agent
         )
+    
+    def _summarize_node(self, node: str, state: AgentSystemState) -> Dict[str, Any]:
+        """Summarize the state a node produced for streaming clients"""
+        chosen_agent = state.get("chosen_agent")
+        summary = {"node": node}
+        
+        if node == "analyze_task":
+            analysis = state.get("task_analysis") or {}
+            summary.update({
+                "task_type": state.get("task_type"),
+                "capabilities_required": state.get("capabilities_required", []),
+                "confidence": analysis.get("confidence", 0)
+            })
+        elif node == "check_registry":
+            summary.update({
+                "chosen_agent": chosen_agent.name if chosen_agent else None,
+                "candidate_agents": [agent.name for agent in state.get("available_agents", [])]
+            })
+        elif node == "delegate_task":
+            summary.update({
+                "agent": chosen_agent.name if chosen_agent else None,
+                "attempt": state.get("agent_attempts", {}).get(chosen_agent.name, 0) if chosen_agent else 0,
+                "execution_success": state.get("execution_success", False)
+            })
+        elif node == "evaluate_output":
+            summary.update({
+                "output_acceptable": state.get("output_acceptable", False),
+                "review_notes": state.get("review_notes", "")
+            })
+        elif node == "handle_failure":
+            summary["retry_count"] = state.get("retry_count", 0)
+        elif node == "spawn_agent":
+            summary.update({
+                "chosen_agent": chosen_agent.name if chosen_agent else None,
+                "agents_created": state.get("agents_created", 0)
+            })
+        elif node == "return_output":
+            summary["status"] = (state.get("final_response") or {}).get("status")
+        
+        if state.get("error_message"):
+            summary["error_message"] = state["error_message"]
+        return summary
+    
+    async def process_task(self, task_input: str, task_context: Dict[str, Any] = None, allow_agent_creation: bool = True,
+                           deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Process a task through the workflow"""
+        initial_state = self._create_initial_state(task_input, task_context, allow_agent_creation, deadline)
+        start = time.perf_counter()
+        route = "graph"
+        if self.speculative_delegation:
+            self._start_speculation(initial_state)
         
         try:
+            if self.fast_path_enabled and await self._fast_path_eligible(initial_state):
+                final_response = await self._fast_path(initial_state)
+                if final_response is not None:
+                    self._record_routing(initial_state, final_response)
+                    self._record_route(self._speculative_route(initial_state, "fast_path"), time.perf_counter() - start)
+                    return final_response
+                route = "fast_path_fallback"
+            
             logger.info("🚀 Starting LangGraph workflow execution...")
             if not allow_agent_creation:
                 logger.info("🚫 Agent creation disabled - will use existing agents only")
             # Set recursion limit to prevent infinite loops
             final_state = await self.graph.ainvoke(initial_state, config={"recursion_limit": 25})
             logger.info("✅ LangGraph workflow completed successfully")
+            self._record_routing(initial_state, final_state["final_response"])
+            self._record_route(self._speculative_route(initial_state, route), time.perf_counter() - start)
             return final_state["final_response"]
         except Exception as e:
             logger.error(f"❌ LangGraph workflow failed: {e}")
@@ -787,4 +1134,194 @@ graph TD
                 "error": str(e),
                 "agent_used": None,
                 "was_agent_created": False
-            } 
\ No newline at end of file
+            }
+        finally:
+            self._cancel_speculation(initial_state, "request finished without it")
+    
+    def _start_speculation(self, state: AgentSystemState) -> None:
+        """Start the agent that served queries of the same shape before the task has been analyzed"""
+        prediction = self.routing_cache.predict(state["task_input"])
+        if not prediction:
+            return
+        agent = self._registry_view(state).get_agent(prediction["agent"])
+        if agent is None:
+            return
+        
+        agent_input = {
+            "query": state["task_input"],
+            "context": state["task_context"],
+            "task_type": prediction["task_type"],
+            "attempt": 1
+        }
+        monitor = StreamingValidator(state["task_input"]) if self.streaming_validation else None
+        callbacks_token = request_callbacks.set((get_request_callbacks() or []) + [monitor]) if monitor else None
+        try:
+            task = asyncio.ensure_future(agent.process(agent_input))
+            # A discarded speculation's failure is never awaited; retrieve it so it isn't reported as unhandled
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        finally:
+            if callbacks_token:
+                request_callbacks.reset(callbacks_token)
+        
+        self.speculations += 1
+        state["speculation"] = {
+            "agent": agent.name,
+            "task_type": prediction["task_type"],
+            "task": task,
+            "monitor": monitor,
+            "started": time.perf_counter(),
+            "resolved": False,
+            "kept": False
+        }
+        logger.info(f"🔮 Speculatively delegating to {agent.name} ({prediction['task_type']}) while the task is analyzed")
+    
+    def _speculation_agrees(self, state: AgentSystemState) -> bool:
+        speculation = state["speculation"]
+        chosen = state.get("chosen_agent")
+        return (chosen is not None and chosen.name == speculation["agent"]
+                and state["task_type"] == speculation["task_type"])
+    
+    def _resolve_speculation(self, state: AgentSystemState) -> None:
+        """Cancel the speculative generation as soon as the analysis routes the task elsewhere"""
+        speculation = state.get("speculation")
+        if speculation and not speculation["resolved"] and not self._speculation_agrees(state):
+            self._cancel_speculation(state, f"analysis chose {state['chosen_agent'].name} ({state['task_type']})")
+    
+    def _claim_speculation(self, state: AgentSystemState, agent_input: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Hand the speculative generation to a first attempt it matches, cancelling it otherwise"""
+        speculation = state.get("speculation")
+        if not speculation or speculation["resolved"]:
+            return None
+        if not self._speculation_agrees(state) or agent_input["attempt"] != 1 or "feedback" in agent_input:
+            self._cancel_speculation(state, "delegation does not match the prediction")
+            return None
+        
+        speculation["resolved"] = True
+        speculation["kept"] = True
+        self.speculations_kept += 1
+        lead = time.perf_counter() - speculation["started"]
+        self.speculation_lead_seconds += lead
+        logger.info(f"🔮 Analysis agrees with the speculative delegation to {speculation['agent']} - keeping it ({lead:.2f}s head start)")
+        return speculation
+    
+    def _cancel_speculation(self, state: AgentSystemState, reason: str) -> None:
+        speculation = state.get("speculation")
+        if not speculation or speculation["resolved"]:
+            return
+        speculation["resolved"] = True
+        speculation["task"].cancel()
+        self.speculations_cancelled += 1
+        logger.info(f"🗑️ Cancelled speculative delegation to {speculation['agent']}: {reason}")
+    
+    def _speculative_route(self, state: AgentSystemState, route: str) -> str:
+        speculation = state.get("speculation")
+        return "speculative" if speculation and speculation["kept"] else route
+    
+    def _record_routing(self, state: AgentSystemState, final_response: Optional[Dict[str, Any]]) -> None:
+        """Remember which agent served the query, for speculating on later queries of the same shape"""
+        if (self.speculative_delegation and final_response and final_response.get("status") == "success"
+                and final_response.get("agent_used")):
+            self.routing_cache.record(state["task_input"], final_response["agent_used"], final_response.get("task_type", ""))
+    
+    async def _fast_path_eligible(self, state: AgentSystemState) -> bool:
+        """Analyze the task and pick its agent if it is confidently routed to an existing one"""
+        await self.analyze_task(state)
+        analysis = state.get("task_analysis") or {}
+        if state.get("error_message") or analysis.get("confidence", 0) < self.fast_path_min_confidence:
+            return False
+        
+        agents = self._registry_view(state).find_agents_by_capabilities(state["capabilities_required"])
+        if not agents:
+            return False
+        state["available_agents"] = agents
+        state["chosen_agent"] = agents[0]
+        self._resolve_speculation(state)
+        logger.info(f"⚡ Fast path: {agents[0].name} for {state['task_type']} (confidence: {analysis.get('confidence', 0):.2f})")
+        return True
+    
+    async def _fast_path(self, state: AgentSystemState) -> Optional[Dict[str, Any]]:
+        """Run the chosen agent directly with lightweight validation
+        
+        Returns the final response, or None to continue in the full graph from the updated state:
+        the graph reuses the analysis and chosen agent, a rejected attempt counts as the first try,
+        and its issues go with the retry.
+        """
+        await self.delegate_task(state)
+        if state.get("execution_success") and not state.get("output_acceptable"):
+            evaluation = self.validator.quick_check(state["agent_output"].get("response", ""))
+            state["evaluation_result"] = evaluation
+            state["output_acceptable"] = evaluation["is_valid"]
+            state["review_notes"] = f"Fast path | Confidence: {evaluation['confidence']:.2f}"
+        
+        if state.get("output_acceptable"):
+            await self.return_output(state)
+            return state["final_response"]
+        
+        logger.info("↩️ Fast path attempt rejected - continuing in the full graph")
+        state["retry_count"] = state.get("retry_count", 0) + 1
+        state["error_message"] = None
+        return None
+    
+    def _record_route(self, route: str, seconds: float) -> None:
+        self.route_counts[route] += 1
+        self.route_latency[route].append(seconds)
+    
+    def _route_stats(self) -> Dict[str, Any]:
+        """Request counts and latency (recent average / p95) per route through process_task"""
+        stats = {"fast_path_enabled": self.fast_path_enabled}
+        for route, latencies in self.route_latency.items():
+            ordered = sorted(latencies)
+            stats[route] = {
+                "requests": self.route_counts[route],
+                "avg_seconds": sum(ordered) / len(ordered) if ordered else None,
+                "p95_seconds": ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)] if ordered else None
+            }
+        return stats
+    
+    async def stream_task(self, task_input: str, task_context: Dict[str, Any] = None, allow_agent_creation: bool = True,
+                          deadline: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Process a task through the workflow, yielding an event per completed node and per LLM token"""
+        initial_state = self._create_initial_state(task_input, task_context, allow_agent_creation, deadline)
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        
+        async def run_graph():
+            final_response = None
+            try:
+                logger.info("🚀 Starting streamed LangGraph workflow execution...")
+                async for step in self.graph.astream(initial_state, config={"recursion_limit": 25}):
+                    for node, node_state in step.items():
+                        if node == END:
+                            final_response = node_state["final_response"]
+                        else:
+                            await queue.put({"event": "node", "data": self._summarize_node(node, node_state)})
+                logger.info("✅ Streamed LangGraph workflow completed successfully")
+            except Exception as e:
+                logger.error(f"❌ Streamed LangGraph workflow failed: {e}")
+                final_response = {
+                    "status": "error",
+                    "error": str(e),
+                    "agent_used": None,
+                    "was_agent_created": False
+                }
+            finally:
+                if final_response is not None:
+                    await queue.put({"event": "result", "data": final_response})
+                await queue.put(finished)
+        
+        # LLM calls inside the run inherit this context, so their tokens land on our queue
+        token = request_callbacks.set([TokenQueueHandler(queue)])
+        try:
+            runner = asyncio.ensure_future(run_graph())
+        finally:
+            request_callbacks.reset(token)
+        
+        try:
+            while True:
+                event = await queue.get()
+                if event is finished:
+                    break
+                yield event
+        finally:
+            if not runner.done():
+                runner.cancel()